@@ -0,0 +1,256 @@
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from account_store import AccountStore
+from records import MAX_VIDEOS_PER_PLAYLIST, Playlist, Video
+from reorder_engine import parse_duration
+
+# Lower bounds of the playlist size classes in the distribution
+SIZE_BINS = (0, 1, 10, 50, 100, 500, 1000, 2000, 4000, MAX_VIDEOS_PER_PLAYLIST)
+# Share of the limit beyond which a playlist counts as nearly full
+NEAR_FULL = 0.9
+
+
+def factorize(values: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    """(distinct values in order of first appearance, code of each value)."""
+    codes: Dict[str, int] = {}
+    array = np.fromiter((codes.setdefault(value, len(codes)) for value in values), dtype=np.int64)
+    return list(codes), array
+
+
+def distinct(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(sorted distinct integers, how often each occurs); a plain sort beats np.unique on large code arrays."""
+    if not len(values):
+        return values, np.zeros(0, dtype=np.int64)
+    ordered = np.sort(values)
+    starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+    return ordered[starts], np.diff(np.append(starts, len(ordered)))
+
+
+class AccountAnalytics:
+    """Account statistics computed with NumPy over a snapshot of every playlist.
+
+    Playlist metadata is held as arrays (item counts, creation years) and the
+    stored items as integer codes (playlist, video, channel), so every
+    statistic is a handful of vectorized operations and needs no API call.
+    Video details from enrichment (durations, availability) are arrays over
+    the distinct videos. Build it from the local account store with
+    from_store().
+    """
+
+    def __init__(self, playlists: List[Playlist], item_playlists: Sequence[str] = (),
+                 item_videos: Sequence[str] = (), item_channels: Sequence[str] = (),
+                 channel_titles: Optional[Dict[str, str]] = None, capacity: int = MAX_VIDEOS_PER_PLAYLIST,
+                 videos: Optional[Dict[str, Video]] = None, incomplete: Sequence[str] = ()):
+        """Arrays over the playlists and their items (parallel sequences, one entry per item).
+
+        incomplete names the playlists whose items were left out because they are not current.
+        """
+        self.playlists = playlists
+        self.incomplete = list(incomplete)
+        self.capacity = capacity
+        self.channel_titles = channel_titles or {}
+        self.ids = np.array([p.id for p in playlists], dtype=object)
+        self.counts = np.array([p.item_count for p in playlists], dtype=np.int64)
+        # Creation year, 0 when unknown
+        self.years = np.array([int(p.published_at[:4]) if p.published_at[:4].isdigit() else 0
+                               for p in playlists], dtype=np.int64)
+
+        # Items of playlists outside the listing (e.g. deleted since) are left out
+        positions = {playlist_id: n for n, playlist_id in enumerate(self.ids)}
+        item_rows = np.fromiter((positions.get(playlist_id, -1) for playlist_id in item_playlists), dtype=np.int64)
+        known = item_rows >= 0
+        self.item_rows = item_rows[known]
+        video_ids, self.item_videos = factorize(compress(item_videos, known))
+        self.video_ids = np.array(video_ids, dtype=object)
+        channels, self.item_channels = factorize(compress(item_channels, known))
+        self.channels = np.array(channels, dtype=object)
+
+        # Per distinct video: length in seconds (-1 when not enriched) and whether it is gone
+        videos = videos or {}
+        details = [videos.get(video_id) for video_id in video_ids]
+        self.video_seconds = np.fromiter((parse_duration(video.duration) if video is not None and video.duration
+                                          else -1 for video in details), dtype=np.int64, count=len(details))
+        self.video_unavailable = np.fromiter((video is not None and not video.available for video in details),
+                                             dtype=bool, count=len(details))
+
+    @classmethod
+    def from_store(cls, store: AccountStore, capacity: int = MAX_VIDEOS_PER_PLAYLIST) -> 'AccountAnalytics':
+        """Load the stored snapshot; no API call. Items of playlists not completely stored are left out."""
+        playlists = store.playlists()
+        playlist_ids, video_ids, channels = store.item_columns()
+        return cls(playlists, playlist_ids, video_ids, channels, store.channel_titles(), capacity,
+                   store.video_details(), store.incomplete_playlists([p.id for p in playlists]))
+
+    def size_distribution(self) -> Dict:
+        """Totals, mean, percentiles and a histogram of playlist sizes."""
+        if not len(self.counts):
+            return {'playlists': 0, 'videos': 0, 'bins': []}
+        bins = np.array(SIZE_BINS + (np.iinfo(np.int64).max,))
+        histogram = np.histogram(self.counts, bins=bins)[0]
+        median, p90 = np.percentile(self.counts, [50, 90])
+        return {
+            'playlists': int(len(self.counts)),
+            'videos': int(self.counts.sum()),
+            'mean': float(self.counts.mean()),
+            'median': float(median),
+            'p90': float(p90),
+            'max': int(self.counts.max()),
+            'empty': int((self.counts == 0).sum()),
+            'bins': [(int(low), int(count)) for low, count in zip(SIZE_BINS, histogram)],
+        }
+
+    def growth(self) -> List[Tuple[int, int, int, int]]:
+        """(year, playlists created, their videos now, playlists existing by year end) per creation year."""
+        dated = self.years > 0
+        if not dated.any():
+            return []
+        years, codes = np.unique(self.years[dated], return_inverse=True)
+        created = np.bincount(codes.reshape(-1))
+        videos = np.bincount(codes.reshape(-1), weights=self.counts[dated]).astype(np.int64)
+        return [(int(year), int(n), int(v), int(total))
+                for year, n, v, total in zip(years, created, videos, np.cumsum(created))]
+
+    def headroom(self) -> Dict:
+        """Room left under the per-playlist limit: free slots, full and nearly full playlists, the fullest."""
+        if not len(self.counts):
+            return {'free_slots': 0, 'full': 0, 'near_full': 0, 'fullest': []}
+        fill = self.counts / self.capacity
+        fullest = np.argsort(-self.counts, kind='stable')[:5]
+        return {
+            'free_slots': int(np.clip(self.capacity - self.counts, 0, None).sum()),
+            'full': int((self.counts >= self.capacity).sum()),
+            'near_full': int(((fill >= NEAR_FULL) & (self.counts < self.capacity)).sum()),
+            'median_fill': float(np.median(fill)),
+            'fullest': [(str(self.ids[n]), int(self.counts[n])) for n in fullest],
+        }
+
+    def shared_videos(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(first rows, second rows, shared distinct videos) for every pair of playlists sharing any.
+
+        Distinct (video, playlist) pairs are sorted by video; each pass pairs
+        every entry with the one d places after it when both hold the same
+        video, so the passes needed equal the most playlists any video is in.
+        """
+        size = len(self.ids)
+        if not len(self.item_rows):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        pairs = distinct(self.item_videos * size + self.item_rows)[0]
+        videos, rows = pairs // size, pairs % size
+        codes = []
+        for d in range(1, int(np.bincount(videos).max())):
+            same = videos[d:] == videos[:-d]
+            if not same.any():
+                break
+            # Rows ascend within a video, so the first of each pair is the smaller
+            codes.append(rows[:-d][same] * size + rows[d:][same])
+        if not codes:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        pair_codes, shared = distinct(np.concatenate(codes))
+        return pair_codes // size, pair_codes % size, shared
+
+    def top_overlaps(self, limit: int = 5) -> List[Tuple[str, str, int]]:
+        """The playlist pairs sharing the most distinct videos, as (playlist ID, playlist ID, shared)."""
+        first, second, shared = self.shared_videos()
+        order = np.argsort(-shared, kind='stable')[:limit]
+        return [(str(self.ids[first[n]]), str(self.ids[second[n]]), int(shared[n])) for n in order]
+
+    def top_channels(self, limit: int = 10) -> List[Tuple[str, int, int]]:
+        """(channel, items, playlists holding it) for the channels with the most saved items."""
+        if not len(self.item_channels):
+            return []
+        items = np.bincount(self.item_channels, minlength=len(self.channels))
+        holders = distinct(self.item_channels * len(self.ids) + self.item_rows)[0] // len(self.ids)
+        playlists = np.bincount(holders, minlength=len(self.channels))
+        named = self.channels != ''
+        order = [n for n in np.argsort(-items, kind='stable') if named[n]][:limit]
+        return [(self.channel_titles.get(self.channels[n], self.channels[n]), int(items[n]), int(playlists[n]))
+                for n in order]
+
+    def video_details(self) -> Dict:
+        """Running time and availability of the saved videos checked with videos.list so far."""
+        known = self.video_seconds >= 0
+        seconds = self.video_seconds[known]
+        return {
+            'enriched': int(known.sum() + (self.video_unavailable & ~known).sum()),
+            'total_seconds': int(seconds.sum()),
+            'median_seconds': float(np.median(seconds)) if len(seconds) else 0.0,
+            # Every saved copy counts: each takes a playlist slot
+            'item_seconds': int(np.clip(self.video_seconds[self.item_videos], 0, None).sum()),
+            'unavailable': int(self.video_unavailable.sum()),
+            'unavailable_items': int(self.video_unavailable[self.item_videos].sum()),
+        }
+
+    def report(self, limit: int = 5) -> Dict:
+        """Every statistic, as plain values (e.g. for JSON)."""
+        return {
+            'sizes': self.size_distribution(),
+            'growth': self.growth(),
+            'headroom': self.headroom(),
+            'top_overlaps': self.top_overlaps(limit),
+            'top_channels': self.top_channels(limit * 2),
+            'videos': self.video_details(),
+            'stored_items': int(len(self.item_rows)),
+            'distinct_videos': int(len(self.video_ids)),
+            'incomplete_playlists': self.incomplete,
+        }
+
+
+def print_report(report: Dict, playlists: List[Playlist], capacity: int = MAX_VIDEOS_PER_PLAYLIST):
+    """Print a report from AccountAnalytics.report()."""
+    titles = {p.id: p.title for p in playlists}
+    sizes = report['sizes']
+    print(f"📁 Total Playlists: {sizes['playlists']}")
+    print(f"🎬 Total Videos: {sizes['videos']}")
+    if not sizes['playlists']:
+        return
+    print(f"📏 Mean {sizes['mean']:.1f}, median {sizes['median']:.0f}, 90th percentile {sizes['p90']:.0f}, "
+          f"largest {sizes['max']} videos")
+    print(f"📭 Empty Playlists: {sizes['empty']}")
+    print("\n📊 Size distribution:")
+    widest = max(count for _, count in sizes['bins']) or 1
+    bounds = [low for low, _ in sizes['bins'][1:]] + [None]
+    for (low, count), high in zip(sizes['bins'], bounds):
+        label = f"{low}+" if high is None else (f"{low}" if high == low + 1 else f"{low}-{high - 1}")
+        print(f"   {label:>10} {count:>6} {'█' * round(count / widest * 30)}")
+
+    if report['growth']:
+        print("\n📅 Playlists by creation year (videos they hold now, playlists in total):")
+        for year, created, videos, total in report['growth']:
+            print(f"   {year}  +{created:<5} {videos:>8} videos  {total:>6} total")
+
+    headroom = report['headroom']
+    print(f"\n📦 Capacity ({capacity} videos per playlist): {headroom['free_slots']} free slots, "
+          f"median fill {headroom['median_fill']:.0%}")
+    print(f"   {headroom['full']} full, {headroom['near_full']} over {NEAR_FULL:.0%}")
+    for playlist_id, count in headroom['fullest']:
+        print(f"   {titles.get(playlist_id, playlist_id)}: {count} ({count / capacity:.0%})")
+
+    if report['top_overlaps']:
+        print("\n🔗 Most overlapping playlists:")
+        for first, second, shared in report['top_overlaps']:
+            print(f"   {titles.get(first, first)} ↔ {titles.get(second, second)}: {shared} shared videos")
+    if report['top_channels']:
+        print("\n📺 Most saved channels:")
+        for channel, items, in_playlists in report['top_channels']:
+            print(f"   {channel}: {items} videos in {in_playlists} playlists")
+    videos = report['videos']
+    if videos['enriched']:
+        print(f"\n⏱️  {videos['enriched']} videos checked: {videos['total_seconds'] / 3600:.1f} h in total, "
+              f"median {videos['median_seconds'] / 60:.1f} min; playlists hold "
+              f"{videos['item_seconds'] / 3600:.1f} h with repeats")
+        if videos['unavailable']:
+            print(f"💀 {videos['unavailable']} deleted or private videos fill {videos['unavailable_items']} "
+                  f"playlist slots (python main.py --remove-unavailable)")
+    incomplete = report['incomplete_playlists']
+    if incomplete and report['stored_items']:
+        names = ', '.join(titles.get(playlist_id, playlist_id) for playlist_id in incomplete[:5])
+        more = f" and {len(incomplete) - 5} more" if len(incomplete) > 5 else ""
+        print(f"\n⚠️  {len(incomplete)} playlists without a current snapshot are left out of the item "
+              f"statistics: {names}{more}")
+    if not report['stored_items']:
+        print("\n💡 No playlist items are stored yet; run main.py once to fill the store for overlap statistics")
@@ -0,0 +1,334 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from records import UNAVAILABLE, Playlist, PlaylistItem, Video
+
+DEFAULT_STORE_PATH = os.path.join('.cache', 'account.sqlite3')
+# Seconds stored video details are trusted before videos.list is asked again
+DEFAULT_VIDEO_MAX_AGE = 7 * 24 * 3600
+# Bound on the IDs bound into one IN (...) query
+QUERY_CHUNK = 500
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS playlists ('
+    ' id TEXT PRIMARY KEY,'
+    ' title TEXT NOT NULL,'
+    ' item_count INTEGER NOT NULL,'
+    " etag TEXT NOT NULL DEFAULT '',"
+    " published_at TEXT NOT NULL DEFAULT '',"
+    ' listing_order INTEGER,'
+    # 1 once every item was stored and the playlist has not changed since
+    ' items_complete INTEGER NOT NULL DEFAULT 0,'
+    ' updated_at REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS playlist_items ('
+    ' id TEXT PRIMARY KEY,'
+    ' playlist_id TEXT NOT NULL,'
+    ' position INTEGER NOT NULL,'
+    ' video_id TEXT NOT NULL,'
+    ' title TEXT NOT NULL,'
+    " published_at TEXT NOT NULL DEFAULT '',"
+    " channel_id TEXT NOT NULL DEFAULT '',"
+    " channel_title TEXT NOT NULL DEFAULT '')",
+    'CREATE INDEX IF NOT EXISTS items_by_playlist ON playlist_items (playlist_id, position)',
+    'CREATE INDEX IF NOT EXISTS items_by_video ON playlist_items (video_id, playlist_id)',
+    'CREATE INDEX IF NOT EXISTS items_by_channel_id ON playlist_items (channel_id)',
+    'CREATE INDEX IF NOT EXISTS items_by_channel_title ON playlist_items (channel_title COLLATE NOCASE)',
+    'CREATE TABLE IF NOT EXISTS videos ('
+    ' id TEXT PRIMARY KEY,'
+    ' title TEXT,'
+    ' channel_id TEXT,'
+    ' channel_title TEXT,'
+    ' published_at TEXT,'
+    ' duration TEXT,'
+    ' privacy_status TEXT,'
+    ' updated_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS videos_by_channel ON videos (channel_id)',
+)
+# Columns added after a table was first released: (table, column, definition)
+ADDED_COLUMNS = (
+    ('playlists', 'published_at', "TEXT NOT NULL DEFAULT ''"),
+)
+
+
+class AccountStore:
+    """SQLite snapshot of the account: playlists, their items and video metadata.
+
+    The managers write everything they fetch through to it, so analysis and
+    listings can run later with no API call. Pages of a playlist's items are
+    held in memory as they are paged and replace the stored items only when
+    the last page arrives, so a read that stops early leaves the stored items
+    alone. A playlist's items are complete once replaced that way, and become
+    incomplete again when its etag changes or the tool modifies it (the rows
+    stay, as the last known snapshot). All methods are safe to call from
+    concurrent fetch workers.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """Open (or create) the store database."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Rows of playlists being paged, until their last page arrives
+        self._staged: Dict[str, List[Tuple]] = {}
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        for table, column, definition in ADDED_COLUMNS:
+            present = {row[1] for row in self._db.execute(f'PRAGMA table_info({table})')}
+            if column not in present:
+                self._db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        self._db.commit()
+
+    # --- Writes ------------------------------------------------------------
+
+    def save_playlists(self, playlists: List[Playlist], complete: bool = True):
+        """Store playlist metadata; with complete=True (a full listing) playlists missing from it are dropped."""
+        now = time.time()
+        with self._lock, self._db:
+            stored_etags = dict(self._db.execute('SELECT id, etag FROM playlists'))
+            for order, playlist in enumerate(playlists):
+                self._db.execute(
+                    'INSERT INTO playlists (id, title, item_count, etag, published_at, listing_order, updated_at)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)'
+                    ' ON CONFLICT (id) DO UPDATE SET title = excluded.title, item_count = excluded.item_count,'
+                    ' etag = excluded.etag, published_at = excluded.published_at,'
+                    ' listing_order = COALESCE(excluded.listing_order, listing_order),'
+                    ' updated_at = excluded.updated_at',
+                    (playlist.id, playlist.title, playlist.item_count, playlist.etag, playlist.published_at,
+                     order if complete else None, now)
+                )
+                # A placeholder's empty etag says nothing about its items
+                if stored_etags.get(playlist.id) and stored_etags[playlist.id] != playlist.etag:
+                    self._db.execute('UPDATE playlists SET items_complete = 0 WHERE id = ?', (playlist.id,))
+            if complete:
+                gone = set(stored_etags) - {playlist.id for playlist in playlists}
+                self._delete(gone)
+
+    def save_items_page(self, playlist_id: str, offset: int, items: List[PlaylistItem], last: bool):
+        """Stage one page of a playlist's items; the last page replaces what was stored before.
+
+        A first page (offset 0) starts over, dropping pages staged by a read
+        that was abandoned.
+        """
+        rows = [(item.id, playlist_id, offset + n, item.video_id, item.title, item.published_at,
+                 item.channel_id, item.channel_title) for n, item in enumerate(items)]
+        with self._lock:
+            if offset == 0:
+                self._staged[playlist_id] = rows
+            elif playlist_id in self._staged:
+                self._staged[playlist_id].extend(rows)
+            else:
+                # The first page was never seen; the read cannot be completed
+                return
+            if not last:
+                return
+            rows = self._staged.pop(playlist_id)
+            with self._db:
+                self._db.execute('DELETE FROM playlist_items WHERE playlist_id = ?', (playlist_id,))
+                # Items may be paged before the playlist is listed; keep a placeholder until then
+                self._db.execute(
+                    "INSERT OR IGNORE INTO playlists (id, title, item_count, updated_at) VALUES (?, '', 0, ?)",
+                    (playlist_id, time.time())
+                )
+                self._db.executemany('INSERT OR REPLACE INTO playlist_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self._db.execute('UPDATE playlists SET items_complete = 1 WHERE id = ?', (playlist_id,))
+
+    def save_items(self, playlist_id: str, items: List[PlaylistItem]):
+        """Store all of a playlist's items at once."""
+        self.save_items_page(playlist_id, 0, items, last=True)
+
+    def save_videos(self, videos: Iterable[Dict]):
+        """Store videos.list resources; parts a response lacks keep their stored values."""
+        now = time.time()
+        rows = []
+        for video in videos:
+            snippet = video.get('snippet', {})
+            rows.append((video['id'], snippet.get('title'), snippet.get('channelId'), snippet.get('channelTitle'),
+                         snippet.get('publishedAt'), video.get('contentDetails', {}).get('duration'),
+                         video.get('status', {}).get('privacyStatus'), now))
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT (id) DO UPDATE SET'
+                ' title = COALESCE(excluded.title, title),'
+                ' channel_id = COALESCE(excluded.channel_id, channel_id),'
+                ' channel_title = COALESCE(excluded.channel_title, channel_title),'
+                ' published_at = COALESCE(excluded.published_at, published_at),'
+                ' duration = COALESCE(excluded.duration, duration),'
+                ' privacy_status = COALESCE(excluded.privacy_status, privacy_status),'
+                ' updated_at = excluded.updated_at',
+                rows
+            )
+
+    def mark_unavailable(self, video_ids: Iterable[str]):
+        """Record videos that videos.list no longer returns; stored details are kept."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT INTO videos (id, privacy_status, updated_at) VALUES (?, ?, ?)'
+                ' ON CONFLICT (id) DO UPDATE SET privacy_status = excluded.privacy_status,'
+                ' updated_at = excluded.updated_at',
+                [(video_id, UNAVAILABLE, now) for video_id in video_ids]
+            )
+
+    def mark_stale(self, playlist_id: str):
+        """The tool changed a playlist: its stored items no longer describe it exactly."""
+        with self._lock, self._db:
+            self._db.execute('UPDATE playlists SET items_complete = 0 WHERE id = ?', (playlist_id,))
+
+    def rename_playlist(self, playlist_id: str, title: str):
+        """Record a playlist's new title."""
+        with self._lock, self._db:
+            self._db.execute('UPDATE playlists SET title = ? WHERE id = ?', (title, playlist_id))
+
+    def delete_playlists(self, playlist_ids: Iterable[str]):
+        """Forget deleted playlists and their items."""
+        with self._lock, self._db:
+            self._delete(playlist_ids)
+
+    def _delete(self, playlist_ids: Iterable[str]):
+        rows = [(playlist_id,) for playlist_id in playlist_ids]
+        self._db.executemany('DELETE FROM playlist_items WHERE playlist_id = ?', rows)
+        self._db.executemany('DELETE FROM playlists WHERE id = ?', rows)
+
+    # --- Reads -------------------------------------------------------------
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def playlists(self) -> List[Playlist]:
+        """Stored playlists in the order of the last full listing."""
+        return [Playlist(*row) for row in self._query(
+            "SELECT id, title, item_count, etag, published_at FROM playlists WHERE title != ''"
+            ' ORDER BY listing_order IS NULL, listing_order, title'
+        )]
+
+    def has_items(self, playlist_id: str) -> bool:
+        """Whether the playlist's current items are all stored."""
+        row = self._query('SELECT items_complete FROM playlists WHERE id = ?', (playlist_id,))
+        return bool(row and row[0][0])
+
+    def items(self, playlist_id: str) -> Optional[List[PlaylistItem]]:
+        """A playlist's stored items in position order, or None unless they are complete and current."""
+        if not self.has_items(playlist_id):
+            return None
+        return [PlaylistItem(*row) for row in self._query(
+            'SELECT id, video_id, title, published_at, channel_id, channel_title FROM playlist_items'
+            ' WHERE playlist_id = ? ORDER BY position', (playlist_id,)
+        )]
+
+    def incomplete_playlists(self, playlist_ids: Iterable[str]) -> List[str]:
+        """Those of the playlists whose current items are not all stored."""
+        return [playlist_id for playlist_id in playlist_ids if not self.has_items(playlist_id)]
+
+    def playlists_containing(self, video_id: str) -> List[Tuple[str, int]]:
+        """(playlist ID, position) of every stored item holding the video."""
+        return self._query(
+            'SELECT playlist_id, position FROM playlist_items WHERE video_id = ? ORDER BY playlist_id, position',
+            (video_id,)
+        )
+
+    def playlists_with_channel(self, channel: str) -> List[Tuple[Playlist, int]]:
+        """Playlists holding videos of a channel (ID or title, any case), with how many, most first."""
+        return [(Playlist(*row[:5]), row[5]) for row in self._query(
+            'SELECT p.id, p.title, p.item_count, p.etag, p.published_at, COUNT(*) AS videos'
+            ' FROM playlist_items i JOIN playlists p ON p.id = i.playlist_id'
+            ' WHERE i.channel_id = ? OR i.channel_title = ? COLLATE NOCASE'
+            ' GROUP BY p.id ORDER BY videos DESC, p.title', (channel, channel)
+        )]
+
+    def videos_in_many_playlists(self, min_playlists: int = 4, limit: int = 50) -> List[Tuple[str, str, int]]:
+        """(video ID, title, playlist count) of videos in at least min_playlists playlists, most first."""
+        return self._query(
+            'SELECT video_id, MAX(title), COUNT(DISTINCT playlist_id) AS playlists FROM playlist_items'
+            ' GROUP BY video_id HAVING playlists >= ? ORDER BY playlists DESC, video_id LIMIT ?',
+            (min_playlists, limit)
+        )
+
+    def redundant_items(self, playlist_ids: List[str]) -> int:
+        """Items of these playlists that repeat a video already in one of them."""
+        if not playlist_ids:
+            return 0
+        marks = ','.join('?' * len(playlist_ids))
+        return self._query(
+            f'SELECT COUNT(*) - COUNT(DISTINCT video_id) FROM playlist_items WHERE playlist_id IN ({marks})',
+            tuple(playlist_ids)
+        )[0][0]
+
+    def top_overlaps(self, limit: int = 5) -> List[Tuple[str, str, int]]:
+        """The playlist pairs sharing the most distinct videos, as (playlist ID, playlist ID, shared)."""
+        return self._query(
+            'SELECT a.playlist_id, b.playlist_id, COUNT(DISTINCT a.video_id) AS shared'
+            ' FROM playlist_items a JOIN playlist_items b'
+            ' ON b.video_id = a.video_id AND b.playlist_id > a.playlist_id'
+            ' GROUP BY a.playlist_id, b.playlist_id ORDER BY shared DESC LIMIT ?', (limit,)
+        )
+
+    def item_columns(self) -> Tuple[List[str], List[str], List[str]]:
+        """Playlist IDs, video IDs and channels (ID, or title if missing) of the items of complete playlists, as columns."""
+        rows = self._query(
+            "SELECT i.playlist_id, i.video_id, CASE WHEN i.channel_id != '' THEN i.channel_id ELSE i.channel_title END"
+            ' FROM playlist_items i JOIN playlists p ON p.id = i.playlist_id'
+            ' WHERE p.items_complete = 1 ORDER BY i.playlist_id, i.position'
+        )
+        if not rows:
+            return [], [], []
+        playlist_ids, video_ids, channels = zip(*rows)
+        return list(playlist_ids), list(video_ids), list(channels)
+
+    def channel_titles(self) -> Dict[str, str]:
+        """Channel ID -> title, as seen on stored items."""
+        return dict(self._query(
+            "SELECT channel_id, MAX(channel_title) FROM playlist_items WHERE channel_id != '' GROUP BY channel_id"
+        ))
+
+    def video_details(self, video_ids: Optional[Iterable[str]] = None,
+                      max_age: Optional[float] = None) -> Dict[str, Video]:
+        """Stored video details (of the given IDs, or all), only those checked within max_age seconds.
+
+        Rows stored without a privacy status (a videos.list call that did not
+        ask for it) do not count as checked.
+        """
+        query = ('SELECT id, title, channel_id, channel_title, published_at, duration, privacy_status'
+                 ' FROM videos WHERE privacy_status IS NOT NULL AND updated_at >= ?')
+        since = time.time() - max_age if max_age is not None else 0
+        with self._lock:
+            if video_ids is None:
+                rows = self._db.execute(query, (since,)).fetchall()
+            else:
+                video_ids = list(video_ids)
+                rows = []
+                for start in range(0, len(video_ids), QUERY_CHUNK):
+                    chunk = video_ids[start:start + QUERY_CHUNK]
+                    rows.extend(self._db.execute(f"{query} AND id IN ({','.join('?' * len(chunk))})",
+                                                 [since] + chunk))
+        return {row[0]: Video(*(value or '' for value in row)) for row in rows}
+
+    def unavailable_videos(self) -> Set[str]:
+        """IDs of the videos recorded as unavailable."""
+        with self._lock:
+            return {row[0] for row in self._db.execute('SELECT id FROM videos WHERE privacy_status = ?',
+                                                         (UNAVAILABLE,))}
+
+    def counts(self) -> Dict[str, int]:
+        """Numbers of stored playlists, items, distinct videos and video metadata rows."""
+        row = self._query(
+            "SELECT (SELECT COUNT(*) FROM playlists WHERE title != ''),"
+            ' (SELECT COUNT(*) FROM playlist_items),'
+            ' (SELECT COUNT(DISTINCT video_id) FROM playlist_items),'
+            ' (SELECT COUNT(*) FROM videos)'
+        )[0]
+        return dict(zip(('playlists', 'items', 'videos', 'video_details'), row))
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
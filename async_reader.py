@@ -0,0 +1,165 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from quota_ledger import QuotaLedger
+from records import PLAYLIST_FIELDS, PLAYLIST_ITEM_FIELDS, Playlist, PlaylistItem
+
+API_ROOT = 'https://youtube.googleapis.com/'
+SERVICE_PATH = 'youtube/v3/'
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncApiError(Exception):
+    """An error response from the API on the async read path."""
+
+    def __init__(self, status: int, reason: str, message: str):
+        super().__init__(f'{status} {reason}: {message}')
+        self.status = status
+        self.reason = reason
+        self.message = message
+
+    @classmethod
+    def from_response(cls, status: int, payload: Optional[Dict]) -> 'AsyncApiError':
+        """Build the error from an API error body."""
+        error = (payload or {}).get('error', {})
+        errors = error.get('errors') or [{}]
+        return cls(status, errors[0].get('reason', 'unknown'), error.get('message', ''))
+
+
+def access_token_from_credentials(creds) -> str:
+    """A valid OAuth access token from google-auth credentials, refreshing if needed."""
+    if not creds.valid:
+        from google.auth.transport.requests import Request
+        creds.refresh(Request())
+    return creds.token
+
+
+class AsyncYouTubeReader:
+    """Async counterpart of YouTubePlaylistManager's read-only calls.
+
+    Requests run on one aiohttp session with at most max_concurrency in
+    flight. Pagination requests page N+1 as soon as page N's nextPageToken
+    arrives, before page N is handed to the caller, and different playlists
+    are paged concurrently. Use as an async context manager.
+    """
+
+    def __init__(self, access_token: Optional[str] = None, api_root: str = API_ROOT,
+                 max_concurrency: int = DEFAULT_CONCURRENCY, ledger: Optional[QuotaLedger] = None):
+        """Point the reader at the API (or a FakeYouTubeAPI base_url); every call is charged to ledger if given."""
+        self.access_token = access_token
+        self.ledger = ledger
+        self.base_url = api_root.rstrip('/') + '/' + SERVICE_PATH
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> 'AsyncYouTubeReader':
+        headers = {'Authorization': f'Bearer {self.access_token}'} if self.access_token else {}
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._session = aiohttp.ClientSession(
+            headers=headers,
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+
+    async def _get(self, resource: str, params: Dict) -> Dict:
+        """Issue one GET, bounded by the concurrency semaphore."""
+        query = {
+            key: ('true' if value is True else 'false' if value is False else str(value))
+            for key, value in params.items() if value is not None
+        }
+        async with self._semaphore:
+            if self.ledger is not None:
+                self.ledger.record(f'{resource}.list')
+            async with self._session.get(self.base_url + resource, params=query) as response:
+                payload = await response.json(content_type=None)
+                if response.status >= 400:
+                    raise AsyncApiError.from_response(response.status, payload)
+                return payload
+
+    async def _pages(self, resource: str, params: Dict) -> AsyncIterator[Dict]:
+        """Yield every page of a list call, prefetching the next page."""
+        pending = asyncio.ensure_future(self._get(resource, params))
+        try:
+            while pending is not None:
+                page = await pending
+                next_page_token = page.get('nextPageToken')
+                # Request page N+1 before the caller starts on page N
+                pending = (
+                    asyncio.ensure_future(self._get(resource, dict(params, pageToken=next_page_token)))
+                    if next_page_token else None
+                )
+                yield page
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def list_playlists(self) -> List[Playlist]:
+        """Get all playlists owned by the authenticated user."""
+        playlists = []
+        async for page in self._pages('playlists', {'part': 'snippet,contentDetails', 'mine': True,
+                                                    'maxResults': 50, 'fields': PLAYLIST_FIELDS}):
+            playlists.extend(Playlist.from_resource(resource) for resource in page.get('items', []))
+        return playlists
+
+    async def iter_playlist_items(self, playlist_id: str) -> AsyncIterator[PlaylistItem]:
+        """Yield the items of one playlist as pages arrive; closing it early cancels the prefetch."""
+        async for page in self._pages('playlistItems', {'part': 'snippet,contentDetails', 'playlistId': playlist_id,
+                                                        'maxResults': 50, 'fields': PLAYLIST_ITEM_FIELDS}):
+            for resource in page.get('items', []):
+                yield PlaylistItem.from_resource(resource)
+
+    async def list_playlist_items(self, playlist_id: str) -> List[PlaylistItem]:
+        """Get all items of one playlist."""
+        return [item async for item in self.iter_playlist_items(playlist_id)]
+
+    async def list_many_playlist_items(self, playlist_ids: List[str]) -> Tuple[Dict[str, List[PlaylistItem]], Dict[str, AsyncApiError]]:
+        """Page several playlists concurrently; returns items and errors per playlist ID."""
+        playlist_ids = list(dict.fromkeys(playlist_ids))
+        outcomes = await asyncio.gather(
+            *(self.list_playlist_items(playlist_id) for playlist_id in playlist_ids),
+            return_exceptions=True
+        )
+        results: Dict[str, List[PlaylistItem]] = {}
+        errors: Dict[str, AsyncApiError] = {}
+        for playlist_id, outcome in zip(playlist_ids, outcomes):
+            if isinstance(outcome, AsyncApiError):
+                errors[playlist_id] = outcome
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[playlist_id] = outcome
+        return results, errors
+
+    async def list_videos(self, video_ids: List[str], part: str = 'snippet,contentDetails,status') -> List[Dict]:
+        """Get video resources, 50 IDs per request, all chunks concurrently."""
+        video_ids = list(dict.fromkeys(video_ids))
+        chunks = [video_ids[i:i + 50] for i in range(0, len(video_ids), 50)]
+        pages = await asyncio.gather(
+            *(self._get('videos', {'part': part, 'id': ','.join(chunk), 'maxResults': 50}) for chunk in chunks)
+        )
+        return [video for page in pages for video in page.get('items', [])]
+
+    async def scan_account(self) -> Tuple[List[Playlist], Dict[str, List[PlaylistItem]]]:
+        """Fetch every playlist and all of their items."""
+        playlists = await self.list_playlists()
+        videos_by_playlist, errors = await self.list_many_playlist_items([p.id for p in playlists])
+        for playlist_id, e in errors.items():
+            print(f"Error fetching videos for playlist {playlist_id}: {e}")
+            videos_by_playlist[playlist_id] = []
+        return playlists, videos_by_playlist
+
+
+def scan_account(access_token: Optional[str] = None, api_root: str = API_ROOT,
+                 max_concurrency: int = DEFAULT_CONCURRENCY,
+                 ledger: Optional[QuotaLedger] = None) -> Tuple[List[Playlist], Dict[str, List[PlaylistItem]]]:
+    """Blocking helper: run a full async account scan and return its results."""
+    async def run():
+        async with AsyncYouTubeReader(access_token, api_root, max_concurrency, ledger) as reader:
+            return await reader.scan_account()
+    return asyncio.run(run())
@@ -0,0 +1,144 @@
+import time
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+
+from metrics import BATCH_METHOD
+from request_executor import RequestExecutor, classify, is_transient
+
+DEFAULT_BATCH_SIZE = 50
+
+
+class BatchOutcome(NamedTuple):
+    succeeded: Dict[str, Optional[Dict]]
+    failed: Dict[str, HttpError]
+
+
+class BatchWriter:
+    """Sends write requests through batch HTTP requests instead of one round trip each.
+
+    Results are handled per item; only items that failed with a transient
+    error are retried (with exponential backoff), everything else is
+    reported back in BatchOutcome.failed.
+    """
+
+    def __init__(self, youtube, batch_size: int = DEFAULT_BATCH_SIZE, max_attempts: int = 3,
+                 retry_delay: float = 1.0, batch_uri: Optional[str] = None, ledger=None,
+                 executor: Optional[RequestExecutor] = None, metrics=None):
+        """Create a writer for a client; batch_uri overrides the batch endpoint (e.g. a fake API).
+
+        Requests inside a batch are charged to the quota ledger, if given, one by one.
+        With an executor, batches are paced (each part counts) and use its backoff.
+        metrics (a metrics.Metrics) gets every part's outcome, retry and round trip.
+        """
+        self.youtube = youtube
+        self.ledger = ledger
+        self.batch_size = max(1, min(batch_size, 1000))
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.batch_uri = batch_uri
+        self.executor = executor
+        self.metrics = metrics
+
+    def _new_batch(self, callback) -> BatchHttpRequest:
+        """An empty batch for this client."""
+        if self.batch_uri:
+            return BatchHttpRequest(callback=callback, batch_uri=self.batch_uri)
+        return self.youtube.new_batch_http_request(callback=callback)
+
+    def run(self, requests: Dict[str, object]) -> BatchOutcome:
+        """Execute HttpRequests keyed by a caller-chosen unique ID."""
+        succeeded: Dict[str, Optional[Dict]] = {}
+        failed: Dict[str, HttpError] = {}
+        pending = dict(requests)
+
+        def on_result(request_id, response, exception):
+            if self.metrics is not None:
+                status = exception.resp.status if isinstance(exception, HttpError) else (0 if exception else 200)
+                request = requests[request_id]
+                self.metrics.record_call(request.methodId or '', status, bytes_sent=len(request.body or ''))
+            if exception is None:
+                succeeded[request_id] = response
+                failed.pop(request_id, None)
+            else:
+                failed[request_id] = exception
+
+        for attempt in range(self.max_attempts):
+            keys = list(pending)
+            for start in range(0, len(keys), self.batch_size):
+                chunk = keys[start:start + self.batch_size]
+                batch = self._new_batch(on_result)
+                for key in chunk:
+                    batch.add(pending[key], request_id=key)
+                    if self.ledger is not None:
+                        self.ledger.record(pending[key].methodId or '')
+                    if self.metrics is not None and attempt:
+                        self.metrics.record_retry(pending[key].methodId or '')
+                if self.executor is not None:
+                    self.executor.pace(len(chunk))
+                started = time.perf_counter()
+                status = 200
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    # The batch request as a whole was rejected
+                    status = e.resp.status
+                    for key in chunk:
+                        if key not in succeeded:
+                            failed[key] = e
+                            if self.metrics is not None:
+                                self.metrics.record_call(pending[key].methodId or '', status)
+                if self.metrics is not None:
+                    self.metrics.record_call(BATCH_METHOD, status, time.perf_counter() - started, units=0)
+                if self.executor is not None:
+                    self._adapt([failed[key] for key in chunk if key in failed])
+
+            pending = {key: requests[key] for key, e in failed.items() if is_transient(e)}
+            if not pending or attempt == self.max_attempts - 1:
+                break
+            if self.executor is not None:
+                time.sleep(self.executor.backoff(attempt))
+            else:
+                time.sleep(self.retry_delay * (2 ** attempt))
+
+        return BatchOutcome(succeeded, failed)
+
+    def _adapt(self, errors):
+        """Tell the executor how a batch went: speed up if clean, else react once per kind of error."""
+        if not errors:
+            self.executor.succeeded()
+            return
+        seen = set()
+        for e in errors:
+            if classify(e) not in seen:
+                seen.add(classify(e))
+                self.executor.handle_error(e)
+
+    def insert_videos(self, playlist_id: str, video_ids: Iterable[str]) -> BatchOutcome:
+        """Add videos to a playlist; results are keyed by video ID."""
+        requests = {}
+        for video_id in dict.fromkeys(video_ids):
+            requests[video_id] = self.youtube.playlistItems().insert(
+                part='snippet',
+                body={
+                    'snippet': {
+                        'playlistId': playlist_id,
+                        'resourceId': {
+                            'kind': 'youtube#video',
+                            'videoId': video_id
+                        }
+                    }
+                }
+            )
+        return self.run(requests)
+
+    def delete_playlist_items(self, item_ids: Iterable[str]) -> BatchOutcome:
+        """Remove playlist items; results are keyed by playlistItem ID."""
+        return self.run({item_id: self.youtube.playlistItems().delete(id=item_id)
+                         for item_id in dict.fromkeys(item_ids)})
+
+    def delete_playlists(self, playlist_ids: Iterable[str]) -> BatchOutcome:
+        """Delete playlists; results are keyed by playlist ID."""
+        return self.run({playlist_id: self.youtube.playlists().delete(id=playlist_id)
+                         for playlist_id in dict.fromkeys(playlist_ids)})
@@ -0,0 +1,246 @@
+"""End-to-end benchmarks of YouTubePlaylistManager against the local fake API.
+
+Every scenario runs on a freshly generated account served by FakeYouTubeAPI in
+a separate process, so the memory figures cover the manager alone:
+
+    python benchmark.py --playlists 500 --items 5000 --latency 0.02
+    python benchmark.py --scenarios merge_playlists,move_video --json results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from account_store import AccountStore
+from async_reader import scan_account
+from fake_youtube_api import FakeYouTubeAPI
+from main import YouTubePlaylistManager
+from operation_journal import OperationJournal
+from playlist_cache import PlaylistPageCache
+from quota_ledger import QuotaLedger
+from records import Playlist
+
+# Large enough that the client-side ledger never holds a run back
+UNLIMITED_QUOTA = 10 ** 9
+# Pace that never makes a local run wait
+UNLIMITED_RATE = 10000.0
+
+
+def _serve(conn, options: Dict):
+    """Child process body: build the account, serve it until told to stop."""
+    api = FakeYouTubeAPI.populate(**options)
+    conn.send(api.start())
+    conn.recv()
+    api.stop()
+
+
+class FakeAccount:
+    """A synthetic account served by FakeYouTubeAPI in its own process."""
+
+    def __init__(self, **options):
+        """Generate and serve the account (options go to FakeYouTubeAPI.populate)."""
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, args=(child_conn, options), daemon=True)
+        self._process.start()
+        self.base_url = self._conn.recv()
+
+    def close(self):
+        """Stop the server process."""
+        self._conn.send('stop')
+        self._process.join(timeout=10)
+
+
+def new_manager(base_url: str, directory: str, fetch_workers: int,
+                rate: Optional[float] = None, projects: int = 1) -> YouTubePlaylistManager:
+    """A manager with an empty cache, ledger, journal and store, talking to the fake API.
+
+    rate fixes the executors' pace (requests per second) instead of letting them adapt;
+    with projects > 1, writes are spread over that many pooled projects.
+    """
+    manager = YouTubePlaylistManager(
+        cache=PlaylistPageCache(os.path.join(directory, 'pages.sqlite3')),
+        fetch_workers=fetch_workers,
+        ledger=QuotaLedger(os.path.join(directory, 'quota_ledger.json'), daily_limit=UNLIMITED_QUOTA),
+        journal=OperationJournal(os.path.join(directory, 'operation_journal.jsonl')),
+        api_root=base_url,
+        store=AccountStore(os.path.join(directory, 'account.sqlite3')),
+        projects=[f'project-{n}' for n in range(1, projects)],
+    )
+    if rate is not None:
+        executors = [project.executor for project in manager.pool.projects] if manager.pool else [manager.executor]
+        for executor in executors:
+            executor.bucket.set_rate(rate)
+            executor.max_rate = rate
+    return manager
+
+
+# --- Scenarios ---------------------------------------------------------
+# Each prepares its arguments with a separate manager (not measured) and
+# returns the call to time on a fresh one.
+
+def prepare_get_all_playlists(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                              rng: random.Random) -> Callable:
+    return lambda manager: manager.get_all_playlists()
+
+
+def prepare_full_scan(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                      rng: random.Random) -> Callable:
+    def scan(manager):
+        manager.fetcher.fetch([p.id for p in manager.get_all_playlists()])
+    return scan
+
+
+def prepare_async_scan(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                       rng: random.Random) -> Callable:
+    # The same reads as full_scan on the asyncio reader, charged to the manager's ledger
+    return lambda manager: scan_account(api_root=manager.api_root, max_concurrency=manager.fetcher.max_workers,
+                                        ledger=manager.ledger)
+
+
+def prepare_merge_playlists(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                            rng: random.Random) -> Callable:
+    group = setup.find_duplicate_playlists(playlists)[0]
+    return lambda manager: manager.merge_playlists(group[1:], group[0])
+
+
+def prepare_auto_merge(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                       rng: random.Random) -> Callable:
+    return lambda manager: manager.auto_merge_all_duplicates(list(playlists))
+
+
+def prepare_reorder(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                    rng: random.Random, moves: int = 20) -> Callable:
+    playlist = max(playlists, key=lambda p: p.item_count)
+    videos = setup.get_playlist_videos(playlist.id)
+    positions = [(rng.choice(videos).video_id, rng.randrange(len(videos))) for _ in range(moves)]
+    return lambda manager: manager.reorder_playlist_videos(playlist.id, positions)
+
+
+def prepare_move_video(setup: YouTubePlaylistManager, playlists: List[Playlist],
+                       rng: random.Random) -> Callable:
+    source, target = playlists[0], playlists[-1]
+    present = {item.video_id for item in setup.get_playlist_videos(target.id)}
+    # The last video not yet in the target: the worst case for the early-exit lookup
+    video_id = next(item.video_id for item in reversed(setup.get_playlist_videos(source.id))
+                    if item.video_id not in present)
+    return lambda manager: manager.move_video_between_playlists(video_id, source.id, target.id)
+
+
+SCENARIOS = {
+    'get_all_playlists': prepare_get_all_playlists,
+    'full_scan': prepare_full_scan,
+    'async_scan': prepare_async_scan,
+    'merge_playlists': prepare_merge_playlists,
+    'auto_merge': prepare_auto_merge,
+    'reorder': prepare_reorder,
+    'move_video': prepare_move_video,
+}
+
+
+def run_scenario(name: str, account_options: Dict, fetch_workers: int = 8, rate: Optional[float] = None,
+                 trace_memory: bool = True, verbose: bool = False, projects: int = 1) -> Dict:
+    """Run one scenario on a new account; returns wall time, calls, units and peak memory."""
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    account = FakeAccount(**account_options)
+    directory = tempfile.mkdtemp(prefix='ytpm-bench-')
+    try:
+        with output:
+            setup = new_manager(account.base_url, os.path.join(directory, 'setup'), fetch_workers, UNLIMITED_RATE)
+            playlists = setup.get_all_playlists()
+            action = SCENARIOS[name](setup, playlists, random.Random(account_options.get('seed', 0)))
+
+            manager = new_manager(account.base_url, os.path.join(directory, 'run'), fetch_workers, rate, projects)
+            if trace_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            action(manager)
+            wall_time = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+
+        calls = manager.quota.calls()
+        return {
+            'scenario': name,
+            'wall_time': round(wall_time, 3),
+            'api_calls': sum(calls.values()),
+            'quota_units': manager.quota.used(),
+            'peak_memory_mb': round(peak / 2 ** 20, 1),
+            'calls': calls,
+        }
+    finally:
+        account.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def print_results(results: List[Dict]):
+    """Print the results as a table."""
+    print(f"\n{'Scenario':<20} {'Wall (s)':>10} {'Calls':>8} {'Units':>9} {'Peak MB':>9}")
+    print("-" * 60)
+    for result in results:
+        print(f"{result['scenario']:<20} {result['wall_time']:>10.3f} {result['api_calls']:>8} "
+              f"{result['quota_units']:>9} {result['peak_memory_mb']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the playlist manager against a local fake API.")
+    parser.add_argument('--playlists', type=int, default=100, help="playlists in the account (default 100)")
+    parser.add_argument('--items', type=int, default=500, help="videos per playlist (default 500)")
+    parser.add_argument('--video-pool', type=int, default=None,
+                        help="distinct videos the playlists draw from (default 2x --items)")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every HTTP round trip")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of calls failing with a 503")
+    parser.add_argument('--daily-quota', type=int, default=None,
+                        help="units the fake allows each project per day (default: unlimited)")
+    parser.add_argument('--projects', type=int, default=1, help="Cloud projects whose quota is pooled for writes")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent playlist fetches")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="fixed requests per second (default: the executor's adaptive pacing)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip tracemalloc (its overhead inflates wall times)")
+    parser.add_argument('--verbose', action='store_true', help="show the manager's own output")
+    parser.add_argument('--json', metavar='PATH', help="also write the results to a JSON file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    account_options = {
+        'playlists': args.playlists,
+        'items_per_playlist': args.items,
+        'video_pool': args.video_pool,
+        'seed': args.seed,
+        'latency': args.latency,
+        'transient_error_rate': args.error_rate,
+        'daily_quota': args.daily_quota,
+    }
+    print(f"⏱️  {args.playlists} playlists × {args.items} videos, latency {args.latency}s, "
+          f"error rate {args.error_rate}")
+    results = []
+    for name in names:
+        print(f"Running {name}...")
+        results.append(run_scenario(name, account_options, args.workers, args.rate,
+                                    not args.no_memory, args.verbose, args.projects))
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'account': account_options, 'results': results}, fh, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from records import PlaylistItem
+
+DEFAULT_FETCH_WORKERS = 8
+
+
+class ConcurrentPlaylistFetcher:
+    """Pages the items of many playlists in parallel on a thread pool.
+
+    httplib2 is not thread-safe, so every worker thread builds and reuses its
+    own YouTube client; the manager's page cache is shared between them.
+    """
+
+    def __init__(self, manager, max_workers: int = DEFAULT_FETCH_WORKERS):
+        """Create a fetcher that pages playlists through the given manager."""
+        self.manager = manager
+        self.max_workers = max(1, max_workers)
+        self._local = threading.local()
+
+    def _client(self):
+        """The calling thread's own YouTube client."""
+        youtube = getattr(self._local, 'youtube', None)
+        if youtube is None:
+            youtube = self.manager._build_client()
+            self._local.youtube = youtube
+        return youtube
+
+    def _fetch_one(self, playlist_id: str) -> List[PlaylistItem]:
+        """Worker body: page one playlist with this thread's client."""
+        return self.manager._fetch_playlist_items(playlist_id, youtube=self._client())
+
+    def iter_fetch(self, playlist_ids: Iterable[str]) -> Iterator[Tuple[str, List[PlaylistItem], Optional[HttpError]]]:
+        """Yield (playlist ID, items, error) for every playlist as soon as it is fetched.
+
+        Callers that reduce each playlist (e.g. into an index) can drop it
+        before the next one arrives; only the playlists in flight are held.
+        Failed playlists come with an empty item list and their API error.
+        """
+        playlist_ids = list(dict.fromkeys(playlist_ids))
+        if not playlist_ids:
+            return
+
+        # A single playlist gains nothing from a pool
+        if len(playlist_ids) == 1 or self.max_workers == 1:
+            for playlist_id in playlist_ids:
+                try:
+                    yield playlist_id, self.manager._fetch_playlist_items(playlist_id), None
+                except HttpError as e:
+                    yield playlist_id, [], e
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(playlist_ids))) as pool:
+            futures = {pool.submit(self._fetch_one, playlist_id): playlist_id for playlist_id in playlist_ids}
+            for future in as_completed(futures):
+                playlist_id = futures.pop(future)
+                try:
+                    yield playlist_id, future.result(), None
+                except HttpError as e:
+                    yield playlist_id, [], e
+
+    def fetch(self, playlist_ids: Iterable[str]) -> Tuple[Dict[str, List[PlaylistItem]], Dict[str, HttpError]]:
+        """Fetch the items of every playlist.
+
+        Returns the items per playlist ID (as get_playlist_videos would) and
+        the API errors for the playlists that could not be fetched.
+        """
+        results: Dict[str, List[PlaylistItem]] = {}
+        errors: Dict[str, HttpError] = {}
+        for playlist_id, items, error in self.iter_fetch(playlist_ids):
+            if error is not None:
+                errors[playlist_id] = error
+            else:
+                results[playlist_id] = items
+        return results, errors
+
+    def map(self, function: Callable, items: List) -> List[Tuple[object, Optional[HttpError]]]:
+        """(function(item, youtube), None) or (None, API error) for every item, in order.
+
+        Other reads (e.g. videos.list batches) run on the same pool, each
+        thread with its own client.
+        """
+        def call(item, youtube):
+            try:
+                return function(item, youtube), None
+            except HttpError as e:
+                return None, e
+
+        if len(items) <= 1 or self.max_workers == 1:
+            return [call(item, self.manager.youtube) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(lambda item: call(item, self._client()), items))
@@ -0,0 +1,260 @@
+import math
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from records import Playlist
+from video_index import AccountVideoIndex
+
+# Whole words that don't tell playlists apart ("remix" keeps its "mix")
+STOP_WORDS = frozenset(['playlist', 'videos', 'music', 'songs', 'collection', 'mix', 'favorites', 'liked'])
+# Minimum trigram Jaccard similarity for two titles to count as duplicates
+DEFAULT_SIMILARITY = 0.6
+# Minimum Jaccard similarity of two playlists' video sets for content duplicates
+DEFAULT_CONTENT_SIMILARITY = 0.8
+# MinHash signature length; LSH bands x rows are derived from it
+DEFAULT_NUM_HASHES = 128
+# Below this many playlists a process pool costs more than it saves
+PARALLEL_MIN_PLAYLISTS = 5000
+
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+_NUMBER_PATTERN = re.compile(r'\d+')
+# Copy markers folded away: 'Mix (1)', 'Mix copy', 'Mix - Copy 2', 'Mix (copy)'; a bare number is kept
+_COPY_SUFFIX = re.compile(r'(?:\s*-)?\s*(?:\(\d+\)|\(copy(?:\s+\d+)?\)|\bcopy(?:\s+\d+)?)\s*$', re.IGNORECASE)
+_MASK64 = (1 << 64) - 1
+_EMPTY = 1 << 64
+
+
+def normalize_title(title: str, stop_words: FrozenSet[str] = STOP_WORDS) -> str:
+    """Lowercased words of a title without stop words or a copy marker ('Chill Vibes (1)' -> 'chill vibes').
+
+    Numbers stay: 'Jazz 2019' and 'Jazz 2020' are different playlists.
+    """
+    words = _WORD_PATTERN.findall((_COPY_SUFFIX.sub('', title) or title).casefold())
+    kept = [word for word in words if word not in stop_words]
+    # A title made only of stop words ("Music Playlist") is compared as is
+    return ' '.join(kept or words)
+
+
+def title_grams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized title, padded so short titles have some."""
+    padded = f' {key} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2)) if key else frozenset()
+
+
+def title_numbers(key: str) -> Tuple[str, ...]:
+    """The numbers of a normalized title, in order; two titles both numbered differently are never duplicates."""
+    return tuple(_NUMBER_PATTERN.findall(key))
+
+
+def similarity(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """Jaccard similarity of two trigram sets."""
+    if not first or not second:
+        return 0.0
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def _prefix_length(size: int, threshold: float) -> int:
+    """How many of a record's rarest grams must be indexed so no pair above threshold is missed."""
+    return size - math.ceil(threshold * size) + 1
+
+
+# Per-process state for parallel verification (set by _init_worker)
+_worker_state: Tuple = ()
+
+
+def _init_worker(grams, prefixes, index, threshold, title_nums):
+    global _worker_state
+    _worker_state = (grams, prefixes, index, threshold, title_nums)
+
+
+def _similar_pairs(numbers: Sequence[int], grams=None, prefixes=None, index=None,
+                   threshold: float = DEFAULT_SIMILARITY, title_nums=None) -> List[Tuple[int, int]]:
+    """Pairs (j, i), j < i, of records similar enough and not numbered differently, for each record i."""
+    if grams is None:
+        grams, prefixes, index, threshold, title_nums = _worker_state
+    pairs = []
+    for i in numbers:
+        size = len(grams[i])
+        candidates = set()
+        for gram in prefixes[i]:
+            candidates.update(j for j in index[gram] if j < i)
+        for j in candidates:
+            # Jaccard >= t needs the smaller set to be at least t times the larger
+            # A number on one side only (a copy suffix) may still match
+            if (not title_nums[i] or not title_nums[j] or title_nums[i] == title_nums[j]) \
+                    and min(size, len(grams[j])) >= threshold * max(size, len(grams[j])) \
+                    and similarity(grams[i], grams[j]) >= threshold:
+                pairs.append((j, i))
+    return pairs
+
+
+def find_duplicate_groups(playlists: List[Playlist], threshold: float = DEFAULT_SIMILARITY,
+                          processes: int = 1, stop_words: FrozenSet[str] = STOP_WORDS) -> List[List[Playlist]]:
+    """Group playlists whose normalized titles are near-duplicates.
+
+    Titles are compared as sets of character trigrams. Only pairs sharing
+    one of their rarest grams (prefix filtering over an inverted index) are
+    compared, so the work grows with the number of likely matches rather
+    than with every pair. Titles that both carry numbers, and different
+    ones ('Jazz 2019' and 'Jazz 2020', 'Top 10' and 'Top 100'), are never
+    paired. Similar pairs are
+    joined transitively. With
+    processes > 1, large accounts are verified in a process pool.
+    """
+    playlists = [p for p in playlists if p.title.lower() != 'watch later']
+    keys = [normalize_title(p.title, stop_words) for p in playlists]
+    grams = [title_grams(key) for key in keys]
+    title_nums = [title_numbers(key) for key in keys]
+
+    # Rarest grams first: they have the shortest postings lists
+    frequency: Dict[str, int] = defaultdict(int)
+    for gram_set in grams:
+        for gram in gram_set:
+            frequency[gram] += 1
+    prefixes = []
+    index: Dict[str, List[int]] = defaultdict(list)
+    for i, gram_set in enumerate(grams):
+        ordered = sorted(gram_set, key=lambda gram: (frequency[gram], gram))
+        prefix = ordered[:_prefix_length(len(ordered), threshold)] if ordered else []
+        prefixes.append(prefix)
+        for gram in prefix:
+            index[gram].append(i)
+    index = dict(index)
+
+    numbers = range(len(playlists))
+    if processes > 1 and len(playlists) >= PARALLEL_MIN_PLAYLISTS:
+        chunks = [numbers[start::processes] for start in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(grams, prefixes, index, threshold, title_nums)) as pool:
+            pairs = [pair for chunk_pairs in pool.map(_similar_pairs, chunks) for pair in chunk_pairs]
+    else:
+        pairs = _similar_pairs(numbers, grams, prefixes, index, threshold, title_nums)
+
+    return _group_pairs(playlists, pairs)
+
+
+def _group_pairs(playlists: List[Playlist], pairs: List[Tuple[int, int]]) -> List[List[Playlist]]:
+    """Connected groups (union-find) of playlists linked by index pairs, in input order."""
+    parent = list(range(len(playlists)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for j, i in pairs:
+        parent[root(i)] = root(j)
+
+    groups: Dict[int, List[Playlist]] = {}
+    for i, playlist in enumerate(playlists):
+        groups.setdefault(root(i), []).append(playlist)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _mix(value: int) -> int:
+    """splitmix64 finalizer: a well-spread 64-bit hash of an integer."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def minhash_signature(video_numbers: Iterable[int], num_hashes: int = DEFAULT_NUM_HASHES) -> Tuple[int, ...]:
+    """MinHash signature of a set of interned video numbers.
+
+    Uses one-permutation hashing: each video is hashed once and lands in one
+    of num_hashes bins, keeping the minimum per bin; empty bins borrow the
+    next filled bin's value (densification). Two signatures agree in a
+    position with probability equal to the sets' Jaccard similarity.
+    """
+    bins = [_EMPTY] * num_hashes
+    for number in video_numbers:
+        value = _mix(number)
+        slot = value % num_hashes
+        if value < bins[slot]:
+            bins[slot] = value
+    filled = [n for n, value in enumerate(bins) if value != _EMPTY]
+    if not filled:
+        return tuple(bins)
+    # Walk backwards so every empty bin sees the nearest filled bin to its right
+    following = filled[0] + num_hashes
+    for n in range(num_hashes - 1, -1, -1):
+        if bins[n] == _EMPTY:
+            bins[n] = _mix(bins[following % num_hashes] + following - n)
+        else:
+            following = n
+    return tuple(bins)
+
+
+def lsh_bands(threshold: float, num_hashes: int = DEFAULT_NUM_HASHES) -> Tuple[int, int]:
+    """(bands, rows) whose LSH S-curve (1/bands)^(1/rows) sits closest to, but not above, threshold."""
+    options = [(num_hashes // rows, rows) for rows in range(1, num_hashes + 1) if num_hashes % rows == 0]
+    below = [option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold] or options[:1]
+    return max(below, key=lambda option: (1 / option[0]) ** (1 / option[1]))
+
+
+def find_content_duplicate_groups(playlists: List[Playlist], index: AccountVideoIndex,
+                                  threshold: float = DEFAULT_CONTENT_SIMILARITY,
+                                  num_hashes: int = DEFAULT_NUM_HASHES) -> List[List[Playlist]]:
+    """Group playlists holding mostly the same videos, whatever their titles.
+
+    Playlists with a Jaccard similarity of their video sets of at least
+    threshold are joined. LSH banding over MinHash signatures proposes
+    candidate pairs; each is then confirmed with an exact set intersection.
+    Playlists missing from the index, and empty ones, are ignored.
+    """
+    playlists = [p for p in playlists if p.title.lower() != 'watch later'
+                 and p.id in index and index.item_count(p.id)]
+    video_sets = [index.video_set(p.id) for p in playlists]
+    bands, rows = lsh_bands(threshold, num_hashes)
+
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for i, video_set in enumerate(video_sets):
+        signature = minhash_signature(video_set, num_hashes)
+        for band in range(bands):
+            buckets[band, signature[band * rows:(band + 1) * rows]].append(i)
+
+    candidates = set()
+    for members in buckets.values():
+        for n, i in enumerate(members):
+            candidates.update((j, i) for j in members[:n])
+
+    pairs = []
+    for j, i in candidates:
+        first, second = video_sets[j], video_sets[i]
+        shared = len(first & second)
+        if shared >= threshold * (len(first) + len(second) - shared):
+            pairs.append((j, i))
+    return _group_pairs(playlists, pairs)
+
+
+class DuplicateDetector:
+    """Duplicate detection settings shared by both managers."""
+
+    def __init__(self, threshold: float = DEFAULT_SIMILARITY, processes: Optional[int] = None,
+                 stop_words: Optional[FrozenSet[str]] = None,
+                 content_threshold: float = DEFAULT_CONTENT_SIMILARITY):
+        """threshold: trigram similarity needed; processes: pool size for large accounts
+        (default one per CPU, 1 to stay in-process); content_threshold: video-set
+        similarity needed for content duplicates."""
+        self.threshold = threshold
+        self.processes = processes if processes is not None else os.cpu_count() or 1
+        self.stop_words = stop_words if stop_words is not None else STOP_WORDS
+        self.content_threshold = content_threshold
+
+    def normalize(self, title: str) -> str:
+        """The comparison key of a title."""
+        return normalize_title(title, self.stop_words)
+
+    def find_groups(self, playlists: List[Playlist]) -> List[List[Playlist]]:
+        """Groups of near-duplicate playlists (Watch Later excluded)."""
+        return find_duplicate_groups(playlists, self.threshold, self.processes, self.stop_words)
+
+    def find_content_groups(self, playlists: List[Playlist], index: AccountVideoIndex) -> List[List[Playlist]]:
+        """Groups of playlists sharing most of their videos (Watch Later excluded)."""
+        return find_content_duplicate_groups(playlists, index, self.content_threshold)
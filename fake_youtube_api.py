@@ -0,0 +1,562 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from quota_ledger import quota_cost
+
+SERVICE_PATH = '/youtube/v3/'
+BATCH_PATH = '/batch'
+MAX_RESULTS = 50
+MAX_PLAYLIST_ITEMS = 5000
+# Header naming the Cloud project a call is charged to, and the project of calls without it
+PROJECT_HEADER = 'x-goog-user-project'
+DEFAULT_PROJECT = 'default'
+
+
+# API method answering each (HTTP method, resource) pair
+METHODS = {
+    ('GET', 'playlists'): 'playlists.list',
+    ('POST', 'playlists'): 'playlists.insert',
+    ('PUT', 'playlists'): 'playlists.update',
+    ('DELETE', 'playlists'): 'playlists.delete',
+    ('GET', 'playlistItems'): 'playlistItems.list',
+    ('POST', 'playlistItems'): 'playlistItems.insert',
+    ('PUT', 'playlistItems'): 'playlistItems.update',
+    ('DELETE', 'playlistItems'): 'playlistItems.delete',
+    ('GET', 'videos'): 'videos.list',
+}
+
+
+def _etag(payload) -> str:
+    """Deterministic etag for a JSON-serialisable payload."""
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def _error(status: int, reason: str, message: str) -> Tuple[int, Dict]:
+    """An error body shaped like the real API's."""
+    return status, {'error': {'code': status, 'message': message,
+                              'errors': [{'reason': reason, 'message': message}]}}
+
+
+def _title(n: int) -> str:
+    """A made-up two-word playlist title; different n give unrelated titles."""
+    syllables = ['ba', 'ko', 'ri', 'zu', 'me', 'ta', 'lo', 'ne', 'pi', 'su', 'da', 've', 'gor', 'wil', 'fen', 'mu']
+    digest = hashlib.md5(str(n).encode('ascii')).digest()
+    words = [''.join(syllables[b % len(syllables)] for b in digest[start:start + 3]) for start in (0, 3)]
+    return ' '.join(word.capitalize() for word in words)
+
+
+def _parse_fields(mask: str) -> Dict:
+    """Parse a partial-response mask ('a,b/c,items(d,e/f)') into a nested selection tree."""
+    def parse_list(i: int, tree: Dict) -> int:
+        while i < len(mask):
+            i = parse_path(i, tree)
+            if i < len(mask) and mask[i] == ',':
+                i += 1
+            else:
+                break
+        return i
+
+    def parse_path(i: int, tree: Dict) -> int:
+        j = i
+        while j < len(mask) and mask[j] not in ',/()':
+            j += 1
+        node = tree.setdefault(mask[i:j].strip(), {})
+        if j < len(mask) and mask[j] == '/':
+            return parse_path(j + 1, node)
+        if j < len(mask) and mask[j] == '(':
+            return parse_list(j + 1, node) + 1  # past the closing ')'
+        return j
+
+    tree: Dict = {}
+    parse_list(0, tree)
+    return tree
+
+
+def _select_fields(value, tree: Dict):
+    """Keep only the parts of a response selected by a parsed fields mask."""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_select_fields(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {key: _select_fields(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+class FakeYouTubeAPI:
+    """In-memory stand-in for the YouTube Data API's playlists, playlistItems and videos endpoints.
+
+    The account lives in plain dicts; handle() answers a request without any
+    transport, and start() serves the same answers over HTTP on localhost so
+    real clients can be pointed at it (api_endpoint / api_root = base_url,
+    batch_uri = batch_url). Batch requests are answered by handle_batch().
+
+    Like the real API it charges quota units per call and answers
+    quotaExceeded once daily_quota is spent. Quota is kept per Cloud project,
+    named by the X-Goog-User-Project header (DEFAULT_PROJECT without it), as
+    Google charges each project's OAuth client. It honours If-None-Match with 304,
+    and can add latency to every HTTP round trip (a batch is one) and fail
+    calls on purpose: inject_error() for the next calls of a method,
+    transient_error_rate for random 503 backendErrors.
+    """
+
+    def __init__(self, channel_id: str = 'UCfakechannel', latency: float = 0.0,
+                 daily_quota: Optional[int] = None, transient_error_rate: float = 0.0, seed: int = 0):
+        """Create an empty account; daily_quota=None never runs out."""
+        self.channel_id = channel_id
+        self.latency = latency
+        self.daily_quota = daily_quota
+        self.transient_error_rate = transient_error_rate
+        self.quota_used = 0  # all projects together
+        self.project_quota_used: Counter = Counter()
+        self.method_calls: Counter = Counter()
+        self._faults: Dict[str, List[Tuple[int, str]]] = {}
+        self._rng = random.Random(seed)
+        self.playlists: Dict[str, Dict] = {}
+        self.items: Dict[str, List[Dict]] = {}
+        self.videos: Dict[str, Dict] = {}
+        self._item_playlist: Dict[str, str] = {}
+        self.request_count = 0
+        self._next_id = 0
+        self._lock = threading.RLock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Account setup -------------------------------------------------
+
+    def _new_id(self, prefix: str) -> str:
+        """A unique resource ID."""
+        self._next_id += 1
+        return f'{prefix}{self._next_id:08d}'
+
+    def add_video(self, video_id: str, title: Optional[str] = None, channel_title: str = 'Fake Channel',
+                  published_at: str = '2020-01-01T00:00:00Z', duration: str = 'PT3M30S',
+                  privacy_status: str = 'public') -> Dict:
+        """Register a video resource."""
+        video = {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'title': title or f'Video {video_id}',
+                'channelId': 'UC' + hashlib.md5(channel_title.encode('utf-8')).hexdigest()[:22],
+                'channelTitle': channel_title,
+                'publishedAt': published_at,
+            },
+            'contentDetails': {'duration': duration},
+            'status': {'privacyStatus': privacy_status},
+        }
+        self.videos[video_id] = video
+        return video
+
+    def add_playlist(self, title: str, video_ids: Optional[List[str]] = None,
+                     published_at: str = '2020-01-01T00:00:00Z') -> str:
+        """Create a playlist holding the given videos and return its ID."""
+        with self._lock:
+            playlist_id = self._new_id('PL')
+            self.playlists[playlist_id] = {
+                'kind': 'youtube#playlist',
+                'id': playlist_id,
+                'snippet': {
+                    'title': title,
+                    'description': '',
+                    'channelId': self.channel_id,
+                    'publishedAt': published_at,
+                },
+                'version': 0,
+            }
+            self.items[playlist_id] = []
+            for video_id in video_ids or []:
+                self._append_item(playlist_id, video_id)
+            return playlist_id
+
+    def _append_item(self, playlist_id: str, video_id: str) -> Dict:
+        """Append a playlistItem for a video to a playlist."""
+        if video_id not in self.videos:
+            self.add_video(video_id)
+        video = self.videos[video_id]
+        item = {
+            'kind': 'youtube#playlistItem',
+            'id': self._new_id('UE'),
+            'snippet': {
+                'playlistId': playlist_id,
+                'title': video['snippet']['title'],
+                'channelId': self.channel_id,
+                'videoOwnerChannelId': video['snippet']['channelId'],
+                'videoOwnerChannelTitle': video['snippet']['channelTitle'],
+                'position': len(self.items[playlist_id]),
+                'resourceId': {'kind': 'youtube#video', 'videoId': video_id},
+            },
+            'contentDetails': {
+                'videoId': video_id,
+                'videoPublishedAt': video['snippet']['publishedAt'],
+            },
+        }
+        self.items[playlist_id].append(item)
+        self._item_playlist[item['id']] = playlist_id
+        self.playlists[playlist_id]['version'] += 1
+        return item
+
+    @classmethod
+    def populate(cls, playlists: int, items_per_playlist: int, video_pool: Optional[int] = None,
+                 seed: int = 0, **options) -> 'FakeYouTubeAPI':
+        """Build a synthetic account; videos are drawn from a shared pool so playlists overlap.
+
+        Playlists come in pairs with the same title, so half of them are duplicates.
+
+        Extra keyword arguments (latency, daily_quota, ...) go to the constructor.
+        """
+        rng = random.Random(seed)
+        api = cls(seed=seed, **options)
+        pool_size = video_pool or max(items_per_playlist * 2, 1)
+        pool = [f'vid{n:09d}' for n in range(pool_size)]
+        for video_id in pool:
+            api.add_video(video_id, channel_title=f'Channel {rng.randrange(50)}',
+                          published_at=f'20{rng.randrange(10, 24)}-0{rng.randrange(1, 10)}-1{rng.randrange(10)}T00:00:00Z',
+                          duration=f'PT{rng.randrange(1, 60)}M{rng.randrange(60)}S')
+        # Creation dates come from their own generator so the playlists' contents stay the same per seed
+        dates = random.Random(seed + 1)
+        for n in range(playlists):
+            count = min(items_per_playlist, pool_size)
+            created = f'20{dates.randrange(12, 25)}-{dates.randrange(1, 13):02d}-{dates.randrange(1, 29):02d}T00:00:00Z'
+            api.add_playlist(_title(n % max(playlists // 2, 1)), rng.sample(pool, count), created)
+        return api
+
+    # --- Resource rendering --------------------------------------------
+
+    def _playlist_resource(self, playlist_id: str) -> Dict:
+        """The playlist as the API returns it, with a live itemCount and etag."""
+        stored = self.playlists[playlist_id]
+        resource = {key: value for key, value in stored.items() if key != 'version'}
+        resource['contentDetails'] = {'itemCount': len(self.items[playlist_id])}
+        resource['etag'] = _etag([playlist_id, stored['version'], stored['snippet']])
+        return resource
+
+    def _item_resource(self, playlist_id: str, position: int) -> Dict:
+        """A playlistItem with its current position and etag.
+
+        Like the real API, items of deleted or private videos lose their
+        title, publish date and owner channel.
+        """
+        item = self.items[playlist_id][position]
+        item['snippet']['position'] = position
+        resource = dict(item)
+        status = self.videos[item['contentDetails']['videoId']]['status']['privacyStatus']
+        if status in ('deleted', 'private'):
+            snippet = {key: value for key, value in item['snippet'].items()
+                       if key not in ('videoOwnerChannelId', 'videoOwnerChannelTitle')}
+            snippet['title'] = 'Deleted video' if status == 'deleted' else 'Private video'
+            resource['snippet'] = snippet
+            resource['contentDetails'] = {'videoId': item['contentDetails']['videoId']}
+        resource['etag'] = _etag([item['id'], position, status])
+        return resource
+
+    def set_privacy(self, video_id: str, status: str):
+        """Change a video's privacy status, e.g. to 'deleted' or 'private' to make it unavailable."""
+        with self._lock:
+            self.videos[video_id]['status']['privacyStatus'] = status
+
+    def _page(self, kind: str, total: int, render, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """Render one page of a result list; render(n) builds the n-th resource."""
+        try:
+            max_results = min(int(params.get('maxResults', 5)), MAX_RESULTS)
+            offset = int(params['pageToken'][1:]) if params.get('pageToken') else 0
+        except ValueError:
+            return _error(400, 'invalidPageToken', 'The request specifies an invalid page token.')
+        page_items = [render(n) for n in range(offset, min(offset + max_results, total))]
+        body = {
+            'kind': kind,
+            'items': page_items,
+            'pageInfo': {'totalResults': total, 'resultsPerPage': max_results},
+        }
+        if offset + max_results < total:
+            body['nextPageToken'] = f'p{offset + max_results}'
+        if offset:
+            body['prevPageToken'] = f'p{max(offset - max_results, 0)}'
+        body['etag'] = _etag([item['etag'] for item in page_items] + [body.get('nextPageToken')])
+        return 200, body
+
+    # --- Request handling ----------------------------------------------
+
+    def inject_error(self, method: str, status: int, reason: str, times: int = 1):
+        """Make the next calls of a method (e.g. 'playlistItems.insert') fail with this error."""
+        with self._lock:
+            self._faults.setdefault(method, []).extend([(status, reason)] * times)
+
+    def _fault(self, api_method: str) -> Optional[Tuple[int, Dict]]:
+        """An injected or random failure for this call, or None."""
+        faults = self._faults.get(api_method)
+        if faults:
+            status, reason = faults.pop(0)
+            return _error(status, reason, f'Injected {reason} error.')
+        if self.transient_error_rate and self._rng.random() < self.transient_error_rate:
+            return _error(503, 'backendError', 'The service is temporarily unavailable.')
+        return None
+
+    def reset_counters(self):
+        """Forget calls and quota used so far (e.g. between benchmark runs)."""
+        with self._lock:
+            self.request_count = 0
+            self.quota_used = 0
+            self.project_quota_used.clear()
+            self.method_calls.clear()
+
+    def handle(self, method: str, resource: str, params: Dict[str, str],
+               body: Optional[Dict] = None, headers: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[Dict]]:
+        """Answer one API request; returns (HTTP status, JSON body).
+
+        headers (lower-case names) may carry If-None-Match for a conditional GET
+        and X-Goog-User-Project for the project the call is charged to.
+        """
+        api_method = METHODS.get((method, resource))
+        project = (headers or {}).get(PROJECT_HEADER, DEFAULT_PROJECT)
+        with self._lock:
+            self.request_count += 1
+            if api_method is not None:
+                fault = self._fault(api_method)
+                if fault is not None:
+                    return fault
+                cost = quota_cost(api_method)
+                if self.daily_quota is not None and self.project_quota_used[project] + cost > self.daily_quota:
+                    return _error(403, 'quotaExceeded', 'The request cannot be completed because you have '
+                                                        'exceeded your quota.')
+                self.quota_used += cost
+                self.project_quota_used[project] += cost
+                self.method_calls[api_method] += 1
+            status, response = self._dispatch(method, resource, params, body)
+        if_none_match = (headers or {}).get('if-none-match')
+        if method == 'GET' and status == 200 and if_none_match and if_none_match == response.get('etag'):
+            return 304, None
+        if method == 'GET' and params.get('fields') and status == 200:
+            response = _select_fields(response, _parse_fields(params['fields']))
+        return status, response
+
+    def _dispatch(self, method: str, resource: str, params: Dict[str, str],
+                  body: Optional[Dict]) -> Tuple[int, Optional[Dict]]:
+        """Route a request to the endpoint that answers it."""
+        if method == 'GET' and resource == 'playlists':
+            return self._list_playlists(params)
+        if method == 'GET' and resource == 'playlistItems':
+            return self._list_playlist_items(params)
+        if method == 'GET' and resource == 'videos':
+            return self._list_videos(params)
+        if method == 'POST' and resource == 'playlistItems':
+            return self._insert_playlist_item(body or {})
+        if method == 'PUT' and resource == 'playlistItems':
+            return self._update_playlist_item(body or {})
+        if method == 'DELETE' and resource == 'playlistItems':
+            return self._delete_playlist_item(params)
+        if method == 'POST' and resource == 'playlists':
+            return self._insert_playlist(body or {})
+        if method == 'PUT' and resource == 'playlists':
+            return self._update_playlist(body or {})
+        if method == 'DELETE' and resource == 'playlists':
+            return self._delete_playlist(params)
+        return _error(404, 'notFound', f'{method} {resource} is not supported by the fake API.')
+
+    def _list_playlists(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """playlists.list (mine=true or id=...)."""
+        if params.get('id'):
+            ids = [pid for pid in params['id'].split(',') if pid in self.playlists]
+        else:
+            ids = list(self.playlists)
+        return self._page('youtube#playlistListResponse', len(ids),
+                          lambda n: self._playlist_resource(ids[n]), params)
+
+    def _list_playlist_items(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """playlistItems.list (playlistId=...)."""
+        playlist_id = params.get('playlistId', '')
+        if playlist_id not in self.playlists:
+            return _error(404, 'playlistNotFound', f'Playlist {playlist_id} cannot be found.')
+        return self._page('youtube#playlistItemListResponse', len(self.items[playlist_id]),
+                          lambda n: self._item_resource(playlist_id, n), params)
+
+    def _list_videos(self, params: Dict[str, str]) -> Tuple[int, Dict]:
+        """videos.list (id=a,b,c; at most 50 IDs); unknown, deleted and private IDs are silently omitted."""
+        ids = [vid for vid in params.get('id', '').split(',') if vid]
+        if len(ids) > MAX_RESULTS:
+            return _error(400, 'invalidFilters', 'At most 50 video IDs may be requested at once.')
+        resources = []
+        for video_id in ids:
+            video = self.videos.get(video_id)
+            if video is not None and video['status']['privacyStatus'] not in ('deleted', 'private'):
+                resources.append(dict(video, etag=_etag(video)))
+        return 200, {'kind': 'youtube#videoListResponse', 'etag': _etag(resources), 'items': resources,
+                     'pageInfo': {'totalResults': len(resources), 'resultsPerPage': len(resources)}}
+
+    def _insert_playlist_item(self, body: Dict) -> Tuple[int, Dict]:
+        """playlistItems.insert; appends (or inserts at snippet.position)."""
+        snippet = body.get('snippet', {})
+        playlist_id = snippet.get('playlistId', '')
+        video_id = snippet.get('resourceId', {}).get('videoId', '')
+        if playlist_id not in self.playlists:
+            return _error(404, 'playlistNotFound', f'Playlist {playlist_id} cannot be found.')
+        video = self.videos.get(video_id)
+        if video is None or video['status']['privacyStatus'] == 'deleted':
+            return _error(404, 'videoNotFound', f'Video {video_id} cannot be found.')
+        if len(self.items[playlist_id]) >= MAX_PLAYLIST_ITEMS:
+            return _error(403, 'playlistContainsMaximumNumberOfVideos',
+                          'The playlist already contains the maximum allowed number of items.')
+        item = self._append_item(playlist_id, video_id)
+        position = snippet.get('position')
+        if position is not None and 0 <= position < len(self.items[playlist_id]) - 1:
+            self.items[playlist_id].insert(position, self.items[playlist_id].pop())
+        return 200, self._item_resource(playlist_id, self.items[playlist_id].index(item))
+
+    def _update_playlist_item(self, body: Dict) -> Tuple[int, Dict]:
+        """playlistItems.update; moves the item to snippet.position."""
+        item_id = body.get('id', '')
+        playlist_id = self._item_playlist.get(item_id)
+        if playlist_id is None or playlist_id != body.get('snippet', {}).get('playlistId'):
+            return _error(404, 'playlistItemNotFound', f'Playlist item {item_id} cannot be found.')
+        items = self.items[playlist_id]
+        index = next(n for n, item in enumerate(items) if item['id'] == item_id)
+        position = body['snippet'].get('position', index)
+        if not 0 <= position < len(items):
+            return _error(400, 'invalidPlaylistItemPosition', 'The playlist item position is invalid.')
+        items.insert(position, items.pop(index))
+        self.playlists[playlist_id]['version'] += 1
+        return 200, self._item_resource(playlist_id, position)
+
+    def _delete_playlist_item(self, params: Dict[str, str]) -> Tuple[int, Optional[Dict]]:
+        """playlistItems.delete (id=...)."""
+        item_id = params.get('id', '')
+        playlist_id = self._item_playlist.pop(item_id, None)
+        if playlist_id is None:
+            return _error(404, 'playlistItemNotFound', f'Playlist item {item_id} cannot be found.')
+        items = self.items[playlist_id]
+        items[:] = [item for item in items if item['id'] != item_id]
+        self.playlists[playlist_id]['version'] += 1
+        return 204, None
+
+    def _insert_playlist(self, body: Dict) -> Tuple[int, Dict]:
+        """playlists.insert; creates an empty playlist."""
+        title = body.get('snippet', {}).get('title')
+        if not title:
+            return _error(400, 'playlistTitleRequired', 'The playlist title is required.')
+        created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        return 200, self._playlist_resource(self.add_playlist(title, published_at=created))
+
+    def _update_playlist(self, body: Dict) -> Tuple[int, Dict]:
+        """playlists.update; changes the title (and description)."""
+        playlist_id = body.get('id', '')
+        if playlist_id not in self.playlists:
+            return _error(404, 'playlistNotFound', f'Playlist {playlist_id} cannot be found.')
+        snippet = body.get('snippet', {})
+        if not snippet.get('title'):
+            return _error(400, 'playlistTitleRequired', 'The playlist title is required.')
+        stored = self.playlists[playlist_id]
+        stored['snippet']['title'] = snippet['title']
+        stored['snippet']['description'] = snippet.get('description', stored['snippet']['description'])
+        stored['version'] += 1
+        return 200, self._playlist_resource(playlist_id)
+
+    def _delete_playlist(self, params: Dict[str, str]) -> Tuple[int, Optional[Dict]]:
+        """playlists.delete (id=...)."""
+        playlist_id = params.get('id', '')
+        if playlist_id not in self.playlists:
+            return _error(404, 'playlistNotFound', f'Playlist {playlist_id} cannot be found.')
+        del self.playlists[playlist_id]
+        for item in self.items.pop(playlist_id):
+            self._item_playlist.pop(item['id'], None)
+        return 204, None
+
+    def handle_batch(self, content_type: str, data: bytes) -> Tuple[str, bytes]:
+        """Answer a multipart/mixed batch request; returns (content type, body)."""
+        envelope = BytesParser().parsebytes(b'Content-Type: ' + content_type.encode('ascii') + b'\r\n\r\n' + data)
+        boundary = 'batch_fake_' + hashlib.md5(data).hexdigest()[:16]
+        parts = []
+        for part in envelope.get_payload():
+            content_id = part.get('Content-ID', '')
+            raw = part.get_payload(decode=True)
+            request_line, _, rest = raw.decode('utf-8').partition('\n')
+            method, target = request_line.split(' ')[:2]
+            inner = BytesParser().parsebytes(rest.encode('utf-8'))
+            payload = inner.get_payload()
+            url = urlparse(target)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, body = self.handle(method, url.path[len(SERVICE_PATH):], params,
+                                       json.loads(payload) if payload.strip() else None,
+                                       {key.lower(): value for key, value in inner.items()})
+            text = json.dumps(body) if body is not None else ''
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id.strip("<>")}>\r\n\r\n'
+                f'HTTP/1.1 {status} {"OK" if status < 400 else "Error"}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n'
+                f'Content-Length: {len(text.encode("utf-8"))}\r\n\r\n{text}\r\n'
+            )
+        body = ''.join(parts) + f'--{boundary}--\r\n'
+        return f'multipart/mixed; boundary={boundary}', body.encode('utf-8')
+
+    # --- Localhost HTTP server -----------------------------------------
+
+    def start(self, port: int = 0) -> str:
+        """Serve the fake API on localhost and return its base URL."""
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                if api.latency:
+                    time.sleep(api.latency)
+                url = urlparse(self.path)
+                if url.path == BATCH_PATH:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    content_type, data = api.handle_batch(self.headers['Content-Type'], self.rfile.read(length))
+                    self.send_response(200)
+                    self.send_header('Content-Type', content_type)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                if not url.path.startswith(SERVICE_PATH):
+                    status, payload = _error(404, 'notFound', f'Unknown path {url.path}')
+                else:
+                    params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                    length = int(self.headers.get('Content-Length') or 0)
+                    request_body = json.loads(self.rfile.read(length)) if length else None
+                    status, payload = api.handle(self.command, url.path[len(SERVICE_PATH):], params, request_body,
+                                                 {key.lower(): value for key, value in self.headers.items()})
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=UTF-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the running server (pass as api_endpoint / api_root)."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def batch_url(self) -> str:
+        """Batch endpoint of the running server (pass as batch_uri)."""
+        return self.base_url.rstrip('/') + BATCH_PATH
+
+    def stop(self):
+        """Shut the HTTP server down."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
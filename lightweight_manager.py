@@ -1,104 +1,128 @@
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import argparse
 import json
-from collections import defaultdict
-import re
-from typing import List, Dict
+from typing import List
 
-SCOPES = ['https://www.googleapis.com/auth/youtube']
+from account_analytics import AccountAnalytics, print_report
+from account_store import AccountStore
+from duplicate_detection import DuplicateDetector
+from metrics import Metrics
+from quota_ledger import QuotaLedger
+from records import PLAYLIST_FIELDS, Playlist
+from request_executor import RequestExecutor
+from youtube_client import build_youtube, load_credentials
 
 class LightweightPlaylistManager:
     def __init__(self):
         """Initialize with minimal API calls."""
-        flow = InstalledAppFlow.from_client_secrets_file('credentials.json', scopes=SCOPES)
-        self.creds = flow.run_local_server(port=8080)  # Different port
-        self.youtube = build('youtube', 'v3', credentials=self.creds)
+        self.creds = load_credentials()
+        # Every call is charged to the same quota ledger as main.py's, and timed
+        self.ledger = QuotaLedger()
+        self.metrics = Metrics()
+        self.youtube = build_youtube(self.creds,
+                                     request_builder=self.metrics.request_builder(self.ledger.request_builder()))
+        self.executor = RequestExecutor(ledger=self.ledger, metrics=self.metrics)
+        self.duplicates = DuplicateDetector()
+        self.store = AccountStore()
         
-    def get_playlists_only(self) -> List[Dict]:
-        """Get only playlist metadata (minimal API calls)."""
+    def get_playlists_only(self) -> List[Playlist]:
+        """Get only playlist metadata (1 unit per 50 playlists)."""
+        playlists = []
+        next_page_token = None
         try:
-            request = self.youtube.playlists().list(
-                part='snippet,contentDetails',
-                mine=True,
-                maxResults=50  # Get first 50 playlists only
-            )
-            response = request.execute()
-            return response.get('items', [])
+            while True:
+                request = self.youtube.playlists().list(
+                    part='snippet,contentDetails',
+                    mine=True,
+                    maxResults=50,
+                    pageToken=next_page_token,
+                    fields=PLAYLIST_FIELDS
+                )
+                response = self.executor.execute(request)
+                playlists.extend(Playlist.from_resource(resource) for resource in response.get('items', []))
+                next_page_token = response.get('nextPageToken')
+                if not next_page_token:
+                    break
         except HttpError as e:
             print(f"Error fetching playlists: {e}")
-            return []
+            # Keep what was listed, without dropping stored playlists the listing did not reach
+            self.store.save_playlists(playlists, complete=False)
+            return playlists
+        
+        self.store.save_playlists(playlists)
+        return playlists
     
-    def find_duplicates_by_name(self, playlists: List[Dict]) -> List[List[Dict]]:
+    def find_duplicates_by_name(self, playlists: List[Playlist]) -> List[List[Playlist]]:
         """Find duplicates using only playlist names (no video fetching)."""
-        normalized_groups = defaultdict(list)
-        
-        for playlist in playlists:
-            if playlist['snippet']['title'].lower() == 'watch later':
-                continue
-                
-            normalized_name = self._normalize_name(playlist['snippet']['title'])
-            normalized_groups[normalized_name].append(playlist)
-        
-        return [group for group in normalized_groups.values() if len(group) > 1]
+        return self.duplicates.find_groups(playlists)
     
     def _normalize_name(self, name: str) -> str:
         """Simple name normalization."""
-        normalized = name.lower()
-        common_words = ['playlist', 'videos', 'music', 'songs', 'collection', 'mix', 'favorites', 'liked']
-        for word in common_words:
-            normalized = normalized.replace(word, '')
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        return normalized
+        return self.duplicates.normalize(name)
     
-    def display_analysis(self, playlists: List[Dict], duplicates: List[List[Dict]]):
+    def display_analysis(self, playlists: List[Playlist], duplicates: List[List[Playlist]]):
         """Display analysis without making additional API calls."""
         print("\n📊 PLAYLIST ANALYSIS (Lightweight Mode)")
         print("=" * 50)
+        print_analysis(self.store, playlists, duplicates)
+
+def print_analysis(store: AccountStore, playlists: List[Playlist], duplicates: List[List[Playlist]]):
+    """The analytics report, duplicate groups and empty playlists.
+    
+    Statistics are computed with NumPy over every playlist in the local account
+    store; the item-level ones (overlaps, channels) cover the playlists main.py
+    has paged completely since they last changed.
+    """
+    analytics = AccountAnalytics.from_store(store)
+    print_report(analytics.report(), playlists)
+    empty_playlists = [analytics.playlists[n] for n in (analytics.counts == 0).nonzero()[0]]
+    
+    if duplicates:
+        print(f"\n🔍 Duplicate Groups Found: {len(duplicates)}")
+        total_duplicate_videos = sum(
+            sum(p.item_count for p in group) 
+            for group in duplicates
+        )
+        print(f"🎯 Videos in Duplicates: {total_duplicate_videos}")
+        print(f"💾 Potential Space Saved: {len(duplicates)} groups")
         
-        print(f"📁 Total Playlists: {len(playlists)}")
-        
-        # Count videos (from metadata only)
-        total_videos = sum(p['contentDetails']['itemCount'] for p in playlists)
-        print(f"🎬 Total Videos: {total_videos}")
-        
-        # Find large playlists
-        large_playlists = [p for p in playlists if p['contentDetails']['itemCount'] > 1000]
-        print(f"📈 Large Playlists (>1000 videos): {len(large_playlists)}")
-        
-        # Find empty playlists
-        empty_playlists = [p for p in playlists if p['contentDetails']['itemCount'] == 0]
-        print(f"📭 Empty Playlists: {len(empty_playlists)}")
-        
-        if duplicates:
-            print(f"\n🔍 Duplicate Groups Found: {len(duplicates)}")
-            total_duplicate_videos = sum(
-                sum(p['contentDetails']['itemCount'] for p in group) 
-                for group in duplicates
-            )
-            print(f"🎯 Videos in Duplicates: {total_duplicate_videos}")
-            print(f"💾 Potential Space Saved: {len(duplicates)} groups")
-            
-            print("\n📋 Duplicate Groups:")
-            for i, group in enumerate(duplicates, 1):
-                print(f"\nGroup {i}:")
-                for playlist in group:
-                    title = playlist['snippet']['title']
-                    count = playlist['contentDetails']['itemCount']
-                    print(f"  • {title} ({count} videos)")
-        else:
-            print("\n✅ No duplicate playlists found!")
-        
-        if empty_playlists:
-            print(f"\n🗑️  Empty Playlists (can be safely deleted):")
-            for playlist in empty_playlists:
-                print(f"  • {playlist['snippet']['title']}")
+        print("\n📋 Duplicate Groups:")
+        for i, group in enumerate(duplicates, 1):
+            print(f"\nGroup {i}:")
+            for playlist in group:
+                title = playlist.title
+                count = playlist.item_count
+                print(f"  • {title} ({count} videos)")
+    else:
+        print("\n✅ No duplicate playlists found!")
+    
+    if empty_playlists:
+        print(f"\n🗑️  Empty Playlists (can be safely deleted):")
+        for playlist in empty_playlists:
+            print(f"  • {playlist.title}")
+
+def run_offline(store: AccountStore):
+    """The analysis on the stored snapshot alone: no sign-in, no API calls."""
+    playlists = store.playlists()
+    if not playlists:
+        print("The account store is empty; run once online to fill it.")
+        return
+    print("\n📊 PLAYLIST ANALYSIS (Offline)")
+    print("=" * 50)
+    print_analysis(store, playlists, DuplicateDetector().find_groups(playlists))
 
 def main():
     """Lightweight playlist analysis."""
+    parser = argparse.ArgumentParser(description="Quota-friendly playlist analysis.")
+    parser.add_argument('--offline', action='store_true',
+                        help="report on the local account store without signing in or calling the API")
+    args = parser.parse_args()
+    
     print("🎵 Lightweight YouTube Playlist Manager")
     print("=" * 50)
+    if args.offline:
+        run_offline(AccountStore())
+        return
     print("💡 This mode uses minimal API calls to save quota")
     
     manager = LightweightPlaylistManager()
@@ -123,6 +147,10 @@ def main():
     print("1. Wait for quota reset tomorrow to use full features")
     print("2. Use Analysis mode in main.py when quota is available")
     print("3. Consider upgrading Google Cloud account for higher quotas")
+    
+    print("\n📊 API usage this run")
+    print(manager.metrics.summary())
+    print(f"🪙 {manager.ledger.used()} units used today, {manager.ledger.remaining()} left")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,23 +1,166 @@
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import argparse
+import cProfile
 import json
+import os
+import pstats
 from collections import defaultdict
-import re
-from typing import List, Dict, Tuple, Set
-import time
+from typing import List, Dict, Iterator, Tuple, Set, Optional, NamedTuple
 
-SCOPES = ['https://www.googleapis.com/auth/youtube']
+from account_store import DEFAULT_VIDEO_MAX_AGE, AccountStore
+from batch_ops import BatchOutcome, BatchWriter, DEFAULT_BATCH_SIZE
+from reorder_engine import apply_commands, parse_duration, plan_moves, sort_key
+from video_index import AccountVideoIndex, PlaylistItemIndex
+from maintenance_daemon import DEFAULT_INTERVAL, MaintenanceDaemon
+from merge_planner import MergePlan, largest_playlist_cost, plan_group, plan_merge, print_projection
+from metrics import Metrics
+from concurrent_fetch import ConcurrentPlaylistFetcher, DEFAULT_FETCH_WORKERS
+from duplicate_detection import DuplicateDetector, PARALLEL_MIN_PLAYLISTS
+from operation_journal import OperationJournal, Transaction, operation_key
+from operation_scheduler import OperationScheduler
+from playlist_cache import PlaylistPageCache
+from purge_planner import (KEEP_RULES, PURGE_SCOPES, PurgePlan, plan_purge, plan_removal, print_purge_preview,
+                           purge_operations)
+from quota_ledger import QuotaLedger
+from quota_pool import QuotaPool, QuotaProject, project_name, project_request_builder
+from records import (MAX_VIDEOS_PER_PLAYLIST, PLAYLIST_FIELDS, PLAYLIST_ITEM_FIELDS, UNAVAILABLE, VIDEO_FIELDS,
+                     VIDEO_PARTS, Playlist, PlaylistItem, Video)
+from request_executor import RequestExecutor, error_reason, is_transient
+from sync_engine import AccountSync
+from youtube_client import build_youtube, load_credentials
+
+class MergeOutcome(NamedTuple):
+    success: bool
+    added: int
+    failed: int
+    skipped: int  # new videos left out because of MAX_VIDEOS_PER_PLAYLIST
 
 class YouTubePlaylistManager:
-    def __init__(self):
-        """Initialize the YouTube API client with authentication."""
-        flow = InstalledAppFlow.from_client_secrets_file('credentials.json', scopes=SCOPES)
-        self.creds = flow.run_local_server(port=8080)
-        self.youtube = build('youtube', 'v3', credentials=self.creds)
-        self.MAX_VIDEOS_PER_PLAYLIST = 5000
-        
-    def get_all_playlists(self) -> List[Dict]:
+    def __init__(self, cache: Optional[PlaylistPageCache] = None, fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                 batch_size: int = DEFAULT_BATCH_SIZE, ledger: Optional[QuotaLedger] = None,
+                 duplicates: Optional[DuplicateDetector] = None, journal: Optional[OperationJournal] = None,
+                 api_root: Optional[str] = None, metrics: Optional[Metrics] = None,
+                 store: Optional[AccountStore] = None, projects: Optional[List[str]] = None,
+                 interactive: bool = True):
+        """Initialize the YouTube API client with authentication.
+        
+        api_root points the manager at another server speaking the API, such as
+        FakeYouTubeAPI.start(); no credentials are loaded then.
+        
+        projects are the client secrets files of further Cloud projects whose
+        daily quota is pooled with ours for writes (see quota_pool.QuotaPool).
+        
+        With interactive=False a missing or revoked token raises RuntimeError
+        instead of opening the browser, for unattended runs.
+        """
+        self.interactive = interactive
+        self.api_root = api_root
+        self.batch_size = batch_size
+        # Stored token, refreshed as needed; the browser only opens on first use
+        self.creds = load_credentials(interactive=interactive) if api_root is None else None
+        # Every call made through our clients is charged to the quota ledger and timed
+        self.ledger = ledger if ledger is not None else QuotaLedger()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.youtube = self._build_client()
+        # Every call is paced and retried through one executor, shared by all threads
+        self.executor = RequestExecutor(ledger=self.ledger, metrics=self.metrics)
+        self.cache = cache if cache is not None else PlaylistPageCache()
+        self.fetcher = ConcurrentPlaylistFetcher(self, max_workers=fetch_workers)
+        self.batch = self._batch_writer(self.youtube, self.ledger, self.executor)
+        # With several projects, writes are spread over their pooled quota and
+        # budget checks see the pool; reads stay on our own project
+        self.pool: Optional[QuotaPool] = None
+        if projects:
+            self.pool = QuotaPool([QuotaProject('default', self.youtube, self.ledger, self.executor, self.batch)]
+                                  + [self._project(client_secrets) for client_secrets in projects])
+            self.batch = self.pool
+        self.quota = self.pool if self.pool is not None else self.ledger
+        # Synced account model (see sync_engine.AccountSync); reads prefer it when set
+        self.account: Optional[AccountSync] = None
+        # videoId -> itemId indexes of playlists used for moves, kept current by those moves
+        self._item_indexes: Dict[str, PlaylistItemIndex] = {}
+        # Compact video -> playlists index of every playlist fetched so far
+        self.video_index = AccountVideoIndex()
+        self.duplicates = duplicates if duplicates is not None else DuplicateDetector()
+        # Write-ahead log of merges, moves and deletes, for resuming after a crash
+        self.journal = journal if journal is not None else OperationJournal()
+        # Everything fetched is written through to the local SQLite snapshot
+        self.store = store if store is not None else AccountStore()
+        self.MAX_VIDEOS_PER_PLAYLIST = MAX_VIDEOS_PER_PLAYLIST
+        
+    def _build_client(self, creds=None, ledger: Optional[QuotaLedger] = None, project: Optional[str] = None):
+        """A new YouTube client (for our credentials by default) whose calls are charged to the ledger and metered.
+        
+        project names the Cloud project in every call, which only a fake API needs.
+        """
+        ledger = ledger or self.ledger
+        request_builder = self.metrics.request_builder(ledger.request_builder())
+        if self.api_root is not None:
+            import httplib2
+            if project is not None:
+                request_builder = project_request_builder(project, request_builder)
+            return build_youtube(None, request_builder=request_builder, http=httplib2.Http(),
+                                 client_options={'api_endpoint': self.api_root})
+        return build_youtube(creds or self.creds, request_builder=request_builder)
+    
+    def _batch_writer(self, youtube, ledger: QuotaLedger, executor: RequestExecutor) -> BatchWriter:
+        """A batch writer sending through the given client, charging the given ledger."""
+        return BatchWriter(youtube, batch_size=self.batch_size, ledger=ledger, executor=executor,
+                           metrics=self.metrics,
+                           batch_uri=self.api_root.rstrip('/') + '/batch' if self.api_root else None)
+    
+    def _project(self, client_secrets: str) -> QuotaProject:
+        """The write path of another Cloud project: its own token, ledger, client, executor and batch writer."""
+        name = project_name(client_secrets)
+        creds = None
+        if self.api_root is None:
+            creds = load_credentials(client_secrets, os.path.join('.cache', f'token-{name}.json'),
+                                     interactive=self.interactive)
+        ledger = QuotaLedger(os.path.join(os.path.dirname(self.ledger.path), f'quota_ledger-{name}.json'),
+                             daily_limit=self.ledger.daily_limit)
+        youtube = self._build_client(creds, ledger, project=name)
+        executor = RequestExecutor(ledger=ledger, metrics=self.metrics)
+        return QuotaProject(name, youtube, ledger, executor, self._batch_writer(youtube, ledger, executor))
+    
+    def _writer(self):
+        """(client, executor) for a single write call: the pooled project with the most quota left, if pooled."""
+        if self.pool is not None:
+            project = self.pool.pick()
+            return project.youtube, project.executor
+        return self.youtube, self.executor
+    
+    def _fetch_page(self, kind: str, owner: str, page_token: Optional[str], request) -> Dict:
+        """Execute a list request through the page cache, revalidating with ETags."""
+        cached = self.cache.get(kind, owner, page_token)
+        if cached is not None:
+            if self.cache.is_fresh(cached):
+                return cached.body
+            request.headers['If-None-Match'] = cached.etag
+        
+        try:
+            response = self.executor.execute(request)
+        except HttpError as e:
+            # 304 Not Modified: the cached copy is still current
+            if cached is not None and e.resp.status == 304:
+                self.cache.touch(kind, owner, page_token)
+                return cached.body
+            raise
+        
+        self.cache.put(kind, owner, page_token, response.get('etag', ''), response)
+        return response
+    
+    def _playlist_changed(self, playlist_id: str):
+        """Make cached pages of a playlist we just modified revalidate on next read."""
+        self.cache.invalidate('playlistItems', playlist_id)
+        self.store.mark_stale(playlist_id)
+        self._item_indexes.pop(playlist_id, None)
+        self.video_index.remove_playlist(playlist_id)
+        if self.account is not None:
+            self.account.mark_stale(playlist_id)
+        # itemCount / title in the playlists listing change too
+        self.cache.invalidate('playlists', 'mine')
+    
+    def get_all_playlists(self) -> List[Playlist]:
         """Get all playlists owned by the authenticated user."""
         playlists = []
         next_page_token = None
@@ -28,11 +171,12 @@ class YouTubePlaylistManager:
                     part='snippet,contentDetails',
                     mine=True,
                     maxResults=50,
-                    pageToken=next_page_token
+                    pageToken=next_page_token,
+                    fields=PLAYLIST_FIELDS
                 )
-                response = request.execute()
+                response = self._fetch_page('playlists', 'mine', next_page_token, request)
                 
-                playlists.extend(response['items'])
+                playlists.extend(Playlist.from_resource(resource) for resource in response.get('items', []))
                 next_page_token = response.get('nextPageToken')
                 
                 if not next_page_token:
@@ -41,133 +185,218 @@ class YouTubePlaylistManager:
         except HttpError as e:
             print(f"Error fetching playlists: {e}")
             return []
-            
+        
+        self.store.save_playlists(playlists)
         return playlists
     
-    def get_playlist_videos(self, playlist_id: str) -> List[Dict]:
-        """Get all videos in a specific playlist."""
-        videos = []
+    def _iter_playlist_items(self, playlist_id: str, youtube=None) -> Iterator[PlaylistItem]:
+        """Yield a playlist's items page by page; API errors are raised to the caller.
+        
+        Worker threads pass their own client, since httplib2 is not thread-safe.
+        Stopping early saves the calls for the remaining pages. Each page is
+        written through to the store as it arrives.
+        """
+        youtube = youtube or self.youtube
         next_page_token = None
+        offset = 0
+        
+        while True:
+            request = youtube.playlistItems().list(
+                part='snippet,contentDetails',
+                playlistId=playlist_id,
+                maxResults=50,
+                pageToken=next_page_token,
+                fields=PLAYLIST_ITEM_FIELDS
+            )
+            response = self._fetch_page('playlistItems', playlist_id, next_page_token, request)
+            
+            items = [PlaylistItem.from_resource(resource) for resource in response.get('items', [])]
+            next_page_token = response.get('nextPageToken')
+            self.store.save_items_page(playlist_id, offset, items, last=not next_page_token)
+            offset += len(items)
+            yield from items
+            
+            if not next_page_token:
+                break
+    
+    def _fetch_playlist_items(self, playlist_id: str, youtube=None) -> List[PlaylistItem]:
+        """All of a playlist's items; API errors are raised to the caller."""
+        return list(self._iter_playlist_items(playlist_id, youtube))
+    
+    def iter_playlist_videos(self, playlist_id: str) -> Iterator[PlaylistItem]:
+        """Stream the videos in a playlist, fetching pages only as they are consumed."""
+        # Serve from the synced account model when it is current
+        if self.account is not None:
+            videos = self.account.current_items(playlist_id)
+            if videos is not None:
+                yield from videos
+                return
         
         try:
-            while True:
-                request = self.youtube.playlistItems().list(
-                    part='snippet,contentDetails',
-                    playlistId=playlist_id,
-                    maxResults=50,
-                    pageToken=next_page_token
-                )
-                response = request.execute()
-                
-                videos.extend(response['items'])
-                next_page_token = response.get('nextPageToken')
-                
-                if not next_page_token:
-                    break
-                    
+            yield from self._iter_playlist_items(playlist_id)
         except HttpError as e:
             print(f"Error fetching videos for playlist {playlist_id}: {e}")
-            return []
-            
-        return videos
     
-    def find_duplicate_playlists(self, playlists: List[Dict]) -> List[List[Dict]]:
-        """Find playlists that might be duplicates based on name similarity."""
-        # Group playlists by normalized name
-        normalized_groups = defaultdict(list)
+    def get_playlist_videos(self, playlist_id: str) -> List[PlaylistItem]:
+        """Get all videos in a specific playlist."""
+        return list(self.iter_playlist_videos(playlist_id))
+    
+    def find_playlist_item(self, playlist_id: str, video_id: str) -> Optional[PlaylistItem]:
+        """The first item of a playlist holding a video, reading no further pages than needed."""
+        index = self._item_indexes.get(playlist_id)
+        if index is not None:
+            item_id = index.item_id(video_id)
+            return PlaylistItem(item_id, video_id, '') if item_id else None
+        return next((item for item in self.iter_playlist_videos(playlist_id) if item.video_id == video_id), None)
+    
+    def get_many_playlist_videos(self, playlist_ids: List[str]) -> Dict[str, List[PlaylistItem]]:
+        """Get the videos of several playlists, paging the ones not yet synced in parallel."""
+        results = {}
+        to_fetch = []
+        for playlist_id in playlist_ids:
+            videos = self.account.current_items(playlist_id) if self.account is not None else None
+            if videos is not None:
+                results[playlist_id] = videos
+            else:
+                to_fetch.append(playlist_id)
+        
+        fetched, errors = self.fetcher.fetch(to_fetch)
+        results.update(fetched)
+        for playlist_id, e in errors.items():
+            print(f"Error fetching videos for playlist {playlist_id}: {e}")
+            results[playlist_id] = []
+        return results
+    
+    def _indexed(self, videos_by_playlist: Dict[str, List[PlaylistItem]]) -> AccountVideoIndex:
+        """The account video index, with any of these playlists not yet in it added."""
+        for playlist_id, videos in videos_by_playlist.items():
+            if playlist_id not in self.video_index:
+                self.video_index.add_playlist(playlist_id, videos)
+        return self.video_index
+    
+    def index_playlists(self, playlist_ids: List[str]) -> AccountVideoIndex:
+        """The account video index with these playlists in it, added one by one as they are fetched.
         
-        for playlist in playlists:
-            # Skip Watch Later playlist
-            if playlist['snippet']['title'].lower() == 'watch later':
+        Unlike get_many_playlist_videos, no playlist's item list outlives its
+        indexing, so statistics over many playlists need only the compact index.
+        """
+        to_fetch = []
+        for playlist_id in dict.fromkeys(playlist_ids):
+            if playlist_id in self.video_index:
                 continue
-                
-            # Normalize playlist name (remove common words, lowercase, etc.)
-            normalized_name = self._normalize_playlist_name(playlist['snippet']['title'])
-            normalized_groups[normalized_name].append(playlist)
+            videos = self.account.current_items(playlist_id) if self.account is not None else None
+            if videos is not None:
+                self.video_index.add_playlist(playlist_id, videos)
+            else:
+                to_fetch.append(playlist_id)
         
-        # Return groups with more than one playlist
-        duplicates = [group for group in normalized_groups.values() if len(group) > 1]
-        return duplicates
+        for playlist_id, videos, e in self.fetcher.iter_fetch(to_fetch):
+            if e is not None:
+                print(f"Error fetching videos for playlist {playlist_id}: {e}")
+            self.video_index.add_playlist(playlist_id, videos)
+        return self.video_index
+    
+    def save_snapshot(self, playlists: List[Playlist]):
+        """Fill the store with synced items it lacks, e.g. of playlists unchanged since before it existed."""
+        if self.account is None:
+            return
+        for playlist_id in self.store.incomplete_playlists([p.id for p in playlists]):
+            videos = self.account.current_items(playlist_id)
+            if videos is not None:
+                self.store.save_items(playlist_id, videos)
+    
+    def find_duplicate_playlists(self, playlists: List[Playlist], by_content: bool = False) -> List[List[Playlist]]:
+        """Find playlists that might be duplicates based on name similarity.
+        
+        With by_content, playlists are grouped by how many videos they share instead
+        (MinHash/LSH over their video sets), which needs every playlist's items.
+        """
+        if by_content:
+            index = self.index_playlists([playlist.id for playlist in playlists])
+            return self.duplicates.find_content_groups(playlists, index)
+        # Near-duplicate titles ("Chill Vibes" / "chill vibez 2"), Watch Later excluded
+        return self.duplicates.find_groups(playlists)
     
     def _normalize_playlist_name(self, name: str) -> str:
         """Normalize playlist name for comparison."""
-        # Convert to lowercase
-        normalized = name.lower()
-        
-        # Remove common words that don't add meaning
-        common_words = ['playlist', 'videos', 'music', 'songs', 'collection', 'mix', 'favorites', 'liked']
-        for word in common_words:
-            normalized = normalized.replace(word, '')
-        
-        # Remove extra whitespace and punctuation
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
+        return self.duplicates.normalize(name)
+    
+    def merge_playlists(self, source_playlists: List[Playlist], target_playlist: Playlist,
+                        videos_by_playlist: Optional[Dict[str, List[PlaylistItem]]] = None) -> bool:
+        """Merge videos from source playlists into the target playlist.
         
-        return normalized
+        videos_by_playlist may carry already fetched items (see get_many_playlist_videos).
+        """
+        try:
+            if videos_by_playlist is None:
+                # Fetch sources and target in parallel
+                videos_by_playlist = self.get_many_playlist_videos(
+                    [playlist.id for playlist in source_playlists] + [target_playlist.id]
+                )
+        except HttpError as e:
+            print(f"Error merging playlists: {e}")
+            return False
+        plan = plan_merge(target_playlist, source_playlists, self._indexed(videos_by_playlist),
+                          self.MAX_VIDEOS_PER_PLAYLIST, self.unavailable_videos(videos_by_playlist))
+        return self._merge_playlists(plan).success
     
-    def merge_playlists(self, source_playlists: List[Dict], target_playlist: Dict) -> bool:
-        """Merge videos from source playlists into the target playlist."""
+    def _merge_playlists(self, plan: MergePlan, txn_id: Optional[str] = None) -> MergeOutcome:
+        """Carry out a merge plan and report how many inserts succeeded, failed or were skipped.
+        
+        The plan's inserts are journaled under txn_id, or a transaction of their
+        own if not given, and the same list is sent.
+        """
+        target_playlist = plan.target
+        if plan.unavailable:
+            print(f"💀 Skipping {plan.unavailable} deleted or private videos")
+        if plan.skipped:
+            print(f"⚠️  Warning: {plan.skipped} new videos would exceed the limit "
+                  f"({self.MAX_VIDEOS_PER_PLAYLIST} videos per playlist)")
+            print("Only the first videos that fit within the limit will be added.")
         try:
-            all_videos = set()
-            
-            # Collect all unique video IDs from source playlists
-            for playlist in source_playlists:
-                videos = self.get_playlist_videos(playlist['id'])
-                for video in videos:
-                    video_id = video['contentDetails']['videoId']
-                    all_videos.add(video_id)
-            
-            # Get existing videos in target playlist to avoid duplicates
-            target_videos = self.get_playlist_videos(target_playlist['id'])
-            existing_video_ids = {video['contentDetails']['videoId'] for video in target_videos}
+            inserts = [{'op': 'insert', 'group': target_playlist.id, 'playlist_id': target_playlist.id,
+                        'video_id': video_id} for video_id in plan.inserts]
+            own_txn = txn_id is None
+            if own_txn:
+                txn_id = self.journal.begin('merge', inserts)
             
-            # Add only new videos to target playlist
-            new_videos = all_videos - existing_video_ids
+            # Insert in batches; transient failures are retried per item
+            outcome = self.batch.insert_videos(target_playlist.id, plan.inserts)
+            self._journal_outcome(txn_id, inserts, outcome)
+            if own_txn:
+                self._commit_if_settled(txn_id)
+            for video_id, e in outcome.failed.items():
+                print(f"Error adding video {video_id}: {e}")
+            added_count = len(outcome.succeeded)
             
-            # Check if we'll exceed the 5000 video limit
-            total_videos_after_merge = len(target_videos) + len(new_videos)
-            if total_videos_after_merge > self.MAX_VIDEOS_PER_PLAYLIST:
-                print(f"⚠️  Warning: Merging would result in {total_videos_after_merge} videos (limit: {self.MAX_VIDEOS_PER_PLAYLIST})")
-                print("Only the first videos that fit within the limit will be added.")
-                # Limit the number of new videos to add
-                max_new_videos = self.MAX_VIDEOS_PER_PLAYLIST - len(target_videos)
-                new_videos = list(new_videos)[:max_new_videos]
-            
-            added_count = 0
-            for video_id in new_videos:
-                try:
-                    self.youtube.playlistItems().insert(
-                        part='snippet',
-                        body={
-                            'snippet': {
-                                'playlistId': target_playlist['id'],
-                                'resourceId': {
-                                    'kind': 'youtube#video',
-                                    'videoId': video_id
-                                }
-                            }
-                        }
-                    ).execute()
-                    added_count += 1
-                    # Add a small delay to avoid rate limiting
-                    time.sleep(0.1)
-                except HttpError as e:
-                    print(f"Error adding video {video_id}: {e}")
-                    continue
+            if added_count:
+                self._playlist_changed(target_playlist.id)
             
-            print(f"Successfully merged {added_count} videos into '{target_playlist['snippet']['title']}'")
-            return True
+            print(f"Successfully merged {added_count} videos into '{target_playlist.title}'")
+            return MergeOutcome(True, added_count, len(outcome.failed), plan.skipped)
             
         except HttpError as e:
             print(f"Error merging playlists: {e}")
-            return False
+            return MergeOutcome(False, 0, 0, 0)
     
-    def auto_merge_all_duplicates(self, playlists: List[Dict]) -> Dict:
-        """Automatically merge all duplicate playlists intelligently."""
-        duplicates = self.find_duplicate_playlists(playlists)
+    def _plan_group(self, group: List[Playlist], videos_by_playlist: Dict[str, List[PlaylistItem]]) -> MergePlan:
+        """Merge plan of a duplicate group into the target needing the fewest inserts (see plan_group)."""
+        return plan_group(group, self._indexed(videos_by_playlist), self.MAX_VIDEOS_PER_PLAYLIST,
+                          self.unavailable_videos(videos_by_playlist))
+    
+    def auto_merge_all_duplicates(self, playlists: List[Playlist], by_content: bool = False) -> Dict:
+        """Automatically merge all duplicate playlists intelligently.
+        
+        The detect, fetch, plan, merge and delete phases are timed in self.metrics.
+        """
+        with self.metrics.phase('detect'):
+            duplicates = self.find_duplicate_playlists(playlists, by_content)
         results = {
             'merged_groups': 0,
             'deleted_playlists': 0,
+            'videos_added': 0,
+            'videos_failed': 0,
+            'videos_skipped': 0,
             'errors': []
         }
         
@@ -176,126 +405,452 @@ class YouTubePlaylistManager:
             return results
         
         print(f"🤖 Starting automatic merge of {len(duplicates)} duplicate groups...")
+        sources_to_delete = []
         
-        for i, group in enumerate(duplicates, 1):
+        # Page every playlist involved up front, in parallel
+        with self.metrics.phase('fetch'):
+            videos_by_playlist = self.get_many_playlist_videos(
+                [playlist.id for group in duplicates for playlist in group]
+            )
+        
+        # Choose targets by overlap and report the cost before writing anything
+        with self.metrics.phase('plan'):
+            index = self._indexed(videos_by_playlist)
+            unavailable = self.unavailable_videos(videos_by_playlist)
+            plans = [plan_group(group, index, self.MAX_VIDEOS_PER_PLAYLIST, unavailable) for group in duplicates]
+        print_projection(plans, sum(largest_playlist_cost(group, index, unavailable) for group in duplicates))
+        
+        # Journal every insert and delete before the first write, so a crash can be resumed
+        operations = []
+        for plan in plans:
+            if plan.target.item_count >= self.MAX_VIDEOS_PER_PLAYLIST:
+                continue
+            group_id = plan.target.id
+            operations.extend({'op': 'insert', 'group': group_id, 'playlist_id': group_id, 'video_id': video_id}
+                              for video_id in plan.inserts)
+            if not plan.skipped:
+                # Sources are only deleted once all their videos are in the target
+                operations.extend({'op': 'delete_playlist', 'group': group_id, 'playlist_id': source.id,
+                                   'title': source.title} for source in plan.sources)
+        txn_id = self.journal.begin('auto_merge', operations)
+        
+        for i, plan in enumerate(plans, 1):
             print(f"\n--- Processing Group {i}/{len(duplicates)} ---")
             
-            # Sort by video count (keep the one with most videos as target)
-            group.sort(key=lambda p: p['contentDetails']['itemCount'], reverse=True)
-            target = group[0]
-            sources = group[1:]
+            target, sources = plan.target, plan.sources
             
-            print(f"Target: {target['snippet']['title']} ({target['contentDetails']['itemCount']} videos)")
+            print(f"Target: {target.title} ({target.item_count} videos)")
             print(f"Sources: {len(sources)} playlists to merge")
             
             # Check if target playlist is near the limit
-            target_video_count = target['contentDetails']['itemCount']
+            target_video_count = target.item_count
             if target_video_count >= self.MAX_VIDEOS_PER_PLAYLIST:
                 print(f"⚠️  Target playlist is at limit ({target_video_count} videos). Skipping this group.")
                 results['errors'].append(f"Group {i}: Target playlist at limit")
                 continue
             
             # Merge the playlists
-            if self.merge_playlists(sources, target):
+            with self.metrics.phase('merge'):
+                outcome = self._merge_playlists(plan, txn_id)
+            results['videos_added'] += outcome.added
+            results['videos_failed'] += outcome.failed
+            results['videos_skipped'] += outcome.skipped
+            if outcome.success:
                 results['merged_groups'] += 1
-                
-                # Delete the source playlists after successful merge
-                for source in sources:
-                    if self.delete_playlist(source['id']):
-                        results['deleted_playlists'] += 1
-                        # Remove from playlists list
-                        for j, playlist in enumerate(playlists):
-                            if playlist['id'] == source['id']:
-                                playlists.pop(j)
-                                break
-                    else:
-                        results['errors'].append(f"Failed to delete {source['snippet']['title']}")
+                if outcome.failed or outcome.skipped:
+                    # Deleting now would lose the videos that did not make it in
+                    results['errors'].append(
+                        f"Group {i}: {outcome.failed + outcome.skipped} videos not merged, sources kept"
+                    )
+                else:
+                    # Delete the sources once all groups are merged, in batches
+                    sources_to_delete.extend(sources)
             else:
                 results['errors'].append(f"Failed to merge group {i}")
         
+        # Delete the source playlists after successful merges
+        if sources_to_delete:
+            with self.metrics.phase('delete'):
+                outcome = self._delete_playlists(sources_to_delete)
+            self._journal_outcome(txn_id, [op for op in operations if op['op'] == 'delete_playlist'
+                                           and op['playlist_id'] in {s.id for s in sources_to_delete}], outcome)
+            deleted = set(outcome.succeeded)
+            results['deleted_playlists'] += len(deleted)
+            for source in sources_to_delete:
+                if source.id not in deleted:
+                    results['errors'].append(f"Failed to delete {source.title}")
+            # Remove from playlists list
+            playlists[:] = [playlist for playlist in playlists if playlist.id not in deleted]
+        
+        # Groups whose inserts failed for good keep their sources; the rest stays open to resume
+        self._commit_if_settled(txn_id)
+        return results
+    
+    def plan_duplicate_purge(self, playlists: List[Playlist], scope: str = 'playlist', keep: str = 'first') -> PurgePlan:
+        """Find the redundant copies of videos in one pass over the playlists' items (see purge_planner)."""
+        with self.metrics.phase('fetch'):
+            videos_by_playlist = self.get_many_playlist_videos([playlist.id for playlist in playlists])
+        with self.metrics.phase('plan'):
+            return plan_purge(playlists, videos_by_playlist, scope, keep)
+    
+    def purge_duplicate_videos(self, plan: PurgePlan) -> Dict:
+        """Remove a purge plan's redundant items in batches, journaled so an interrupted purge can be finished."""
+        results = {'removed': 0, 'failed': 0, 'errors': []}
+        operations = purge_operations(plan)
+        if not operations:
+            return results
+        txn_id = self.journal.begin('purge', operations)
+        with self.metrics.phase('delete'):
+            outcome = self.batch.delete_playlist_items([op['item_id'] for op in operations])
+        self._journal_outcome(txn_id, operations, outcome)
+        self._commit_if_settled(txn_id)
+        
+        for playlist_id in {op['playlist_id'] for op in operations if op['item_id'] in outcome.succeeded}:
+            self._playlist_changed(playlist_id)
+        results['removed'] = len(outcome.succeeded)
+        results['failed'] = len(outcome.failed)
+        for item_id, e in outcome.failed.items():
+            results['errors'].append(f"Error removing item {item_id}: {e}")
         return results
     
     def move_video_between_playlists(self, video_id: str, from_playlist_id: str, to_playlist_id: str) -> bool:
         """Move a video from one playlist to another."""
-        try:
-            # Add to target playlist
-            self.youtube.playlistItems().insert(
-                part='snippet',
-                body={
-                    'snippet': {
-                        'playlistId': to_playlist_id,
-                        'resourceId': {
-                            'kind': 'youtube#video',
-                            'videoId': video_id
-                        }
-                    }
-                }
-            ).execute()
-            
-            # Remove from source playlist
-            # First, find the playlist item ID
-            playlist_items = self.get_playlist_videos(from_playlist_id)
-            for item in playlist_items:
-                if item['contentDetails']['videoId'] == video_id:
-                    self.youtube.playlistItems().delete(id=item['id']).execute()
-                    break
-            
-            return True
-        except HttpError as e:
-            print(f"Error moving video: {e}")
-            return False
+        if from_playlist_id in self._item_indexes and to_playlist_id in self._item_indexes:
+            results = self.move_videos_between_playlists([video_id], from_playlist_id, to_playlist_id)
+            return results['moved'] == 1
+        
+        # Read each playlist only up to the video instead of indexing all of it
+        source_item = self.find_playlist_item(from_playlist_id, video_id)
+        target_item = self.find_playlist_item(to_playlist_id, video_id) if source_item else None
+        results = self._move_indexed([video_id], from_playlist_id, to_playlist_id,
+                                     PlaylistItemIndex(from_playlist_id, filter(None, [source_item])),
+                                     PlaylistItemIndex(to_playlist_id, filter(None, [target_item])))
+        return results['moved'] == 1
+    
+    def _item_index(self, playlist_id: str) -> PlaylistItemIndex:
+        """The videoId -> itemId index of a playlist, built from a single streamed fetch."""
+        index = self._item_indexes.get(playlist_id)
+        if index is None:
+            index = PlaylistItemIndex(playlist_id, self.iter_playlist_videos(playlist_id))
+            self._item_indexes[playlist_id] = index
+        return index
+    
+    def move_videos_between_playlists(self, video_ids: List[str], from_playlist_id: str, to_playlist_id: str) -> Dict:
+        """Move many videos at once: the source is fetched once, inserts and deletes are batched."""
+        source_index = self._item_index(from_playlist_id)
+        target_index = self._item_index(to_playlist_id)
+        results = self._move_indexed(video_ids, from_playlist_id, to_playlist_id, source_index, target_index)
+        
+        # Both indexes were updated in place, so they stay valid for further moves
+        self._item_indexes[from_playlist_id] = source_index
+        self._item_indexes[to_playlist_id] = target_index
+        return results
+    
+    def _move_indexed(self, video_ids: List[str], from_playlist_id: str, to_playlist_id: str,
+                      source_index: PlaylistItemIndex, target_index: PlaylistItemIndex) -> Dict:
+        """Journal, insert and delete for a move, looking items up in the given indexes."""
+        results = {'moved': 0, 'errors': []}
+        to_move = []
+        for video_id in dict.fromkeys(video_ids):
+            if video_id in source_index:
+                to_move.append(video_id)
+            else:
+                results['errors'].append(f"Video {video_id} is not in the source playlist")
+        
+        # Journal the inserts and removals first; each video is its own group
+        insert_ops = [{'op': 'insert', 'group': video_id, 'playlist_id': to_playlist_id, 'video_id': video_id}
+                      for video_id in to_move if video_id not in target_index]
+        delete_ops = [{'op': 'delete_item', 'group': video_id, 'playlist_id': from_playlist_id,
+                       'video_id': video_id, 'item_id': source_index.item_id(video_id)} for video_id in to_move]
+        txn_id = self.journal.begin('move', insert_ops + delete_ops)
+        
+        # Add to target playlist (videos already there only need removing from the source)
+        inserts = self.batch.insert_videos(to_playlist_id, [op['video_id'] for op in insert_ops])
+        self._journal_outcome(txn_id, insert_ops, inserts)
+        for video_id, e in inserts.failed.items():
+            results['errors'].append(f"Error adding video {video_id}: {e}")
+        for video_id, item in inserts.succeeded.items():
+            target_index.add(video_id, item['id'])
+        if inserts.succeeded:
+            self._playlist_changed(to_playlist_id)
+        
+        # Remove from source playlist, looking the item IDs up in the index
+        item_videos = {source_index.item_id(v): v for v in to_move if v in target_index}
+        deletes = self.batch.delete_playlist_items(item_videos)
+        self._journal_outcome(txn_id, [op for op in delete_ops if op['item_id'] in item_videos], deletes)
+        self._commit_if_settled(txn_id)
+        for item_id, e in deletes.failed.items():
+            results['errors'].append(f"Error removing video {item_videos[item_id]}: {e}")
+        for item_id in deletes.succeeded:
+            source_index.remove(item_videos[item_id], item_id)
+            results['moved'] += 1
+        if deletes.succeeded:
+            self._playlist_changed(from_playlist_id)
+        
+        for error in results['errors']:
+            print(error)
+        return results
     
     def reorder_playlist_videos(self, playlist_id: str, video_positions: List[Tuple[str, int]]) -> bool:
         """Reorder videos in a playlist by moving them to specific positions."""
+        playlist_items = self.get_playlist_videos(playlist_id)
+        item_ids = [item.id for item in playlist_items]
+        video_of_item = {item.id: item.video_id for item in playlist_items}
+        
+        # Play the moves on a local model to get the final order...
+        order = list(item_ids)
+        for video_id, new_position in video_positions:
+            item_id = next((i for i in order if video_of_item[i] == video_id), None)
+            if item_id is not None:
+                order = apply_commands(order, [(item_id, new_position)])
+        
+        # ...then reach it with as few API moves as possible
+        return self.apply_playlist_order(playlist_id, playlist_items, order)
+    
+    def apply_playlist_order(self, playlist_id: str, playlist_items: List[PlaylistItem], target_item_ids: List[str]) -> bool:
+        """Rearrange a playlist into the given item order using the fewest position updates."""
+        moves = plan_moves([item.id for item in playlist_items], target_item_ids)
+        video_of_item = {item.id: item.video_id for item in playlist_items}
+        if not moves:
+            return True
+        
+        print(f"Reordering with {len(moves)} moves ({len(playlist_items) - len(moves)} videos stay in place)")
         try:
-            for video_id, new_position in video_positions:
-                # Find the current position of the video
-                playlist_items = self.get_playlist_videos(playlist_id)
-                current_position = None
-                item_id = None
-                
-                for i, item in enumerate(playlist_items):
-                    if item['contentDetails']['videoId'] == video_id:
-                        current_position = i
-                        item_id = item['id']
-                        break
-                
-                if current_position is not None and item_id:
-                    # Move the video to the new position
-                    self.youtube.playlistItems().update(
-                        part='snippet',
-                        body={
-                            'id': item_id,
-                            'snippet': {
-                                'playlistId': playlist_id,
-                                'resourceId': {
-                                    'kind': 'youtube#video',
-                                    'videoId': video_id
-                                },
-                                'position': new_position
-                            }
+            for item_id, new_position in moves:
+                self.executor.execute(self.youtube.playlistItems().update(
+                    part='snippet',
+                    body={
+                        'id': item_id,
+                        'snippet': {
+                            'playlistId': playlist_id,
+                            'resourceId': {
+                                'kind': 'youtube#video',
+                                'videoId': video_of_item[item_id]
+                            },
+                            'position': new_position
                         }
-                    ).execute()
-            
+                    }
+                ))
             return True
         except HttpError as e:
             print(f"Error reordering videos: {e}")
             return False
+        finally:
+            self._playlist_changed(playlist_id)
+    
+    def sort_playlist(self, playlist_id: str, key: str, reverse: bool = False) -> bool:
+        """Sort a whole playlist by 'published' date, 'title' or 'duration' in one operation."""
+        playlist_items = self.get_playlist_videos(playlist_id)
+        durations = {}
+        if key == 'duration':
+            videos = self.enrich_videos([item.video_id for item in playlist_items])
+            durations = {video_id: parse_duration(video.duration) for video_id, video in videos.items() if video.duration}
+        ordered = sorted(playlist_items, key=sort_key(key, durations), reverse=reverse)
+        return self.apply_playlist_order(playlist_id, playlist_items, [item.id for item in ordered])
+    
+    def enrich_videos(self, video_ids: List[str], max_age: float = DEFAULT_VIDEO_MAX_AGE) -> Dict[str, Video]:
+        """Details of videos (title, channel, publish date, duration, availability) by video ID.
+        
+        Details stored within max_age seconds are reused; the rest come from
+        videos.list, 50 IDs (1 unit) per call, on the fetch pool. Videos the
+        API leaves out of an answer were deleted or made private and are
+        recorded as UNAVAILABLE. Videos whose call failed are left out.
+        """
+        video_ids = list(dict.fromkeys(video_ids))
+        details = self.store.video_details(video_ids, max_age)
+        missing = [video_id for video_id in video_ids if video_id not in details]
+        chunks = [missing[start:start + 50] for start in range(0, len(missing), 50)]
+        
+        def list_videos(chunk: List[str], youtube) -> List[Dict]:
+            request = youtube.videos().list(part=VIDEO_PARTS, id=','.join(chunk), maxResults=50, fields=VIDEO_FIELDS)
+            return self.executor.execute(request).get('items', [])
+        
+        gone = []
+        for chunk, (resources, e) in zip(chunks, self.fetcher.map(list_videos, chunks)):
+            if e is not None:
+                print(f"Error fetching video details: {e}")
+                continue
+            self.store.save_videos(resources)
+            for resource in resources:
+                details[resource['id']] = Video.from_resource(resource)
+            gone.extend(video_id for video_id in chunk if video_id not in details)
+        self.store.mark_unavailable(gone)
+        details.update((video_id, Video(video_id, privacy_status=UNAVAILABLE)) for video_id in gone)
+        return details
+    
+    def unavailable_videos(self, videos_by_playlist: Dict[str, List[PlaylistItem]]) -> Set[str]:
+        """Videos of these items known to be deleted or private, without any API call.
+        
+        The items themselves show it (no publish date or owner), and so do
+        earlier enrich_videos() results in the store.
+        """
+        video_ids = {item.video_id for items in videos_by_playlist.values() for item in items}
+        unavailable = {item.video_id for items in videos_by_playlist.values() for item in items if item.unavailable}
+        return unavailable | (self.store.unavailable_videos() & video_ids)
+    
+    def plan_unavailable_cleanup(self, playlists: List[Playlist], max_age: float = DEFAULT_VIDEO_MAX_AGE) -> PurgePlan:
+        """Every item of a deleted or private video, after checking all of the playlists' videos."""
+        with self.metrics.phase('fetch'):
+            videos_by_playlist = self.get_many_playlist_videos([playlist.id for playlist in playlists])
+        with self.metrics.phase('enrich'):
+            self.enrich_videos([item.video_id for items in videos_by_playlist.values() for item in items], max_age)
+        return plan_removal(playlists, videos_by_playlist, self.unavailable_videos(videos_by_playlist))
+    
+    def get_videos(self, video_ids: List[str], part: str = 'contentDetails') -> List[Dict]:
+        """Get video resources, 50 IDs per videos.list call."""
+        video_ids = list(dict.fromkeys(video_ids))
+        videos = []
+        try:
+            for start in range(0, len(video_ids), 50):
+                response = self.executor.execute(self.youtube.videos().list(
+                    part=part,
+                    id=','.join(video_ids[start:start + 50]),
+                    maxResults=50
+                ))
+                videos.extend(response.get('items', []))
+        except HttpError as e:
+            print(f"Error fetching video details: {e}")
+        self.store.save_videos(videos)
+        return videos
     
     def delete_playlist(self, playlist_id: str) -> bool:
         """Delete a playlist (use with caution!)."""
+        op = {'op': 'delete_playlist', 'group': playlist_id, 'playlist_id': playlist_id}
+        txn_id = self.journal.begin('delete', [op])
         try:
-            self.youtube.playlists().delete(id=playlist_id).execute()
+            youtube, executor = self._writer()
+            executor.execute(youtube.playlists().delete(id=playlist_id))
+            self.journal.done(txn_id, [op])
+            self.journal.commit(txn_id)
+            self.cache.discard('playlistItems', playlist_id)
+            self.cache.invalidate('playlists', 'mine')
+            self.store.delete_playlists([playlist_id])
+            self._item_indexes.pop(playlist_id, None)
+            self.video_index.remove_playlist(playlist_id)
+            if self.account is not None:
+                self.account.forget(playlist_id)
             print(f"Successfully deleted playlist {playlist_id}")
             return True
         except HttpError as e:
+            self.journal.failed(txn_id, [op])
+            self.journal.commit(txn_id)
             print(f"Error deleting playlist {playlist_id}: {e}")
             return False
     
+    def _delete_playlists(self, playlists: List[Playlist]) -> BatchOutcome:
+        """Delete several playlists in batches; results are keyed by playlist ID."""
+        outcome = self.batch.delete_playlists([playlist.id for playlist in playlists])
+        for playlist_id, e in outcome.failed.items():
+            print(f"Error deleting playlist {playlist_id}: {e}")
+        for playlist_id in outcome.succeeded:
+            self.cache.discard('playlistItems', playlist_id)
+            self._item_indexes.pop(playlist_id, None)
+            self.video_index.remove_playlist(playlist_id)
+            if self.account is not None:
+                self.account.forget(playlist_id)
+        if outcome.succeeded:
+            self.cache.invalidate('playlists', 'mine')
+            self.store.delete_playlists(outcome.succeeded)
+            print(f"Successfully deleted {len(outcome.succeeded)} playlists")
+        return outcome
+    
+    @staticmethod
+    def _outcome_key(op: Dict) -> str:
+        """The key BatchWriter reports a journaled operation's result under."""
+        return {'insert': 'video_id', 'delete_item': 'item_id', 'delete_playlist': 'playlist_id'}[op['op']]
+    
+    def _journal_outcome(self, txn_id: Optional[str], operations: List[Dict], outcome: BatchOutcome):
+        """Record a batch's results; operations that may still succeed stay open in the journal."""
+        done, failed = [], []
+        for op in operations:
+            key = op[self._outcome_key(op)]
+            e = outcome.failed.get(key)
+            if key in outcome.succeeded or (e is not None and op['op'] != 'insert' and e.resp.status == 404):
+                # A delete answered 404 was already applied before an interruption
+                done.append(op)
+            elif e is not None and not is_transient(e) and error_reason(e) != 'quotaExceeded':
+                failed.append(op)
+        self.journal.done(txn_id, done)
+        self.journal.failed(txn_id, failed)
+    
+    def _commit_if_settled(self, txn_id: Optional[str]):
+        """Close a transaction once nothing is left to resume.
+        
+        Deletions of a group whose inserts failed for good are given up first,
+        so the videos that did not make it into the target are not lost.
+        """
+        txn = self.journal.transactions.get(txn_id)
+        if txn is None:
+            return
+        lost_groups = {op['group'] for op in txn.operations
+                       if op['op'] == 'insert' and operation_key(op) in txn.failed}
+        self.journal.failed(txn_id, [op for op in txn.pending() if op['op'] != 'insert' and op['group'] in lost_groups])
+        if not txn.pending():
+            self.journal.commit(txn_id)
+    
+    def resume_journal(self) -> Dict:
+        """Finish the operations interrupted runs left in the journal, without re-listing playlists."""
+        results = {'videos_added': 0, 'videos_removed': 0, 'deleted_playlists': 0, 'remaining': 0}
+        for txn in self.journal.unfinished():
+            self._resume_transaction(txn, results)
+            self._commit_if_settled(txn.txn_id)
+            results['remaining'] += len(txn.pending())
+        return results
+    
+    def _resume_transaction(self, txn: Transaction, results: Dict):
+        """Replay a transaction's open operations, skipping those the API already applied."""
+        inserts_by_playlist = defaultdict(list)
+        for op in txn.pending():
+            if op['op'] == 'insert':
+                inserts_by_playlist[op['playlist_id']].append(op)
+        
+        for playlist_id, ops in inserts_by_playlist.items():
+            # The crash may have come after some inserts landed: look at the target first
+            self.cache.invalidate('playlistItems', playlist_id)
+            try:
+                present = {item.video_id for item in self._fetch_playlist_items(playlist_id)}
+            except HttpError as e:
+                print(f"Error fetching videos for playlist {playlist_id}: {e}")
+                if e.resp.status == 404:
+                    self.journal.failed(txn.txn_id, ops)
+                continue
+            self.journal.done(txn.txn_id, [op for op in ops if op['video_id'] in present])
+            ops = [op for op in ops if op['video_id'] not in present]
+            outcome = self.batch.insert_videos(playlist_id, [op['video_id'] for op in ops])
+            self._journal_outcome(txn.txn_id, ops, outcome)
+            for video_id, e in outcome.failed.items():
+                print(f"Error adding video {video_id}: {e}")
+            if outcome.succeeded:
+                self._playlist_changed(playlist_id)
+            results['videos_added'] += len(outcome.succeeded)
+        
+        # Deletions only for groups with every insert confirmed
+        self._commit_if_settled(txn.txn_id)
+        unconfirmed = {op['group'] for op in txn.operations
+                       if op['op'] == 'insert' and operation_key(op) not in txn.done}
+        ready = [op for op in txn.pending() if op['op'] != 'insert' and op['group'] not in unconfirmed]
+        
+        item_ops = [op for op in ready if op['op'] == 'delete_item']
+        if item_ops:
+            outcome = self.batch.delete_playlist_items([op['item_id'] for op in item_ops])
+            self._journal_outcome(txn.txn_id, item_ops, outcome)
+            for op in item_ops:
+                if op['item_id'] in outcome.succeeded:
+                    self._playlist_changed(op['playlist_id'])
+                    results['videos_removed'] += 1
+        
+        playlist_ops = [op for op in ready if op['op'] == 'delete_playlist']
+        if playlist_ops:
+            outcome = self._delete_playlists([Playlist(op['playlist_id'], op.get('title', ''), 0)
+                                              for op in playlist_ops])
+            self._journal_outcome(txn.txn_id, playlist_ops, outcome)
+            results['deleted_playlists'] += len(outcome.succeeded)
+    
     def rename_playlist(self, playlist_id: str, new_title: str) -> bool:
         """Rename a playlist."""
         try:
-            self.youtube.playlists().update(
+            youtube, executor = self._writer()
+            executor.execute(youtube.playlists().update(
                 part='snippet',
                 body={
                     'id': playlist_id,
@@ -303,23 +858,27 @@ class YouTubePlaylistManager:
                         'title': new_title
                     }
                 }
-            ).execute()
+            ))
+            self.cache.invalidate('playlists', 'mine')
+            self.store.rename_playlist(playlist_id, new_title)
             print(f"Successfully renamed playlist to '{new_title}'")
             return True
         except HttpError as e:
             print(f"Error renaming playlist: {e}")
             return False
     
-    def display_playlists(self, playlists: List[Dict]):
-        """Display all playlists in a formatted way."""
+    @staticmethod
+    def display_playlists(playlists: List[Playlist]):
+        """Display all playlists in a formatted way (needs no API access, e.g. from the store)."""
         print("\n=== YOUR YOUTUBE PLAYLISTS ===")
         for i, playlist in enumerate(playlists, 1):
-            title = playlist['snippet']['title']
-            video_count = playlist['contentDetails']['itemCount']
-            status = "⚠️  FULL" if video_count >= self.MAX_VIDEOS_PER_PLAYLIST else "✅ OK"
+            title = playlist.title
+            video_count = playlist.item_count
+            status = "⚠️  FULL" if video_count >= MAX_VIDEOS_PER_PLAYLIST else "✅ OK"
             print(f"{i:2d}. {title} ({video_count} videos) {status}")
     
-    def display_duplicates(self, duplicates: List[List[Dict]]):
+    @staticmethod
+    def display_duplicates(duplicates: List[List[Playlist]]):
         """Display found duplicate playlists."""
         if not duplicates:
             print("\n✅ No duplicate playlists found!")
@@ -329,32 +888,244 @@ class YouTubePlaylistManager:
         for i, group in enumerate(duplicates, 1):
             print(f"\nGroup {i}:")
             for playlist in group:
-                title = playlist['snippet']['title']
-                video_count = playlist['contentDetails']['itemCount']
+                title = playlist.title
+                video_count = playlist.item_count
                 print(f"  - {title} ({video_count} videos)")
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command-line switches for instrumentation and profiling."""
+    parser = argparse.ArgumentParser(description="Find, merge and organize duplicate YouTube playlists.")
+    parser.add_argument('--metrics-json', metavar='PATH', help="write per-call metrics to a JSON file at exit")
+    parser.add_argument('--prometheus-port', type=int, metavar='PORT',
+                        help="serve metrics in Prometheus text format at http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--profile', nargs='?', const='', metavar='PATH',
+                        help="run under cProfile and print the hottest functions (and save the stats to PATH)")
+    parser.add_argument('--offline', action='store_true',
+                        help="analyze the local account store without signing in or calling the API")
+    parser.add_argument('--credentials', action='append', default=[], metavar='CLIENT_SECRETS',
+                        help="client secrets of another Cloud project whose daily quota is pooled for writes "
+                             "(repeatable)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run unattended: sync every --interval seconds and carry out the maintenance found")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, metavar='SECONDS',
+                        help=f"seconds between daemon cycles (default {DEFAULT_INTERVAL})")
+    parser.add_argument('--once', action='store_true', help="with --daemon, run a single cycle and exit")
+    parser.add_argument('--max-units', type=int, metavar='UNITS',
+                        help="with --daemon, the most quota units one cycle may spend on writes")
+    parser.add_argument('--by-content', action='store_true',
+                        help="with --daemon, match duplicates by shared videos instead of names")
+    parser.add_argument('--purge', choices=PURGE_SCOPES, metavar='SCOPE',
+                        help="remove repeated videos, keeping each once per 'playlist' or in the whole 'account' "
+                             "(with --daemon, on every cycle)")
+    parser.add_argument('--keep', choices=KEEP_RULES, default='first',
+                        help="with --purge account, the playlist whose copy is kept (default first)")
+    parser.add_argument('--remove-unavailable', action='store_true',
+                        help="remove every item of a deleted or private video (checked with videos.list)")
+    parser.add_argument('--processes', type=int, metavar='N',
+                        help=f"processes comparing titles on accounts of {PARALLEL_MIN_PLAYLISTS}+ playlists "
+                             "(default one per CPU)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="with --purge or --remove-unavailable, only show what would be removed and what it "
+                             "would cost")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the playlist management tool."""
+    args = parse_args(argv)
+    metrics = Metrics()
+    if args.prometheus_port is not None:
+        port = metrics.serve_prometheus(args.prometheus_port)
+        print(f"📈 Metrics at http://127.0.0.1:{port}/metrics")
+    
+    profiler = cProfile.Profile() if args.profile is not None else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        if args.offline:
+            run_offline(AccountStore(), DuplicateDetector(processes=args.processes))
+        elif args.daemon:
+            run_daemon(args, metrics)
+        elif args.purge or args.remove_unavailable:
+            run_purge_command(args, metrics)
+        else:
+            run_interactive(metrics, args.credentials, DuplicateDetector(processes=args.processes))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            report_profile(profiler, args.profile)
+        report_metrics(metrics, args.metrics_json)
+        metrics.stop_prometheus()
+
+def report_metrics(metrics: Metrics, json_path: Optional[str] = None):
+    """Print the end-of-run table of API calls and phases, and save it as JSON if asked."""
+    if metrics.methods or metrics.phases:
+        print("\n📊 API usage this run")
+        print(metrics.summary())
+    if json_path:
+        metrics.dump_json(json_path)
+        print(f"💾 Metrics written to {json_path}")
+
+def report_profile(profiler: cProfile.Profile, path: str = ''):
+    """Print the functions with the most cumulative time; save the raw stats to path if given."""
+    print("\n🔥 Hottest functions (cumulative time)")
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('cumulative').print_stats(25)
+    if path:
+        stats.dump_stats(path)
+        print(f"💾 Profile written to {path} (open with python -m pstats)")
+
+def print_store_analysis(store: AccountStore, playlists: List[Playlist], duplicates: List[List[Playlist]]):
+    """Duplicate and overlap statistics computed in SQL over the stored items."""
+    titles = {p.id: p.title for p in playlists}
+    if duplicates:
+        total_videos_in_duplicates = sum(sum(p.item_count for p in group) for group in duplicates)
+        print(f"📈 Total videos in duplicate playlists: {total_videos_in_duplicates}")
+        redundant_videos = sum(store.redundant_items([p.id for p in group]) for group in duplicates)
+        print(f"♻️  Videos present in more than one playlist of a group: {redundant_videos}")
+        print(f"🎯 Potential space saved: {len(duplicates)} duplicate groups")
+    else:
+        print("✅ No duplicates found - your playlists are well organized!")
+    
+    overlaps = store.top_overlaps(5)
+    if overlaps:
+        print("🔗 Most overlapping playlists:")
+        for first, second, shared in overlaps:
+            print(f"   {titles.get(first, first)} ↔ {titles.get(second, second)}: {shared} shared videos")
+    
+    spread = store.videos_in_many_playlists(4, limit=10)
+    if spread:
+        print("📚 Videos saved in 4 or more playlists:")
+        for video_id, title, count in spread:
+            print(f"   {title} ({video_id}): {count} playlists")
+    
+    incomplete = store.incomplete_playlists([p.id for p in playlists])
+    if incomplete:
+        print(f"⚠️  {len(incomplete)} playlists have no current snapshot; their counts may be out of date")
+
+def print_channel_playlists(store: AccountStore, channel: str):
+    """Which stored playlists hold videos of a channel."""
+    matches = store.playlists_with_channel(channel)
+    if not matches:
+        print(f"No stored playlist has videos from '{channel}'.")
+        return
+    print(f"\n📺 Playlists with videos from '{channel}':")
+    for playlist, count in matches:
+        print(f"   {playlist.title}: {count} videos")
+
+def run_offline(store: AccountStore, detector: Optional[DuplicateDetector] = None):
+    """Listings and analysis from the local account store alone: no sign-in, no API calls."""
+    print("🎵 YouTube Playlist Manager (offline)")
+    print("=" * 40)
+    playlists = store.playlists()
+    if not playlists:
+        print("The account store is empty; run once online to fill it.")
+        return
+    counts = store.counts()
+    print(f"🗄️  {counts['playlists']} playlists, {counts['items']} items, {counts['videos']} distinct videos "
+          f"in {store.path}")
+    
+    YouTubePlaylistManager.display_playlists(playlists)
+    duplicates = (detector if detector is not None else DuplicateDetector()).find_groups(playlists)
+    YouTubePlaylistManager.display_duplicates(duplicates)
+    print("\n📊 ANALYSIS")
+    print_store_analysis(store, playlists, duplicates)
+    
+    channel = input("\nFind playlists by channel (ID or name, Enter to skip): ").strip()
+    if channel:
+        print_channel_playlists(store, channel)
+
+def run_daemon(args: argparse.Namespace, metrics: Optional[Metrics] = None):
+    """Headless maintenance with one warm manager and account model (see maintenance_daemon)."""
+    try:
+        manager = YouTubePlaylistManager(duplicates=DuplicateDetector(processes=args.processes), metrics=metrics,
+                                         projects=args.credentials, interactive=False)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    daemon = MaintenanceDaemon(manager, interval=args.interval, by_content=args.by_content,
+                               max_units=args.max_units, purge_scope=args.purge, keep=args.keep)
+    daemon.run(once=args.once)
+
+def run_purge_command(args: argparse.Namespace, metrics: Optional[Metrics] = None):
+    """Sync, preview the purge (or the removal of unavailable videos) and, unless --dry-run, carry it out."""
+    manager = YouTubePlaylistManager(duplicates=DuplicateDetector(processes=args.processes), metrics=metrics,
+                                     projects=args.credentials)
+    account = AccountSync(manager)
+    manager.account = account
+    account.sync()
+    playlists = account.playlist_list()
+    if args.remove_unavailable:
+        plan = manager.plan_unavailable_cleanup(playlists)
+        print_purge_preview(plan, playlists, kind='unavailable')
+    else:
+        plan = manager.plan_duplicate_purge(playlists, args.purge, args.keep)
+        print_purge_preview(plan, playlists)
+    if args.dry_run:
+        print("Dry run: nothing was removed.")
+    elif plan.removals:
+        run_purge(manager, plan)
+    account.save()
+
+def run_interactive(metrics: Optional[Metrics] = None, projects: Optional[List[str]] = None,
+                    duplicates: Optional[DuplicateDetector] = None):
+    """The interactive session: sync, detect duplicates, then automatic, manual or analysis mode."""
     print("🎵 YouTube Playlist Manager")
     print("=" * 40)
     
     # Initialize the manager
-    manager = YouTubePlaylistManager()
+    manager = YouTubePlaylistManager(duplicates=duplicates, metrics=metrics, projects=projects)
+    if manager.pool is not None:
+        print(f"🪙 Pooling the quota of {len(manager.pool.projects)} projects for writes:")
+        for name, used, left in manager.pool.budgets():
+            print(f"   {name}: {used} used, {left} left today")
     
-    # Get all playlists
-    print("Fetching your playlists...")
-    playlists = manager.get_all_playlists()
+    # Sync the local account model (only changed playlists are re-paged)
+    print("Syncing your playlists...")
+    account = AccountSync(manager)
+    manager.account = account
+    report = account.sync()
+    print(f"🔄 {report.changed} changed, {report.unchanged} unchanged, {report.removed} removed")
+    if report.failed:
+        print(f"⚠️  {report.failed} playlists could not be synced and will be retried next run")
+    playlists = account.playlist_list()
     
     if not playlists:
         print("No playlists found or error occurred.")
         return
+    manager.save_snapshot(playlists)
+    
+    # Finish merges, moves and deletes an interrupted run left half done
+    unfinished = manager.journal.unfinished()
+    if unfinished:
+        open_count = sum(len(txn.pending()) for txn in unfinished)
+        print(f"\n🧾 {open_count} operations from an interrupted run are unfinished")
+        if input("Finish them now? (Y/n): ").lower() != 'n':
+            resumed = manager.resume_journal()
+            print(f"✅ Added {resumed['videos_added']} videos, removed {resumed['videos_removed']}, "
+                  f"deleted {resumed['deleted_playlists']} playlists")
+            if resumed['remaining']:
+                print(f"⏳ {resumed['remaining']} operations are still open and will be offered next run")
+            playlists = account.playlist_list()
+    
+    # Resume write operations left over from a run that ran out of quota
+    scheduler = OperationScheduler(manager, manager.quota)
+    if scheduler.pending:
+        print(f"\n⏯️  {len(scheduler.pending)} scheduled operations are waiting from a previous run "
+              f"({scheduler.cost(scheduler.pending)} units; {manager.quota.remaining()} left today)")
+        if input("Resume them now? (Y/n): ").lower() != 'n':
+            report_scheduled(scheduler.run())
+            playlists = account.playlist_list()
     
     # Display all playlists
     manager.display_playlists(playlists)
     
     # Find duplicates
+    print("\nMatch duplicates by:")
+    print("1. Playlist names")
+    print("2. Shared videos (same videos under different names)")
+    by_content = input("Enter choice (1-2, default 1): ").strip() == '2'
     print("\nAnalyzing for duplicates...")
-    duplicates = manager.find_duplicate_playlists(playlists)
+    duplicates = manager.find_duplicate_playlists(playlists, by_content)
     manager.display_duplicates(duplicates)
     
     # Mode selection
@@ -370,15 +1141,28 @@ def main():
         # Automatic mode
         print("\n🤖 AUTOMATIC MODE")
         print("This will intelligently merge all duplicate playlists.")
-        print("The playlist with the most videos in each group will be kept.")
+        print("In each group, the playlist needing the fewest new videos will be kept.")
         print("Source playlists will be deleted after successful merge.")
         
+        # Project the quota cost before anything runs
+        operations = scheduler.plan_auto_merge(playlists, by_content)
+        projected = scheduler.cost(operations)
+        print(f"\n🪙 Projected cost: {projected} units ({manager.quota.remaining()} left today)")
+        
         confirm = input("\nProceed with automatic merge? (y/N): ").lower()
-        if confirm == 'y':
-            results = manager.auto_merge_all_duplicates(playlists)
+        if confirm == 'y' and not manager.quota.can_afford(projected):
+            # Too big for today: run what fits and keep the rest for after the reset
+            print("This exceeds today's remaining quota; operations will be scheduled.")
+            scheduler.enqueue(operations)
+            report_scheduled(scheduler.run())
+            if scheduler.pending and input("Wait for the quota reset and continue automatically? (y/N): ").lower() == 'y':
+                report_scheduled(scheduler.run_until_done())
+        elif confirm == 'y':
+            results = manager.auto_merge_all_duplicates(playlists, by_content)
             
             print(f"\n🎉 Automatic merge completed!")
             print(f"✅ Merged {results['merged_groups']} groups")
+            print(f"➕ Added {results['videos_added']} videos")
             print(f"🗑️  Deleted {results['deleted_playlists']} playlists")
             if results['errors']:
                 print(f"❌ {len(results['errors'])} errors occurred:")
@@ -394,20 +1178,58 @@ def main():
         print("\n📊 ANALYSIS MODE")
         print("Here's what could be done:")
         
-        if duplicates:
-            total_videos_in_duplicates = sum(
-                sum(p['contentDetails']['itemCount'] for p in group) 
-                for group in duplicates
-            )
-            print(f"📈 Total videos in duplicate playlists: {total_videos_in_duplicates}")
-            print(f"🎯 Potential space saved: {len(duplicates)} duplicate groups")
-        else:
-            print("✅ No duplicates found - your playlists are well organized!")
+        # Page whatever the store lacks (written through as it arrives), then query it
+        manager.index_playlists(manager.store.incomplete_playlists([p.id for p in playlists]))
+        print_store_analysis(manager.store, playlists, duplicates)
     
     else:
         print("Invalid choice!")
+    
+    # Persist the synced model; playlists changed during this run are re-paged next time
+    account.save()
+
+def run_purge(manager: YouTubePlaylistManager, plan: PurgePlan):
+    """Carry out a purge plan now, or as much as today's quota allows with the rest scheduled."""
+    if not manager.quota.can_afford(plan.cost):
+        print("This exceeds today's remaining quota; the removals will be scheduled.")
+        scheduler = OperationScheduler(manager, manager.quota)
+        scheduler.enqueue(purge_operations(plan))
+        report_scheduled(scheduler.run())
+        return
+    results = manager.purge_duplicate_videos(plan)
+    print(f"🧹 Removed {results['removed']} redundant videos")
+    if results['errors']:
+        print(f"❌ {len(results['errors'])} errors occurred:")
+        for error in results['errors']:
+            print(f"   - {error}")
+
+def report_scheduled(results: Dict):
+    """Print the outcome of a scheduler run."""
+    print(f"\n✅ Added {results['videos_added']} videos")
+    if results['videos_removed']:
+        print(f"🧹 Removed {results['videos_removed']} videos")
+    print(f"🗑️  Deleted {results['deleted_playlists']} playlists")
+    if results['failed']:
+        print(f"❌ {results['failed']} operations failed")
+    if results['remaining']:
+        print(f"⏳ {results['remaining']} operations scheduled for after the quota reset")
+
+def parse_selection(text: str, count: int) -> List[int]:
+    """Zero-based indexes from input like '3', '1,4,7' or '2-10'; empty if any part is invalid."""
+    indexes = []
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        if not first.isdigit() or (last and not last.isdigit()):
+            return []
+        start, end = int(first), int(last or first)
+        if not 1 <= start <= end <= count:
+            return []
+        indexes.extend(range(start - 1, end))
+    return list(dict.fromkeys(indexes))
 
-def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicates: List[List[Dict]]):
+def manual_menu(manager: YouTubePlaylistManager, playlists: List[Playlist], duplicates: List[List[Playlist]]):
     """Manual mode menu with advanced controls."""
     while True:
         print("\n" + "=" * 40)
@@ -419,15 +1241,18 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
         print("5. Reorder videos in a playlist")
         print("6. Show all playlists")
         print("7. Show duplicates analysis")
-        print("8. Exit")
+        print("8. Find which playlists contain a video")
+        print("9. Find playlists with videos from a channel")
+        print("10. Remove repeated or unavailable videos")
+        print("11. Exit")
         
-        choice = input("\nEnter your choice (1-8): ").strip()
+        choice = input("\nEnter your choice (1-11): ").strip()
         
         if choice == '1':
             if duplicates:
                 print("\nSelect a group to merge:")
                 for i, group in enumerate(duplicates, 1):
-                    print(f"{i}. {group[0]['snippet']['title']} (and {len(group)-1} others)")
+                    print(f"{i}. {group[0].title} (and {len(group)-1} others)")
                 
                 try:
                     group_choice = int(input("Enter group number: ")) - 1
@@ -435,23 +1260,31 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
                         group = duplicates[group_choice]
                         
                         # Let user choose target playlist
+                        videos_by_playlist = manager.get_many_playlist_videos([p.id for p in group])
+                        recommended = manager._plan_group(group, videos_by_playlist)
                         print("\nSelect target playlist (videos will be merged into this one):")
                         for i, playlist in enumerate(group, 1):
-                            print(f"{i}. {playlist['snippet']['title']} ({playlist['contentDetails']['itemCount']} videos)")
+                            marker = " ⭐ fewest inserts" if playlist.id == recommended.target.id else ""
+                            print(f"{i}. {playlist.title} ({playlist.item_count} videos){marker}")
                         
                         target_choice = int(input("Enter target playlist number: ")) - 1
                         if 0 <= target_choice < len(group):
                             target = group[target_choice]
                             sources = [p for j, p in enumerate(group) if j != target_choice]
                             
-                            print(f"\nMerging into: {target['snippet']['title']}")
+                            print(f"\nMerging into: {target.title}")
                             print("From:")
                             for source in sources:
-                                print(f"  - {source['snippet']['title']}")
+                                print(f"  - {source.title}")
+                            
+                            plan = plan_merge(target, sources, manager._indexed(videos_by_playlist),
+                                              manager.MAX_VIDEOS_PER_PLAYLIST,
+                                              manager.unavailable_videos(videos_by_playlist))
+                            print(f"🪙 {len(plan.inserts)} inserts, {len(plan.inserts) * 50} units")
                             
                             confirm = input("\nProceed with merge? (y/N): ").lower()
                             if confirm == 'y':
-                                if manager.merge_playlists(sources, target):
+                                if manager._merge_playlists(plan).success:
                                     # Remove merged playlists from duplicates list
                                     duplicates.pop(group_choice)
                                     print("Merge completed!")
@@ -469,17 +1302,17 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
         elif choice == '2':
             print("\nSelect playlist to rename:")
             for i, playlist in enumerate(playlists, 1):
-                print(f"{i}. {playlist['snippet']['title']}")
+                print(f"{i}. {playlist.title}")
             
             try:
                 playlist_choice = int(input("Enter playlist number: ")) - 1
                 if 0 <= playlist_choice < len(playlists):
                     playlist = playlists[playlist_choice]
-                    new_title = input(f"Enter new title for '{playlist['snippet']['title']}': ").strip()
+                    new_title = input(f"Enter new title for '{playlist.title}': ").strip()
                     if new_title:
-                        manager.rename_playlist(playlist['id'], new_title)
+                        manager.rename_playlist(playlist.id, new_title)
                         # Update the playlist title in our list
-                        playlist['snippet']['title'] = new_title
+                        playlists[playlist_choice] = playlist._replace(title=new_title)
                 else:
                     print("Invalid playlist number!")
             except ValueError:
@@ -489,18 +1322,18 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
             print("\n⚠️  WARNING: This will permanently delete the playlist!")
             print("Select playlist to delete:")
             for i, playlist in enumerate(playlists, 1):
-                print(f"{i}. {playlist['snippet']['title']}")
+                print(f"{i}. {playlist.title}")
             
             try:
                 playlist_choice = int(input("Enter playlist number: ")) - 1
                 if 0 <= playlist_choice < len(playlists):
                     playlist = playlists[playlist_choice]
-                    if playlist['snippet']['title'].lower() == 'watch later':
+                    if playlist.title.lower() == 'watch later':
                         print("❌ Cannot delete Watch Later playlist!")
                     else:
-                        confirm = input(f"Are you sure you want to delete '{playlist['snippet']['title']}'? (y/N): ").lower()
+                        confirm = input(f"Are you sure you want to delete '{playlist.title}'? (y/N): ").lower()
                         if confirm == 'y':
-                            if manager.delete_playlist(playlist['id']):
+                            if manager.delete_playlist(playlist.id):
                                 playlists.pop(playlist_choice)
                                 print("Playlist deleted!")
                 else:
@@ -512,39 +1345,42 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
             print("\nMove video between playlists:")
             print("Select source playlist:")
             for i, playlist in enumerate(playlists, 1):
-                print(f"{i}. {playlist['snippet']['title']}")
+                print(f"{i}. {playlist.title}")
             
             try:
                 source_choice = int(input("Enter source playlist number: ")) - 1
                 if 0 <= source_choice < len(playlists):
                     source_playlist = playlists[source_choice]
-                    videos = manager.get_playlist_videos(source_playlist['id'])
+                    videos = manager.get_playlist_videos(source_playlist.id)
                     
-                    print(f"\nVideos in '{source_playlist['snippet']['title']}':")
-                    for i, video in enumerate(videos[:10], 1):  # Show first 10 videos
-                        title = video['snippet']['title']
+                    print(f"\nVideos in '{source_playlist.title}':")
+                    for i, video in enumerate(videos[:50], 1):  # Show first 50 videos
+                        title = video.title
                         print(f"{i}. {title}")
                     
-                    if len(videos) > 10:
-                        print(f"... and {len(videos) - 10} more videos")
+                    if len(videos) > 50:
+                        print(f"... and {len(videos) - 50} more videos")
                     
-                    video_choice = int(input("Enter video number to move: ")) - 1
-                    if 0 <= video_choice < len(videos):
-                        video_id = videos[video_choice]['contentDetails']['videoId']
+                    selection = parse_selection(
+                        input("Enter video numbers to move (e.g. '3', '1,4,7' or '2-10'): "), len(videos)
+                    )
+                    if selection:
+                        video_ids = [videos[n].video_id for n in selection]
                         
                         print("\nSelect target playlist:")
                         for i, playlist in enumerate(playlists, 1):
                             if i-1 != source_choice:  # Don't show source playlist
-                                print(f"{i}. {playlist['snippet']['title']}")
+                                print(f"{i}. {playlist.title}")
                         
                         target_choice = int(input("Enter target playlist number: ")) - 1
                         if 0 <= target_choice < len(playlists) and target_choice != source_choice:
                             target_playlist = playlists[target_choice]
                             
-                            if manager.move_video_between_playlists(video_id, source_playlist['id'], target_playlist['id']):
-                                print("Video moved successfully!")
+                            results = manager.move_videos_between_playlists(video_ids, source_playlist.id, target_playlist.id)
+                            if results['moved']:
+                                print(f"Moved {results['moved']} of {len(video_ids)} videos successfully!")
                             else:
-                                print("Failed to move video!")
+                                print("Failed to move videos!")
                         else:
                             print("Invalid target playlist!")
                     else:
@@ -558,20 +1394,21 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
             print("\nReorder videos in a playlist:")
             print("Select playlist:")
             for i, playlist in enumerate(playlists, 1):
-                print(f"{i}. {playlist['snippet']['title']}")
+                print(f"{i}. {playlist.title}")
             
             try:
                 playlist_choice = int(input("Enter playlist number: ")) - 1
                 if 0 <= playlist_choice < len(playlists):
                     playlist = playlists[playlist_choice]
-                    videos = manager.get_playlist_videos(playlist['id'])
+                    videos = manager.get_playlist_videos(playlist.id)
                     
-                    print(f"\nVideos in '{playlist['snippet']['title']}':")
+                    print(f"\nVideos in '{playlist.title}':")
                     for i, video in enumerate(videos, 1):
-                        title = video['snippet']['title']
+                        title = video.title
                         print(f"{i}. {title}")
                     
                     print("\nEnter new positions (e.g., '3 1' to move video 3 to position 1)")
+                    print("Or sort the whole playlist: 'sort date', 'sort title', 'sort duration' (add 'desc' to reverse)")
                     print("Enter 'done' when finished:")
                     
                     reorder_commands = []
@@ -580,13 +1417,27 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
                         if cmd.lower() == 'done':
                             break
                         
+                        if cmd.lower().startswith('sort'):
+                            parts = cmd.lower().split()
+                            key = {'date': 'published', 'published': 'published', 'title': 'title',
+                                   'duration': 'duration'}.get(parts[1] if len(parts) > 1 else '')
+                            if key is None:
+                                print("Sort by 'date', 'title' or 'duration'")
+                                continue
+                            if manager.sort_playlist(playlist.id, key, reverse='desc' in parts[2:]):
+                                print("Playlist sorted!")
+                            else:
+                                print("Failed to sort playlist!")
+                            reorder_commands = []
+                            break
+                        
                         try:
                             parts = cmd.split()
                             if len(parts) == 2:
                                 video_num = int(parts[0]) - 1
                                 new_pos = int(parts[1]) - 1
                                 if 0 <= video_num < len(videos) and new_pos >= 0:
-                                    video_id = videos[video_num]['contentDetails']['videoId']
+                                    video_id = videos[video_num].video_id
                                     reorder_commands.append((video_id, new_pos))
                                 else:
                                     print("Invalid video number or position!")
@@ -596,7 +1447,7 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
                             print("Please enter valid numbers!")
                     
                     if reorder_commands:
-                        if manager.reorder_playlist_videos(playlist['id'], reorder_commands):
+                        if manager.reorder_playlist_videos(playlist.id, reorder_commands):
                             print("Videos reordered successfully!")
                         else:
                             print("Failed to reorder videos!")
@@ -612,11 +1463,54 @@ def manual_menu(manager: YouTubePlaylistManager, playlists: List[Dict], duplicat
             manager.display_duplicates(duplicates)
             
         elif choice == '8':
+            video_id = input("Enter video ID: ").strip()
+            if video_id:
+                index = manager.index_playlists([p.id for p in playlists])
+                titles = {p.id: p.title for p in playlists}
+                entries = index.entries(video_id)
+                if entries:
+                    print(f"\n📍 {video_id} appears {len(entries)} times:")
+                    for playlist_id, _, position in entries:
+                        print(f"   {titles.get(playlist_id, playlist_id)} (position {position + 1})")
+                else:
+                    print("That video is not in any of your playlists.")
+            
+        elif choice == '9':
+            channel = input("Enter channel ID or name: ").strip()
+            if channel:
+                print_channel_playlists(manager.store, channel)
+            
+        elif choice == '10':
+            print("\nRemove:")
+            print("1. Repeats within a playlist (keep each video once per playlist)")
+            print("2. Repeats across the account (each video in one playlist only)")
+            print("3. Deleted and private videos")
+            scope = {'2': 'account', '3': 'unavailable'}.get(input("Enter choice (1-3, default 1): ").strip(), 'playlist')
+            if scope == 'unavailable':
+                plan = manager.plan_unavailable_cleanup(playlists)
+                print_purge_preview(plan, playlists, kind='unavailable')
+                if plan.removals and input("\nRemove them? (y/N): ").lower() == 'y':
+                    run_purge(manager, plan)
+                continue
+            keep = 'first'
+            if scope == 'account':
+                keep = input(f"Keep the copy in which playlist? ({'/'.join(KEEP_RULES)}, default first): ").strip() or 'first'
+                if keep not in KEEP_RULES:
+                    print("Invalid rule!")
+                    continue
+            
+            # The preview is a dry run: nothing is removed before confirming
+            plan = manager.plan_duplicate_purge(playlists, scope, keep)
+            print_purge_preview(plan, playlists)
+            if plan.removals and input("\nRemove them? (y/N): ").lower() == 'y':
+                run_purge(manager, plan)
+            
+        elif choice == '11':
             print("Goodbye! 👋")
             break
             
         else:
-            print("Invalid choice! Please enter 1-8.")
+            print("Invalid choice! Please enter 1-11.")
 
 if __name__ == "__main__":
     main()
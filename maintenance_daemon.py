@@ -0,0 +1,215 @@
+import signal
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from operation_journal import operation_key
+from operation_scheduler import OperationScheduler
+from purge_planner import plan_purge, plan_removal, purge_operations
+from quota_ledger import next_reset
+from records import MAX_VIDEOS_PER_PLAYLIST, Playlist
+from sync_engine import AccountSync, SyncReport
+
+# Seconds between maintenance cycles
+DEFAULT_INTERVAL = 15 * 60
+
+
+def log(message: str):
+    """A timestamped line, flushed at once so service logs stay in order."""
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}", flush=True)
+
+
+class MaintenanceDaemon:
+    """Unattended maintenance of the account, one cycle every interval seconds.
+
+    Each cycle runs the delta sync on one long-lived manager and account
+    model (a playlists().list pass, re-paging only playlists whose etag or
+    item count changed), queues the maintenance it finds on the persistent
+    OperationScheduler:
+
+    - merging duplicate groups that appeared or changed since the last cycle,
+    - removing items whose video was deleted or made private,
+    - removing repeated videos from playlists at the capacity limit, or from
+      every playlist (or the whole account) with purge_scope,
+
+    and drains the queue with the quota not needed for the syncs still due
+    before the daily reset. Nothing is planned twice: operations already
+    queued or given up on are left out of new plans.
+    """
+
+    def __init__(self, manager, scheduler: Optional[OperationScheduler] = None, interval: float = DEFAULT_INTERVAL,
+                 by_content: bool = False, capacity: int = MAX_VIDEOS_PER_PLAYLIST,
+                 max_units: Optional[int] = None, purge_scope: Optional[str] = None, keep: str = 'first'):
+        """Maintain the manager's account.
+
+        capacity is the item count from which a playlist counts as full;
+        max_units caps the units one cycle may spend on writes. purge_scope
+        and keep are passed to purge_planner.plan_purge for all playlists.
+        """
+        self.manager = manager
+        self.scheduler = scheduler if scheduler is not None else OperationScheduler(manager, manager.quota)
+        self.interval = interval
+        self.by_content = by_content
+        self.capacity = capacity
+        self.max_units = max_units
+        self.purge_scope = purge_scope
+        self.keep = keep
+        if manager.account is None:
+            manager.account = AccountSync(manager)
+        self.account: AccountSync = manager.account
+        # Units the last sync took
+        self.sync_cost = 0
+        self.cycles = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Finish the batch in flight, then leave run()."""
+        self._stop.set()
+
+    # --- Planning --------------------------------------------------------
+
+    def plan_merges(self, playlists: List[Playlist]) -> List[Dict]:
+        """Merge operations for the duplicate groups, as auto-merge would run them."""
+        return self.scheduler.plan_auto_merge(playlists, self.by_content)
+
+    def plan_unavailable(self, playlists: List[Playlist]) -> List[Dict]:
+        """Removal of every synced item whose video was deleted or made private.
+
+        Videos not checked within the store's video max age are checked with
+        videos.list first (1 unit per 50).
+        """
+        videos_by_playlist = self._synced_items(playlists)
+        self.manager.enrich_videos([item.video_id for items in videos_by_playlist.values() for item in items])
+        unavailable = self.manager.unavailable_videos(videos_by_playlist)
+        return purge_operations(plan_removal(playlists, videos_by_playlist, unavailable))
+
+    def _synced_items(self, playlists: List[Playlist]) -> Dict:
+        """Current items of the playlists the account model holds them for."""
+        videos_by_playlist = {}
+        for playlist in playlists:
+            items = self.account.current_items(playlist.id)
+            if items is not None:
+                videos_by_playlist[playlist.id] = items
+        return videos_by_playlist
+
+    def plan_capacity(self, playlists: List[Playlist]) -> List[Dict]:
+        """Removal of repeated videos (all but the first copy) from playlists at the capacity limit."""
+        full = [playlist for playlist in playlists if playlist.item_count >= self.capacity]
+        return purge_operations(plan_purge(full, self._synced_items(full)))
+
+    def plan_repeats(self, playlists: List[Playlist]) -> List[Dict]:
+        """Removal of every redundant copy of a video under the configured scope and keep rule."""
+        if self.purge_scope is None:
+            return []
+        return purge_operations(plan_purge(playlists, self._synced_items(playlists), self.purge_scope, self.keep))
+
+    def plan(self, playlists: List[Playlist], report: SyncReport) -> List[Dict]:
+        """New maintenance operations; merges are only re-planned when the account changed."""
+        operations = []
+        if self.cycles == 0 or report.changed or report.removed:
+            operations.extend(self.plan_merges(playlists))
+        operations.extend(self.plan_unavailable(playlists))
+        operations.extend(self.plan_capacity(playlists))
+        operations.extend(self.plan_repeats(playlists))
+
+        known = self.scheduler.pending + self.scheduler.failed
+        queued_keys = {operation_key(op) for op in known}
+        queued_groups = {op['group'] for op in known}
+        # Items of playlists about to be merged away go with their playlist
+        doomed = {op['playlist_id'] for op in known + operations if op['op'] == 'delete_playlist'}
+        fresh = []
+        for op in operations:
+            key = operation_key(op)
+            if op['op'] == 'delete_item' and op['playlist_id'] in doomed:
+                continue
+            # A group already under way is finished from the queue, not planned again
+            if key not in queued_keys and op['group'] not in queued_groups:
+                queued_keys.add(key)
+                fresh.append(op)
+        return fresh
+
+    # --- Quota -----------------------------------------------------------
+
+    def sync_reserve(self) -> int:
+        """Units kept back for the listing pass of every cycle still due before the quota reset."""
+        seconds_left = (next_reset() - datetime.now(timezone.utc)).total_seconds()
+        cycles_left = int(seconds_left // self.interval) + 1
+        listing_pages = -(-len(self.account.playlists) // 50)
+        return listing_pages * cycles_left
+
+    def cycle_budget(self) -> int:
+        """Units this cycle may spend on writes: today's remainder less the sync reserve."""
+        budget = self.manager.quota.remaining() - self.sync_reserve()
+        if self.max_units is not None:
+            budget = min(budget, self.max_units)
+        return max(budget, 0)
+
+    # --- Running ---------------------------------------------------------
+
+    def run_cycle(self) -> Dict:
+        """Sync, queue what needs doing and drain as much of the queue as the budget allows."""
+        ledger = self.manager.ledger
+        used = ledger.used()
+        # Revalidate the listing every cycle, however recently the page cache saw it
+        self.manager.cache.invalidate('playlists', 'mine')
+        report = self.account.sync()
+        self.sync_cost = max(ledger.used() - used, 0)
+        log(f"🔄 Synced {report.playlists} playlists: {report.changed} changed, {report.removed} removed, "
+            f"{report.failed} failed ({self.sync_cost} units)")
+
+        playlists = self.account.playlist_list()
+        operations = self.plan(playlists, report)
+        if operations:
+            self.scheduler.enqueue(operations)
+            log(f"🗂️  Queued {len(operations)} operations ({self.scheduler.cost(operations)} units)")
+
+        results = {'videos_added': 0, 'videos_removed': 0, 'deleted_playlists': 0, 'failed': 0,
+                   'remaining': len(self.scheduler.pending)}
+        budget = self.cycle_budget()
+        if self.scheduler.pending and budget:
+            results = self.scheduler.run(max_units=budget, stop_event=self._stop)
+            log(f"✅ Added {results['videos_added']} videos, removed {results['videos_removed']}, "
+                f"deleted {results['deleted_playlists']} playlists, {results['failed']} failed; "
+                f"{results['remaining']} operations queued")
+        elif self.scheduler.pending:
+            log(f"⏸️  {len(self.scheduler.pending)} operations wait for quota "
+                f"({self.manager.quota.remaining()} units left today, {self.sync_reserve()} kept for syncs)")
+
+        self.account.save()
+        ledger.flush()
+        self.cycles += 1
+        return results
+
+    def run(self, once: bool = False):
+        """Run cycles until stopped (SIGINT/SIGTERM) or, with once, a single cycle."""
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: self._request_stop())
+
+        log(f"🛠️  Maintenance daemon started (every {self.interval:.0f}s)")
+        if self.manager.journal.unfinished():
+            resumed = self.manager.resume_journal()
+            log(f"🧾 Finished interrupted operations: added {resumed['videos_added']} videos, "
+                f"removed {resumed['videos_removed']}, deleted {resumed['deleted_playlists']} playlists")
+
+        while not self._stop.is_set():
+            try:
+                self.run_cycle()
+            except (HttpError, OSError) as e:
+                # The network or the API is having trouble; the next cycle retries
+                log(f"⚠️  Cycle failed: {e}")
+            if once:
+                break
+            self._stop.wait(self.interval)
+
+        self.account.save()
+        self.manager.ledger.flush()
+        log("👋 Maintenance daemon stopped")
+
+    def _request_stop(self):
+        """Signal handler: stop after the batch in flight."""
+        if not self._stop.is_set():
+            log("Stopping after the current batch...")
+        self.stop()
@@ -0,0 +1,82 @@
+from typing import AbstractSet, List, NamedTuple
+
+from quota_ledger import quota_cost
+from records import Playlist
+from video_index import AccountVideoIndex
+
+INSERT_COST = quota_cost('playlistItems.insert')
+DELETE_COST = quota_cost('playlists.delete')
+
+
+class MergePlan(NamedTuple):
+    target: Playlist
+    sources: List[Playlist]
+    inserts: List[str]  # video IDs to add to the target
+    skipped: int        # new videos that do not fit under the size limit
+    cost: int           # quota units for the inserts plus deleting the sources
+    unavailable: int = 0  # new videos left out because they were deleted or made private
+
+
+def plan_merge(target: Playlist, sources: List[Playlist], index: AccountVideoIndex, max_videos: int,
+               unavailable: AbstractSet[str] = frozenset()) -> MergePlan:
+    """The inserts of merging the sources into a given target.
+
+    Videos of the sources the target lacks are inserted in video ID order,
+    except unavailable ones, and only as many as fit under max_videos. Every
+    playlist must be in the index.
+    """
+    new_videos = index.new_videos([source.id for source in sources], target.id)
+    inserts = [video_id for video_id in new_videos if video_id not in unavailable]
+    room = max(max_videos - index.item_count(target.id), 0)
+    skipped = max(len(inserts) - room, 0)
+    inserts = inserts[:room]
+    return MergePlan(target, sources, inserts, skipped, len(inserts) * INSERT_COST + len(sources) * DELETE_COST,
+                     len(new_videos) - len(inserts) - skipped)
+
+
+def plan_group(group: List[Playlist], index: AccountVideoIndex, max_videos: int,
+               unavailable: AbstractSet[str] = frozenset()) -> MergePlan:
+    """Choose the merge target that needs the fewest inserts.
+
+    Merging into T inserts |U - S_T| videos, where U is the union of the
+    group's video sets, so the best target is the playlist with the most
+    distinct videos (not the largest itemCount, which counts repeats and
+    dead entries). Targets whose merge would exceed max_videos are only used
+    when no target fits. Every playlist of the group must be in the index.
+    Unavailable videos are never inserted.
+    """
+    sets = {playlist.id: index.video_set(playlist.id) for playlist in group}
+    union = {number for number in set().union(*sets.values()) if index.video_id(number) not in unavailable}
+
+    def score(playlist):
+        inserts = len(union - sets[playlist.id])
+        overflow = max(index.item_count(playlist.id) + inserts - max_videos, 0)
+        # Prefer targets that fit, then fewest inserts, then the largest playlist
+        return (overflow > 0, inserts, -playlist.item_count)
+
+    target = min(group, key=score)
+    sources = [playlist for playlist in group if playlist.id != target.id]
+    return plan_merge(target, sources, index, max_videos, unavailable)
+
+
+def largest_playlist_cost(group: List[Playlist], index: AccountVideoIndex,
+                          unavailable: AbstractSet[str] = frozenset()) -> int:
+    """Quota cost of merging into the playlist with the largest itemCount (the old heuristic).
+
+    Unavailable videos are left out, as plan_group leaves them out.
+    """
+    target = max(group, key=lambda p: p.item_count)
+    sources = [p.id for p in group if p.id != target.id]
+    inserts = [video_id for video_id in index.new_videos(sources, target.id) if video_id not in unavailable]
+    return len(inserts) * INSERT_COST + (len(group) - 1) * DELETE_COST
+
+
+def print_projection(plans: List[MergePlan], baseline_cost: int):
+    """Report the projected quota cost of a set of merge plans."""
+    total = sum(plan.cost for plan in plans)
+    inserts = sum(len(plan.inserts) for plan in plans)
+    print(f"🪙 Projected cost: {total} units ({inserts} inserts, "
+          f"{sum(len(plan.sources) for plan in plans)} deletes)")
+    if baseline_cost > total:
+        print(f"   Largest-playlist targets would cost {baseline_cost} units "
+              f"({baseline_cost / max(total, 1):.1f}x)")
@@ -0,0 +1,274 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from quota_ledger import quota_cost
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Method name under which batch round trips are recorded (their parts count under their own methods)
+BATCH_METHOD = 'batch'
+
+
+def method_name(method_id: str) -> str:
+    """'youtube.playlistItems.insert' -> 'playlistItems.insert'."""
+    return method_id[len('youtube.'):] if method_id.startswith('youtube.') else method_id
+
+
+class MethodStats:
+    """Counters and a latency histogram for one API method."""
+
+    __slots__ = ('calls', 'errors', 'retries', 'units', 'seconds', 'timed', 'bytes_sent', 'bytes_received', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.units = 0
+        self.seconds = 0.0
+        self.timed = 0  # calls with a latency of their own (batch parts have none)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        """Add one latency to the histogram."""
+        self.seconds += seconds
+        self.timed += 1
+        for n, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[n] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bucket bound below which the given fraction of latencies fall (inf if beyond the last)."""
+        wanted = fraction * self.timed
+        seen = 0
+        for n, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return LATENCY_BUCKETS[n] if n < len(LATENCY_BUCKETS) else float('inf')
+        return 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'quota_units': self.units,
+            'seconds': round(self.seconds, 6),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], self.buckets)),
+        }
+
+
+class Metrics:
+    """Thread-safe record of API calls and run phases.
+
+    request_builder() returns an HttpRequest class for build(requestBuilder=...)
+    that times every executed call and counts its bytes; the batch writer and
+    the request executor report batch parts and retries. phase() times a
+    block of work. The result is available as a table (summary()), as JSON
+    (dump_json()) and in the Prometheus text format (prometheus_text(),
+    serve_prometheus()).
+    """
+
+    def __init__(self):
+        self.methods: Dict[str, MethodStats] = {}
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _stats(self, method: str) -> MethodStats:
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        return stats
+
+    def record_call(self, method_id: str, status: int, seconds: Optional[float] = None,
+                    bytes_sent: int = 0, bytes_received: int = 0, units: Optional[int] = None):
+        """Record one call; seconds is None for calls answered as part of a batch."""
+        method = method_name(method_id)
+        with self._lock:
+            stats = self._stats(method)
+            stats.calls += 1
+            stats.units += quota_cost(method) if units is None else units
+            if not 200 <= status < 400:
+                stats.errors += 1
+            if seconds is not None:
+                stats.observe(seconds)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+
+    def record_retry(self, method_id: str):
+        """Record that a call is about to be sent again."""
+        with self._lock:
+            self._stats(method_name(method_id)).retries += 1
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of work; repeated phases add up."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def request_builder(self, base=HttpRequest):
+        """An HttpRequest class (derived from base, e.g. a ledger's) that records every executed call."""
+        metrics = self
+
+        class MeteredHttpRequest(base):
+            def execute(self, *args, **kwargs):
+                received = []
+                postproc = self.postproc
+
+                def measured(resp, content):
+                    received.append(len(content or b''))
+                    return postproc(resp, content)
+
+                self.postproc = measured
+                sent = len(self.body or '')
+                started = time.perf_counter()
+                try:
+                    response = super().execute(*args, **kwargs)
+                except HttpError as e:
+                    metrics.record_call(self.methodId or '', e.resp.status, time.perf_counter() - started,
+                                        sent, len(e.content or b''))
+                    raise
+                except Exception:
+                    # Connection failures and the like never got a status
+                    metrics.record_call(self.methodId or '', 0, time.perf_counter() - started, sent)
+                    raise
+                finally:
+                    self.postproc = postproc
+                metrics.record_call(self.methodId or '', 200, time.perf_counter() - started, sent, sum(received))
+                return response
+
+        return MeteredHttpRequest
+
+    def totals(self) -> MethodStats:
+        """All methods added up (batch round trips are not counted as calls)."""
+        total = MethodStats()
+        with self._lock:
+            for method, stats in self.methods.items():
+                if method == BATCH_METHOD:
+                    continue
+                total.calls += stats.calls
+                total.errors += stats.errors
+                total.retries += stats.retries
+                total.units += stats.units
+                total.bytes_sent += stats.bytes_sent
+                total.bytes_received += stats.bytes_received
+        return total
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'methods': {method: stats.to_dict() for method, stats in sorted(self.methods.items())},
+                'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            }
+
+    def dump_json(self, path: str):
+        """Write the metrics to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+
+    def summary(self) -> str:
+        """A table of calls, units, errors, retries, latency and bytes per method, then phase timings."""
+        lines = [f"{'Method':<22} {'Calls':>7} {'Units':>8} {'Errors':>7} {'Retries':>8} "
+                 f"{'Avg ms':>8} {'p95 ≤ms':>8} {'KB in':>9}",
+                 "-" * 84]
+        with self._lock:
+            rows = sorted(self.methods.items(), key=lambda row: -row[1].units)
+        for method, stats in rows:
+            average = f"{stats.seconds / stats.timed * 1000:.1f}" if stats.timed else '-'
+            p95 = stats.percentile(0.95) if stats.timed else None
+            p95_text = '-' if p95 is None else ('>10000' if p95 == float('inf') else f"{p95 * 1000:.0f}")
+            lines.append(f"{method:<22} {stats.calls:>7} {stats.units:>8} {stats.errors:>7} {stats.retries:>8} "
+                         f"{average:>8} {p95_text:>8} {stats.bytes_received / 1024:>9.1f}")
+        total = self.totals()
+        lines.append("-" * 84)
+        lines.append(f"{'Total':<22} {total.calls:>7} {total.units:>8} {total.errors:>7} {total.retries:>8}")
+        if self.phases:
+            lines.append("")
+            lines.extend(f"⏱️  {name:<10} {seconds:>8.2f}s" for name, seconds in self.phases.items())
+        return '\n'.join(lines)
+
+    def prometheus_text(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            methods = sorted(self.methods.items())
+            phases = dict(self.phases)
+        for name, attribute, help_text in (
+            ('youtube_api_calls_total', 'calls', 'API calls made, batch parts included.'),
+            ('youtube_api_errors_total', 'errors', 'API calls that failed.'),
+            ('youtube_api_retries_total', 'retries', 'API calls sent again after a transient failure.'),
+            ('youtube_api_quota_units_total', 'units', 'Quota units charged.'),
+            ('youtube_api_request_bytes_total', 'bytes_sent', 'Request body bytes sent.'),
+            ('youtube_api_response_bytes_total', 'bytes_received', 'Response body bytes received.'),
+        ):
+            family(name, 'counter', help_text)
+            out.extend(f'{name}{{method="{method}"}} {getattr(stats, attribute)}' for method, stats in methods)
+
+        family('youtube_api_latency_seconds', 'histogram', 'Latency of API round trips.')
+        for method, stats in methods:
+            if not stats.timed:
+                continue
+            cumulative = 0
+            for bound, count in zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], stats.buckets):
+                cumulative += count
+                out.append(f'youtube_api_latency_seconds_bucket{{method="{method}",le="{bound}"}} {cumulative}')
+            out.append(f'youtube_api_latency_seconds_sum{{method="{method}"}} {stats.seconds}')
+            out.append(f'youtube_api_latency_seconds_count{{method="{method}"}} {stats.timed}')
+
+        family('playlist_manager_phase_seconds', 'gauge', 'Time spent in each phase of the run.')
+        out.extend(f'playlist_manager_phase_seconds{{phase="{name}"}} {seconds}' for name, seconds in phases.items())
+        return '\n'.join(out) + '\n'
+
+    def serve_prometheus(self, port: int, host: str = '127.0.0.1') -> int:
+        """Serve prometheus_text() at /metrics in a background thread; returns the port."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                data = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop_prometheus(self):
+        """Shut the /metrics server down."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_JOURNAL_PATH = os.path.join('.cache', 'operation_journal.jsonl')
+
+
+def operation_key(op: Dict) -> str:
+    """Stable identity of a write operation, so replaying it can be recognized."""
+    if op['op'] == 'insert':
+        return f"insert:{op['playlist_id']}:{op['video_id']}"
+    if op['op'] == 'delete_item':
+        return f"delete_item:{op['item_id']}"
+    return f"delete_playlist:{op['playlist_id']}"
+
+
+class Transaction:
+    """A journaled batch of operations and what is known to have happened to each."""
+
+    def __init__(self, txn_id: str, kind: str, operations: List[Dict]):
+        self.txn_id = txn_id
+        self.kind = kind
+        self.operations = operations
+        self.done = set()
+        self.failed = set()
+
+    def pending(self) -> List[Dict]:
+        """Operations neither confirmed nor given up on, in planned order."""
+        return [op for op in self.operations
+                if operation_key(op) not in self.done and operation_key(op) not in self.failed]
+
+
+class OperationJournal:
+    """Write-ahead journal of merges, moves and deletes.
+
+    Operations are written (and fsynced) before they are sent; completions
+    are appended as batches come back. A run that dies part-way leaves its
+    transaction open, and the next run can finish exactly the operations
+    that are not known to have completed. Operations use the scheduler's
+    format: {'op': 'insert' | 'delete_item' | 'delete_playlist', 'group', ...};
+    deletions of a group are only sent once all of its inserts are done.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        """Replay the journal; finished transactions are dropped from the file."""
+        self.path = path
+        self._lock = threading.Lock()
+        self.transactions: Dict[str, Transaction] = {}
+        if os.path.exists(path):
+            self._replay()
+            self._compact()
+
+    def _replay(self):
+        """Rebuild open transactions from the log."""
+        with open(self.path, 'r', encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    continue
+                txn = self.transactions.get(record.get('txn'))
+                if record['type'] == 'begin':
+                    self.transactions[record['txn']] = Transaction(record['txn'], record['kind'], record['operations'])
+                elif txn is None:
+                    continue
+                elif record['type'] == 'done':
+                    txn.done.update(record['keys'])
+                elif record['type'] == 'failed':
+                    txn.failed.update(record['keys'])
+                elif record['type'] == 'commit':
+                    del self.transactions[txn.txn_id]
+
+    def _compact(self):
+        """Rewrite the log with only the open transactions."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            for txn in self.transactions.values():
+                fh.write(json.dumps({'type': 'begin', 'txn': txn.txn_id, 'kind': txn.kind,
+                                     'operations': txn.operations}) + '\n')
+                if txn.done:
+                    fh.write(json.dumps({'type': 'done', 'txn': txn.txn_id, 'keys': sorted(txn.done)}) + '\n')
+                if txn.failed:
+                    fh.write(json.dumps({'type': 'failed', 'txn': txn.txn_id, 'keys': sorted(txn.failed)}) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, record: Dict):
+        """Durably add one record to the log."""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps(record) + '\n')
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def begin(self, kind: str, operations: List[Dict]) -> Optional[str]:
+        """Record planned operations before any is sent; returns the transaction ID (None if empty)."""
+        if not operations:
+            return None
+        txn_id = uuid.uuid4().hex
+        self._append({'type': 'begin', 'txn': txn_id, 'kind': kind, 'operations': operations})
+        self.transactions[txn_id] = Transaction(txn_id, kind, operations)
+        return txn_id
+
+    def done(self, txn_id: Optional[str], operations: Iterable[Dict]):
+        """Record operations the API confirmed."""
+        self._mark(txn_id, 'done', operations)
+
+    def failed(self, txn_id: Optional[str], operations: Iterable[Dict]):
+        """Record operations given up on (permanent errors, or deletes whose inserts failed)."""
+        self._mark(txn_id, 'failed', operations)
+
+    def _mark(self, txn_id: Optional[str], status: str, operations: Iterable[Dict]):
+        keys = [operation_key(op) for op in operations]
+        if txn_id is None or not keys:
+            return
+        self._append({'type': status, 'txn': txn_id, 'keys': keys})
+        txn = self.transactions[txn_id]
+        (txn.done if status == 'done' else txn.failed).update(keys)
+
+    def commit(self, txn_id: Optional[str]):
+        """Close a transaction whose operations have all been settled."""
+        if txn_id is None or txn_id not in self.transactions:
+            return
+        self._append({'type': 'commit', 'txn': txn_id})
+        del self.transactions[txn_id]
+
+    def unfinished(self) -> List[Transaction]:
+        """Transactions a previous run left open, oldest first."""
+        return list(self.transactions.values())
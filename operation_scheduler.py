@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from quota_ledger import QuotaLedger, next_reset, quota_cost
+from records import Playlist
+from request_executor import error_reason, is_transient
+
+DEFAULT_QUEUE_PATH = os.path.join('.cache', 'scheduled_operations.json')
+
+# API method behind each queued operation type
+OPERATION_METHODS = {
+    'insert': 'playlistItems.insert',
+    'delete_item': 'playlistItems.delete',
+    'delete_playlist': 'playlists.delete',
+}
+
+
+class OperationScheduler:
+    """Persistent queue of write operations, drained within the daily quota budget.
+
+    Operations run in queue order, as many as the QuotaLedger says today's
+    budget allows; the rest stay on disk and run after the Pacific-midnight
+    reset. A merge group's source playlists are only deleted once every
+    insert queued for that group has gone through. Besides merges, single
+    playlist items can be queued for removal ('delete_item').
+    """
+
+    def __init__(self, manager, ledger: QuotaLedger, path: str = DEFAULT_QUEUE_PATH):
+        """Load the queue left by a previous run, if any."""
+        self.manager = manager
+        self.ledger = ledger
+        self.path = path
+        self.pending: List[Dict] = []
+        self.failed: List[Dict] = []
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as fh:
+                    state = json.load(fh)
+                self.pending = state.get('pending', [])
+                self.failed = state.get('failed', [])
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable operation queue {path}: {e}")
+
+    def _save(self):
+        """Write the queue atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({'pending': self.pending, 'failed': self.failed}, fh, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def cost(operations: List[Dict]) -> int:
+        """Quota units the operations will consume."""
+        return sum(quota_cost(OPERATION_METHODS[op['op']]) for op in operations)
+
+    def plan_auto_merge(self, playlists: List[Playlist], by_content: bool = False) -> List[Dict]:
+        """The write operations auto_merge_all_duplicates would perform, in order."""
+        duplicates = self.manager.find_duplicate_playlists(playlists, by_content)
+        videos_by_playlist = self.manager.get_many_playlist_videos(
+            [playlist.id for group in duplicates for playlist in group]
+        )
+        operations = []
+        for group in duplicates:
+            plan = self.manager._plan_group(group, videos_by_playlist)
+            target = plan.target
+            if target.item_count >= self.manager.MAX_VIDEOS_PER_PLAYLIST:
+                continue
+            operations.extend(
+                {'op': 'insert', 'group': target.id, 'playlist_id': target.id, 'video_id': video_id}
+                for video_id in plan.inserts
+            )
+            if not plan.skipped:
+                operations.extend(
+                    {'op': 'delete_playlist', 'group': target.id, 'playlist_id': source.id,
+                     'title': source.title}
+                    for source in plan.sources
+                )
+        return operations
+
+    def enqueue(self, operations: List[Dict]):
+        """Append operations to the persistent queue."""
+        self.pending.extend(operations)
+        self._save()
+
+    def _next_chunk(self, blocked_groups, budget: Optional[int] = None) -> List[Dict]:
+        """The next run of same-kind operations that today's budget (and one batch) can cover.
+
+        budget further caps the units the chunk may spend.
+        """
+        first = self.pending[0]
+        units = self.ledger.remaining() if budget is None else min(self.ledger.remaining(), budget)
+        affordable = units // quota_cost(OPERATION_METHODS[first['op']])
+        limit = min(affordable, self.manager.batch.batch_size)
+        chunk = []
+        for op in self.pending:
+            if len(chunk) >= limit or op['op'] != first['op'] or op['group'] in blocked_groups:
+                break
+            # One insert batch targets one playlist
+            if op['op'] == 'insert' and op['playlist_id'] != first['playlist_id']:
+                break
+            chunk.append(op)
+        return chunk
+
+    def run(self, max_units: Optional[int] = None, stop_event: Optional[threading.Event] = None) -> Dict:
+        """Execute queued operations until the queue is empty or today's budget (or max_units) is spent.
+
+        Once stop_event is set, the run ends after the batch in flight.
+        """
+        results = {'videos_added': 0, 'videos_removed': 0, 'deleted_playlists': 0, 'failed': 0, 'remaining': 0}
+        spent = 0
+        while self.pending and not (stop_event is not None and stop_event.is_set()):
+            blocked_groups = {op['group'] for op in self.failed}
+            if self.pending[0]['group'] in blocked_groups:
+                # An operation of this group failed for good; keep its sources
+                op = self.pending.pop(0)
+                op['reason'] = 'earlier operation in the group failed'
+                self.failed.append(op)
+                results['failed'] += 1
+                self._save()
+                continue
+
+            chunk = self._next_chunk(blocked_groups, None if max_units is None else max_units - spent)
+            if not chunk:
+                if max_units is not None and self.ledger.can_afford(self.cost(self.pending[:1])):
+                    print(f"⏸️  Budget for this pass reached ({spent} units)")
+                else:
+                    print(f"⏸️  Daily quota budget reached ({self.ledger.used()}/{self.ledger.daily_limit} units)")
+                break
+            spent += self.cost(chunk)
+
+            if chunk[0]['op'] == 'insert':
+                playlist_id = chunk[0]['playlist_id']
+                outcome = self.manager.batch.insert_videos(playlist_id, [op['video_id'] for op in chunk])
+                if outcome.succeeded:
+                    self.manager._playlist_changed(playlist_id)
+                results['videos_added'] += len(outcome.succeeded)
+            elif chunk[0]['op'] == 'delete_item':
+                outcome = self.manager.batch.delete_playlist_items([op['item_id'] for op in chunk])
+                for playlist_id in {op['playlist_id'] for op in chunk if op['item_id'] in outcome.succeeded}:
+                    self.manager._playlist_changed(playlist_id)
+                results['videos_removed'] += len(outcome.succeeded)
+            else:
+                outcome = self.manager._delete_playlists(
+                    [Playlist(op['playlist_id'], op['title'], 0) for op in chunk]
+                )
+                results['deleted_playlists'] += len(outcome.succeeded)
+
+            stop = False
+            finished = set()
+            for op in chunk:
+                key = op[self.manager._outcome_key(op)]
+                e = outcome.failed.get(key)
+                if key in outcome.succeeded:
+                    finished.add(id(op))
+                elif e is not None and error_reason(e) == 'quotaExceeded':
+                    self.ledger.exhaust()
+                    stop = True
+                elif e is not None and is_transient(e):
+                    # Still failing after the batch retries; try again on a later run
+                    stop = True
+                else:
+                    finished.add(id(op))
+                    op['reason'] = str(e) if e is not None else 'request failed'
+                    self.failed.append(op)
+                    results['failed'] += 1
+            self.pending = [op for op in self.pending if id(op) not in finished]
+            self._save()
+            if stop:
+                break
+
+        results['remaining'] = len(self.pending)
+        return results
+
+    def run_until_done(self) -> Dict:
+        """Keep running, sleeping through quota resets, until the queue is empty."""
+        totals = {'videos_added': 0, 'videos_removed': 0, 'deleted_playlists': 0, 'failed': 0, 'remaining': 0}
+        while True:
+            results = self.run()
+            for key in ('videos_added', 'videos_removed', 'deleted_playlists', 'failed'):
+                totals[key] += results[key]
+            totals['remaining'] = results['remaining']
+            if not self.pending:
+                return totals
+
+            if self.ledger.can_afford(self.cost(self.pending[:1])):
+                # Stopped on a transient error with budget left; back off briefly
+                time.sleep(60)
+                continue
+            resume_at = next_reset()
+            wait = (resume_at - datetime.now(timezone.utc)).total_seconds() + 60
+            print(f"😴 {len(self.pending)} operations left; resuming after the quota reset at "
+                  f"{resume_at.strftime('%Y-%m-%d %H:%M %Z')}")
+            time.sleep(max(wait, 0))
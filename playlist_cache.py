@@ -0,0 +1,147 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from cachetools import LRUCache
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'pages.sqlite3')
+
+
+class CachedPage(NamedTuple):
+    etag: str
+    body: Dict
+    validated_at: float
+
+
+class PlaylistPageCache:
+    """Persistent cache of playlists/playlistItems list pages, revalidated with ETags.
+
+    Pages are keyed by (kind, owner, page token), where owner is the playlist ID
+    for playlistItems pages and 'mine' for the playlists listing. Bodies are
+    stored pickled so a 304 answer costs no download and no JSON parsing.
+    All methods are safe to call from concurrent fetch workers.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = 50000,
+                 memory_entries: int = 2000, max_age: float = 120.0):
+        """Open (or create) the cache database.
+
+        max_entries bounds the on-disk cache (least recently used pages are
+        evicted first), memory_entries bounds the in-process LRU layer, and
+        max_age is how many seconds a page is served without revalidation.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._memory = LRUCache(maxsize=memory_entries)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            ' kind TEXT NOT NULL,'
+            ' owner TEXT NOT NULL,'
+            ' page_token TEXT NOT NULL,'
+            ' etag TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' validated_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' PRIMARY KEY (kind, owner, page_token))'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+        self._db.commit()
+
+    def get(self, kind: str, owner: str, page_token: Optional[str]) -> Optional[CachedPage]:
+        """Return the cached page, or None if it has never been stored."""
+        with self._lock:
+            key = (kind, owner, page_token or '')
+            page = self._memory.get(key)
+            if page is None:
+                row = self._db.execute(
+                    'SELECT etag, body, validated_at FROM pages'
+                    ' WHERE kind = ? AND owner = ? AND page_token = ?', key
+                ).fetchone()
+                if row is None:
+                    return None
+                page = CachedPage(row[0], pickle.loads(row[1]), row[2])
+                self._memory[key] = page
+            self._db.execute(
+                'UPDATE pages SET accessed_at = ? WHERE kind = ? AND owner = ? AND page_token = ?',
+                (time.time(),) + key
+            )
+            return page
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        """Whether a page was validated recently enough to skip the API entirely."""
+        return time.time() - page.validated_at < self.max_age
+
+    def put(self, kind: str, owner: str, page_token: Optional[str], etag: str, body: Dict):
+        """Store a freshly downloaded page and evict old pages if over capacity."""
+        with self._lock:
+            key = (kind, owner, page_token or '')
+            now = time.time()
+            self._memory[key] = CachedPage(etag, body, now)
+            self._db.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                key + (etag, pickle.dumps(body, pickle.HIGHEST_PROTOCOL), now, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, kind: str, owner: str, page_token: Optional[str]):
+        """Mark a cached page as revalidated (the API answered 304 Not Modified)."""
+        with self._lock:
+            key = (kind, owner, page_token or '')
+            now = time.time()
+            page = self._memory.get(key)
+            if page is not None:
+                self._memory[key] = page._replace(validated_at=now)
+            self._db.execute(
+                'UPDATE pages SET validated_at = ?, accessed_at = ?'
+                ' WHERE kind = ? AND owner = ? AND page_token = ?',
+                (now, now) + key
+            )
+            self._db.commit()
+
+    def invalidate(self, kind: str, owner: str):
+        """Force revalidation of every page of a listing after we changed it.
+
+        ETags are kept, so unchanged pages still come back as a cheap 304.
+        """
+        with self._lock:
+            for key in [k for k in self._memory.keys() if k[0] == kind and k[1] == owner]:
+                self._memory[key] = self._memory[key]._replace(validated_at=0.0)
+            self._db.execute(
+                'UPDATE pages SET validated_at = 0 WHERE kind = ? AND owner = ?', (kind, owner)
+            )
+            self._db.commit()
+
+    def discard(self, kind: str, owner: str):
+        """Drop every page of a listing (e.g. the playlist was deleted)."""
+        with self._lock:
+            for key in [k for k in self._memory.keys() if k[0] == kind and k[1] == owner]:
+                del self._memory[key]
+            self._db.execute('DELETE FROM pages WHERE kind = ? AND owner = ?', (kind, owner))
+            self._db.commit()
+
+    def _evict(self):
+        """Remove the least recently used pages beyond max_entries."""
+        count = self._db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                'DELETE FROM pages WHERE rowid IN'
+                ' (SELECT rowid FROM pages ORDER BY accessed_at LIMIT ?)', (excess,)
+            )
+            self._memory.clear()
+
+    def close(self):
+        """Flush pending access times and close the database."""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
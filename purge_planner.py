@@ -0,0 +1,105 @@
+from typing import AbstractSet, Dict, List, NamedTuple, Tuple
+
+from quota_ledger import quota_cost
+from records import Playlist, PlaylistItem
+
+REMOVE_COST = quota_cost('playlistItems.delete')
+
+# Where a video may appear once: in each playlist, or in the whole account
+PURGE_SCOPES = ('playlist', 'account')
+# Which copy of a repeated video is kept (see plan_purge)
+KEEP_RULES = ('first', 'last', 'largest', 'smallest', 'oldest', 'newest')
+
+
+class PurgePlan(NamedTuple):
+    removals: List[Tuple[str, str, str]]  # (playlist ID, playlistItem ID, video ID) of every item to remove
+    videos: int                           # distinct videos among them
+    cost: int                             # quota units for removing them
+
+
+def playlist_ranks(playlists: List[Playlist], keep: str) -> Dict[str, int]:
+    """Rank of every playlist under a keep rule; a video's copy in the lowest-ranked playlist is kept.
+
+    'first' and 'last' follow the listing order, 'largest' and 'smallest' the
+    item count, 'oldest' and 'newest' the creation date (undated playlists
+    rank last). Ties keep the listing order.
+    """
+    order = list(range(len(playlists)))
+    if keep == 'last':
+        order.reverse()
+    elif keep in ('largest', 'smallest'):
+        order.sort(key=lambda n: playlists[n].item_count, reverse=keep == 'largest')
+    elif keep in ('oldest', 'newest'):
+        dated = sorted((n for n in order if playlists[n].published_at),
+                       key=lambda n: playlists[n].published_at, reverse=keep == 'newest')
+        order = dated + [n for n in order if not playlists[n].published_at]
+    return {playlists[n].id: rank for rank, n in enumerate(order)}
+
+
+def plan_purge(playlists: List[Playlist], videos_by_playlist: Dict[str, List[PlaylistItem]],
+               scope: str = 'playlist', keep: str = 'first') -> PurgePlan:
+    """Find every redundant copy of a video in one pass over the items.
+
+    With scope 'playlist' a video is kept once per playlist, with 'account'
+    once in the whole account, in the playlist the keep rule ranks first (see
+    playlist_ranks). Within a playlist the earliest copy is kept, or the
+    latest with keep='last'. Playlists missing from videos_by_playlist are
+    left alone.
+    """
+    if scope not in PURGE_SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(PURGE_SCOPES)}")
+    if keep not in KEEP_RULES:
+        raise ValueError(f"keep must be one of {', '.join(KEEP_RULES)}")
+    ranks = playlist_ranks(playlists, keep)
+    direction = -1 if keep == 'last' else 1
+
+    # The copy kept so far for every video (or every video of a playlist), as (rank, removal)
+    keepers: Dict = {}
+    removals = []
+    for playlist in playlists:
+        for position, item in enumerate(videos_by_playlist.get(playlist.id, ())):
+            key = item.video_id if scope == 'account' else (playlist.id, item.video_id)
+            entry = ((ranks[playlist.id], direction * position), (playlist.id, item.id, item.video_id))
+            kept = keepers.get(key)
+            if kept is None:
+                keepers[key] = entry
+            elif entry[0] < kept[0]:
+                removals.append(kept[1])
+                keepers[key] = entry
+            else:
+                removals.append(entry[1])
+    videos = len({video_id for _, _, video_id in removals})
+    return PurgePlan(removals, videos, len(removals) * REMOVE_COST)
+
+
+def plan_removal(playlists: List[Playlist], videos_by_playlist: Dict[str, List[PlaylistItem]],
+                 video_ids: AbstractSet[str]) -> PurgePlan:
+    """Every item of the given videos (e.g. unavailable ones) in the playlists."""
+    removals = [(playlist.id, item.id, item.video_id) for playlist in playlists
+                for item in videos_by_playlist.get(playlist.id, ()) if item.video_id in video_ids]
+    return PurgePlan(removals, len({video_id for _, _, video_id in removals}), len(removals) * REMOVE_COST)
+
+
+def purge_operations(plan: PurgePlan) -> List[Dict]:
+    """The plan's removals as journal/scheduler operations; each item is its own group."""
+    return [{'op': 'delete_item', 'group': item_id, 'playlist_id': playlist_id, 'item_id': item_id,
+             'video_id': video_id} for playlist_id, item_id, video_id in plan.removals]
+
+
+def print_purge_preview(plan: PurgePlan, playlists: List[Playlist], limit: int = 10, kind: str = 'redundant'):
+    """Report what a purge would remove, per playlist, and its exact quota cost."""
+    if not plan.removals:
+        print(f"✅ No {kind} items to remove!")
+        return
+    removed: Dict[str, int] = {}
+    for playlist_id, _, _ in plan.removals:
+        removed[playlist_id] = removed.get(playlist_id, 0) + 1
+    print(f"🧹 {len(plan.removals)} {kind} items ({plan.videos} videos) in {len(removed)} playlists")
+    titles = {p.id: p.title for p in playlists}
+    counts = {p.id: p.item_count for p in playlists}
+    for playlist_id, count in sorted(removed.items(), key=lambda entry: entry[1], reverse=True)[:limit]:
+        print(f"   {titles.get(playlist_id, playlist_id)}: -{count} ({counts.get(playlist_id, 0)} -> "
+              f"{counts.get(playlist_id, 0) - count} videos)")
+    if len(removed) > limit:
+        print(f"   ... and {len(removed) - limit} more playlists")
+    print(f"🪙 Exact cost: {plan.cost} units ({len(plan.removals)} deletes)")
@@ -1,37 +1,47 @@
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import json
+import sys
 
-SCOPES = ['https://www.googleapis.com/auth/youtube']
+from quota_ledger import QuotaLedger, QUOTA_COSTS, next_reset
+from request_executor import QUOTA_EXCEEDED, RequestExecutor, classify
+from youtube_client import build_youtube, load_credentials
 
-def check_quota():
+def print_ledger(ledger: QuotaLedger):
+    """Show today's recorded usage without calling the API."""
+    print(f"\n🪙 Quota used today: {ledger.used()} / {ledger.daily_limit} units "
+          f"({ledger.remaining()} remaining)")
+    for method, count in sorted(ledger.calls().items()):
+        print(f"  • {method}: {count} calls")
+    print(f"🕐 Next reset: {next_reset().strftime('%Y-%m-%d %H:%M %Z')}")
+
+def check_quota(live: bool = True):
     """Check YouTube API quota usage."""
     print("🔍 YouTube API Quota Checker")
     print("=" * 40)
     
+    ledger = QuotaLedger()
+    print_ledger(ledger)
+    
+    print("\n📊 Quota Information:")
+    print(f"- YouTube Data API v3 has a default quota of {ledger.daily_limit:,} units per day")
+    print("- Different operations cost different amounts:")
+    for method, cost in QUOTA_COSTS.items():
+        print(f"  • {method}() - {cost} unit{'s' if cost != 1 else ''}")
+    
+    if not live:
+        return
+    
     try:
         # Initialize the API client
-        flow = InstalledAppFlow.from_client_secrets_file('credentials.json', scopes=SCOPES)
-        creds = flow.run_local_server(port=8080)  # Different port to avoid conflicts
-        youtube = build('youtube', 'v3', credentials=creds)
+        creds = load_credentials()
+        youtube = build_youtube(creds, request_builder=ledger.request_builder())
         
         # Try a simple API call to test quota
-        print("Testing API access...")
-        response = youtube.channels().list(part='snippet', mine=True).execute()
+        print("\nTesting API access...")
+        executor = RequestExecutor(ledger=ledger)
+        response = executor.execute(youtube.channels().list(part='snippet', mine=True))
         print("✅ API is working! Quota is available.")
         
-        # Get quota information
-        print("\n📊 Quota Information:")
-        print("- YouTube Data API v3 has a default quota of 10,000 units per day")
-        print("- Different operations cost different amounts:")
-        print("  • channels().list() - 1 unit")
-        print("  • playlists().list() - 1 unit")
-        print("  • playlistItems().list() - 1 unit")
-        print("  • playlistItems().insert() - 50 units")
-        print("  • playlists().delete() - 50 units")
-        print("  • playlists().update() - 50 units")
-        
         print("\n💡 Tips to manage quota:")
         print("1. Wait until tomorrow for quota reset")
         print("2. Use the Analysis mode first (fewer API calls)")
@@ -39,7 +49,8 @@ def check_quota():
         print("4. Consider upgrading to a paid Google Cloud account")
         
     except HttpError as e:
-        if "quotaExceeded" in str(e):
+        if classify(e) == QUOTA_EXCEEDED:
+            # The executor has already marked the ledger exhausted
             print("❌ Quota exceeded! You've used up your daily API quota.")
             print("\n🕐 Solutions:")
             print("1. Wait until tomorrow (quota resets daily)")
@@ -52,4 +63,5 @@ def check_quota():
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    check_quota() 
\ No newline at end of file
+    # --offline: report the ledger only, without spending an API call
+    check_quota(live='--offline' not in sys.argv[1:])
@@ -0,0 +1,154 @@
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from googleapiclient.http import HttpRequest
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo('America/Los_Angeles')
+except ImportError:  # Python < 3.9: ignore daylight saving time
+    PACIFIC = timezone(timedelta(hours=-8), 'PST')
+
+DEFAULT_LEDGER_PATH = os.path.join('.cache', 'quota_ledger.json')
+DAILY_QUOTA = 10000
+# Seconds between ledger writes while calls are being recorded
+SAVE_INTERVAL = 1.0
+
+# Units charged per call (YouTube Data API v3)
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'playlists.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+    'playlistItems.insert': 50,
+    'playlistItems.update': 50,
+    'playlistItems.delete': 50,
+    'playlists.insert': 50,
+    'playlists.update': 50,
+    'playlists.delete': 50,
+}
+
+
+def quota_cost(method: str) -> int:
+    """Units charged for a method such as 'playlistItems.insert' (or its methodId)."""
+    if method.startswith('youtube.'):
+        method = method[len('youtube.'):]
+    return QUOTA_COSTS.get(method, 1)
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """The quota day (quotas reset at midnight Pacific time) as YYYY-MM-DD."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(PACIFIC).date().isoformat()
+
+
+def next_reset(now: Optional[datetime] = None) -> datetime:
+    """The next Pacific midnight, when the daily quota resets."""
+    now = (now or datetime.now(timezone.utc)).astimezone(PACIFIC)
+    tomorrow = now.date() + timedelta(days=1)
+    return datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=PACIFIC)
+
+
+class QuotaLedger:
+    """Persistent record of the quota units spent today, tracked offline.
+
+    Every API call the tools make is charged here at its known unit cost,
+    so the remaining daily budget is known without asking Google.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, daily_limit: int = DAILY_QUOTA):
+        """Load today's usage from disk."""
+        self.path = path
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self._state = {'day': quota_day(), 'used': 0, 'calls': {}}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as fh:
+                    self._state = json.load(fh)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable quota ledger {path}: {e}")
+        self._roll_over()
+        atexit.register(self.flush)
+
+    def _roll_over(self):
+        """Start a fresh day once the Pacific-midnight reset has passed."""
+        today = quota_day()
+        if self._state.get('day') != today:
+            self._state = {'day': today, 'used': 0, 'calls': {}}
+
+    def _save(self):
+        """Write the ledger atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self._state, fh, indent=2)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+        self._dirty = False
+
+    def flush(self):
+        """Write any charges not yet on disk."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def record(self, method: str, count: int = 1):
+        """Charge count calls of a method against today's budget."""
+        if method.startswith('youtube.'):
+            method = method[len('youtube.'):]
+        with self._lock:
+            self._roll_over()
+            self._state['used'] += quota_cost(method) * count
+            self._state['calls'][method] = self._state['calls'].get(method, 0) + count
+            self._dirty = True
+            if time.monotonic() - self._last_save >= SAVE_INTERVAL:
+                self._save()
+
+    def exhaust(self):
+        """The API reported quotaExceeded: treat today's budget as spent."""
+        with self._lock:
+            self._roll_over()
+            self._state['used'] = max(self._state['used'], self.daily_limit)
+            self._save()
+
+    def used(self) -> int:
+        """Units spent today."""
+        with self._lock:
+            self._roll_over()
+            return self._state['used']
+
+    def remaining(self) -> int:
+        """Units left today."""
+        return max(self.daily_limit - self.used(), 0)
+
+    def can_afford(self, units: int) -> bool:
+        """Whether today's budget still covers the given number of units."""
+        return units <= self.remaining()
+
+    def calls(self) -> Dict[str, int]:
+        """Calls made today, per method."""
+        with self._lock:
+            self._roll_over()
+            return dict(self._state['calls'])
+
+    def request_builder(self):
+        """An HttpRequest class for build(requestBuilder=...) that charges every executed call."""
+        ledger = self
+
+        class LedgerHttpRequest(HttpRequest):
+            def execute(self, *args, **kwargs):
+                # Failed and 304 answers are charged too
+                ledger.record(self.methodId or '')
+                return super().execute(*args, **kwargs)
+
+        return LedgerHttpRequest
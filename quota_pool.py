@@ -0,0 +1,179 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from batch_ops import BatchOutcome, BatchWriter
+from quota_ledger import QuotaLedger, quota_cost
+from request_executor import RequestExecutor
+
+# Names the Cloud project a call is charged to; only sent to a local fake API,
+# since with Google the project is the one owning the credentials' OAuth client
+PROJECT_HEADER = 'X-Goog-User-Project'
+# The writes a pool spreads; each project can only take whole calls of them
+POOLED_METHODS = ('playlistItems.insert', 'playlistItems.delete', 'playlists.delete')
+CALL_COST = max(quota_cost(method) for method in POOLED_METHODS)
+
+
+def project_name(client_secrets: str) -> str:
+    """'secrets/project-b.json' -> 'project-b'."""
+    return os.path.splitext(os.path.basename(client_secrets))[0]
+
+
+def project_request_builder(project: str, base=HttpRequest):
+    """An HttpRequest class (derived from base) that names the project every call is charged to."""
+
+    class ProjectHttpRequest(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.headers[PROJECT_HEADER] = project
+
+    return ProjectHttpRequest
+
+
+def quota_error(method: str) -> HttpError:
+    """A quotaExceeded error for a call the pool did not send because no project could afford it."""
+    content = {'error': {'code': 403, 'message': f'No pooled project has quota left for {method}.',
+                         'errors': [{'reason': 'quotaExceeded', 'message': 'Pooled quota exhausted.'}]}}
+    return HttpError(httplib2.Response({'status': 403}), json.dumps(content).encode('utf-8'))
+
+
+class QuotaProject:
+    """One Cloud project's write path: its client, quota ledger, executor and batch writer."""
+
+    def __init__(self, name: str, youtube, ledger: QuotaLedger, executor: RequestExecutor, batch: BatchWriter):
+        self.name = name
+        self.youtube = youtube
+        self.ledger = ledger
+        self.executor = executor
+        self.batch = batch
+
+
+class QuotaPool:
+    """The daily quotas of several Cloud projects used as one write budget.
+
+    Writes are split across the projects in proportion to the units each has
+    left today, and every project sends its share through its own client,
+    executor and batch writer in parallel. No project is given more calls
+    than its ledger can afford; calls beyond the pool's total budget are not
+    sent and come back failed with quotaExceeded, like calls the API refuses.
+
+    The pool offers the budget methods of a QuotaLedger (remaining,
+    can_afford, ...) summed over its projects, and the write methods of a
+    BatchWriter, so it can stand in for either.
+    """
+
+    def __init__(self, projects: List[QuotaProject]):
+        """Pool the given projects (the first is used for single calls when budgets tie)."""
+        self.projects = projects
+
+    # --- Budget (QuotaLedger interface) ---------------------------------
+
+    @property
+    def daily_limit(self) -> int:
+        return sum(project.ledger.daily_limit for project in self.projects)
+
+    def used(self) -> int:
+        """Units spent today by all projects."""
+        return sum(project.ledger.used() for project in self.projects)
+
+    def remaining(self) -> int:
+        """Units left today in all projects."""
+        return sum(project.ledger.remaining() for project in self.projects)
+
+    def can_afford(self, units: int) -> bool:
+        """Whether the given units of writes fit into the projects' budgets.
+
+        A call cannot be split between projects, so every project counts only
+        the whole calls its remainder pays for: two projects with 45 units
+        left cannot afford one 50-unit insert.
+        """
+        calls = -(-units // CALL_COST)
+        return calls <= sum(project.ledger.remaining() // CALL_COST for project in self.projects)
+
+    def exhaust(self):
+        """A pooled write was refused for quota: nothing to do here.
+
+        The refusing project's executor has already marked its own ledger
+        spent, and the other projects' budgets are still good.
+        """
+
+    def calls(self) -> Dict[str, int]:
+        """Calls made today by all projects, per method."""
+        calls: Dict[str, int] = {}
+        for project in self.projects:
+            for method, count in project.ledger.calls().items():
+                calls[method] = calls.get(method, 0) + count
+        return calls
+
+    def budgets(self) -> List[Tuple[str, int, int]]:
+        """(project, units used, units left) for every project."""
+        return [(project.name, project.ledger.used(), project.ledger.remaining()) for project in self.projects]
+
+    # --- Writes (BatchWriter interface) ---------------------------------
+
+    @property
+    def batch_size(self) -> int:
+        """Calls that go out at once: one batch per project."""
+        return sum(project.batch.batch_size for project in self.projects)
+
+    def pick(self) -> QuotaProject:
+        """The project with the most quota left, for a single call."""
+        return max(self.projects, key=lambda project: project.ledger.remaining())
+
+    def shares(self, count: int, method: str) -> Tuple[List[int], int]:
+        """How many of count calls of a method each project takes, and how many no project can afford."""
+        affordable = [project.ledger.remaining() // quota_cost(method) for project in self.projects]
+        total = sum(affordable)
+        if total <= count:
+            return affordable, count - total
+        shares = [count * budget // total for budget in affordable]
+        # Hand out what rounding left over to the projects with the most room
+        spare = sorted(range(len(shares)), key=lambda n: shares[n] - affordable[n])
+        for n in spare[:count - sum(shares)]:
+            shares[n] += 1
+        return shares, 0
+
+    def _spread(self, method: str, keys: Iterable[str],
+                send: Callable[[BatchWriter, List[str]], BatchOutcome]) -> BatchOutcome:
+        """Split keys across the projects and send every share in parallel; outcomes are merged."""
+        keys = list(dict.fromkeys(keys))
+        shares, unaffordable = self.shares(len(keys), method)
+        chunks = []
+        start = 0
+        for project, share in zip(self.projects, shares):
+            if share:
+                chunks.append((project, keys[start:start + share]))
+            start += share
+
+        succeeded: Dict[str, object] = {}
+        failed: Dict[str, HttpError] = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                outcomes = list(pool.map(lambda chunk: send(chunk[0].batch, chunk[1]), chunks))
+            for outcome in outcomes:
+                succeeded.update(outcome.succeeded)
+                failed.update(outcome.failed)
+        if unaffordable:
+            error = quota_error(method)
+            failed.update((key, error) for key in keys[start:])
+        return BatchOutcome(succeeded, failed)
+
+    def insert_videos(self, playlist_id: str, video_ids: Iterable[str]) -> BatchOutcome:
+        """Add videos to a playlist; results are keyed by video ID."""
+        return self._spread('playlistItems.insert', video_ids,
+                            lambda batch, chunk: batch.insert_videos(playlist_id, chunk))
+
+    def delete_playlist_items(self, item_ids: Iterable[str]) -> BatchOutcome:
+        """Remove playlist items; results are keyed by playlistItem ID."""
+        return self._spread('playlistItems.delete', item_ids,
+                            lambda batch, chunk: batch.delete_playlist_items(chunk))
+
+    def delete_playlists(self, playlist_ids: Iterable[str]) -> BatchOutcome:
+        """Delete playlists; results are keyed by playlist ID."""
+        return self._spread('playlists.delete', playlist_ids,
+                            lambda batch, chunk: batch.delete_playlists(chunk))
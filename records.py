@@ -0,0 +1,75 @@
+from typing import Dict, NamedTuple
+
+# YouTube refuses inserts into a playlist holding this many videos
+MAX_VIDEOS_PER_PLAYLIST = 5000
+
+# Partial-response masks (fields=...): only the attributes the tools read.
+# The page etag and nextPageToken are kept for caching and paging.
+PLAYLIST_FIELDS = 'etag,nextPageToken,items(id,etag,snippet(title,publishedAt),contentDetails/itemCount)'
+PLAYLIST_ITEM_FIELDS = ('etag,nextPageToken,items(id,snippet(title,videoOwnerChannelId,videoOwnerChannelTitle),'
+                        'contentDetails(videoId,videoPublishedAt))')
+VIDEO_PARTS = 'snippet,contentDetails,status'
+VIDEO_FIELDS = 'items(id,snippet(title,channelId,channelTitle,publishedAt),contentDetails/duration,status/privacyStatus)'
+
+# Privacy status recorded for videos videos.list no longer returns (deleted, private or taken down)
+UNAVAILABLE = 'unavailable'
+
+
+class Playlist(NamedTuple):
+    id: str
+    title: str
+    item_count: int
+    etag: str = ''
+    published_at: str = ''  # snippet.publishedAt, when the playlist was created
+
+    @classmethod
+    def from_resource(cls, resource: Dict) -> 'Playlist':
+        """Slim record of a playlists.list resource."""
+        return cls(resource['id'], resource['snippet']['title'], resource['contentDetails']['itemCount'],
+                   resource.get('etag', ''), resource['snippet'].get('publishedAt', ''))
+
+
+class PlaylistItem(NamedTuple):
+    id: str
+    video_id: str
+    title: str
+    published_at: str = ''  # contentDetails.videoPublishedAt; empty for deleted or private videos
+    channel_id: str = ''  # the video's owner, also empty for deleted or private videos
+    channel_title: str = ''
+
+    @property
+    def unavailable(self) -> bool:
+        """Whether the video was deleted or made private (the API then omits its date and owner)."""
+        return not self.published_at and not self.channel_id
+
+    @classmethod
+    def from_resource(cls, resource: Dict) -> 'PlaylistItem':
+        """Slim record of a playlistItems.list resource."""
+        details = resource['contentDetails']
+        snippet = resource['snippet']
+        return cls(resource['id'], details['videoId'], snippet['title'], details.get('videoPublishedAt', ''),
+                   snippet.get('videoOwnerChannelId', ''), snippet.get('videoOwnerChannelTitle', ''))
+
+
+class Video(NamedTuple):
+    id: str
+    title: str = ''
+    channel_id: str = ''
+    channel_title: str = ''
+    published_at: str = ''
+    duration: str = ''  # ISO 8601, e.g. 'PT3M30S'
+    privacy_status: str = ''  # 'public', 'unlisted', 'private' (our own), or UNAVAILABLE
+
+    @property
+    def available(self) -> bool:
+        """Whether the video can still be played (and added to playlists)."""
+        return self.privacy_status != UNAVAILABLE
+
+    @classmethod
+    def from_resource(cls, resource: Dict) -> 'Video':
+        """Slim record of a videos.list resource."""
+        snippet = resource.get('snippet', {})
+        return cls(resource['id'], snippet.get('title', ''), snippet.get('channelId', ''),
+                   snippet.get('channelTitle', ''), snippet.get('publishedAt', ''),
+                   resource.get('contentDetails', {}).get('duration', ''),
+                   resource.get('status', {}).get('privacyStatus', ''))
@@ -0,0 +1,96 @@
+import re
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+_DURATION_PATTERN = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def parse_duration(value: str) -> int:
+    """Seconds in an ISO 8601 duration such as 'PT1H2M3S' (0 if unparseable)."""
+    match = _DURATION_PATTERN.fullmatch(value or '')
+    if not match:
+        return 0
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def longest_increasing_subsequence(values: Sequence[int]) -> List[int]:
+    """Indices of one longest strictly increasing subsequence (O(n log n))."""
+    tails: List[int] = []       # tails[k]: smallest tail value of an increasing run of length k+1
+    tail_index: List[int] = []  # index in values of that tail
+    previous = [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[k] = value
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else -1
+    result = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    return result[::-1]
+
+
+class PlaylistPositionModel:
+    """Local model of a playlist's item order, updated as moves are applied."""
+
+    def __init__(self, item_ids: List[str]):
+        """Start from the items' current order."""
+        self.order = list(item_ids)
+
+    def move(self, item_id: str, position: int):
+        """Mirror playlistItems.update(position=...): take the item out and reinsert it."""
+        self.order.remove(item_id)
+        self.order.insert(position, item_id)
+
+
+def plan_moves(current: List[str], target: List[str]) -> List[Tuple[str, int]]:
+    """The fewest (item ID, position) moves that turn current into target, in execution order.
+
+    Items on a longest increasing subsequence of target ranks stay put; every
+    other item is moved, in target order, to just after its target predecessor.
+    Positions account for the shifts caused by earlier moves.
+    """
+    if sorted(current) != sorted(target):
+        raise ValueError("target order must contain exactly the playlist's items")
+    rank = {item_id: n for n, item_id in enumerate(target)}
+    ranks = [rank[item_id] for item_id in current]
+    keep = {current[i] for i in longest_increasing_subsequence(ranks)}
+
+    model = PlaylistPositionModel(current)
+    moves = []
+    for n, item_id in enumerate(target):
+        if item_id in keep:
+            continue
+        model.order.remove(item_id)
+        position = model.order.index(target[n - 1]) + 1 if n else 0
+        model.order.insert(position, item_id)
+        moves.append((item_id, position))
+    return moves
+
+
+def apply_commands(item_ids: List[str], commands: List[Tuple[str, int]]) -> List[str]:
+    """The order that results from applying (item ID, position) moves one after another."""
+    model = PlaylistPositionModel(item_ids)
+    for item_id, position in commands:
+        model.move(item_id, min(position, len(model.order) - 1))
+    return model.order
+
+
+SORT_KEYS = ('published', 'title', 'duration')
+
+
+def sort_key(key: str, durations: Dict[str, int]):
+    """Sort key function over playlist items for one of SORT_KEYS."""
+    if key == 'published':
+        return lambda item: item.published_at
+    if key == 'title':
+        return lambda item: item.title.casefold()
+    if key == 'duration':
+        return lambda item: durations.get(item.video_id, 0)
+    raise ValueError(f"Unknown sort key {key!r}; expected one of {', '.join(SORT_KEYS)}")
@@ -0,0 +1,165 @@
+import random
+import threading
+import time
+from typing import Optional
+
+from googleapiclient.errors import HttpError
+
+# Starting and ceiling request rates (requests per second) for the token bucket
+DEFAULT_RATE = 10.0
+MAX_RATE = 50.0
+MIN_RATE = 0.5
+DEFAULT_MAX_ATTEMPTS = 5
+MAX_BACKOFF = 64.0
+
+# How a failed call is handled
+RATE_LIMITED = 'rate_limited'      # slow down, then retry
+QUOTA_EXCEEDED = 'quota_exceeded'  # the day's budget is gone: stop, no retry
+SERVER_ERROR = 'server_error'      # retry with backoff at the same pace
+PERMANENT = 'permanent'            # the request itself is wrong: report it
+
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+SERVER_REASONS = {'backendError', 'internalError'}
+SERVER_STATUSES = {500, 502, 503, 504}
+
+
+def error_reason(e: HttpError) -> str:
+    """The first 'reason' of an API error, or '' if it has none."""
+    try:
+        return e.error_details[0].get('reason', '') if e.error_details else ''
+    except (AttributeError, IndexError, TypeError):
+        return ''
+
+
+def classify(e: HttpError) -> str:
+    """Which of RATE_LIMITED, QUOTA_EXCEEDED, SERVER_ERROR or PERMANENT an error is."""
+    reason = error_reason(e)
+    if reason in QUOTA_REASONS:
+        return QUOTA_EXCEEDED
+    if reason in RATE_LIMIT_REASONS or e.resp.status == 429:
+        return RATE_LIMITED
+    if reason in SERVER_REASONS or e.resp.status in SERVER_STATUSES:
+        return SERVER_ERROR
+    return PERMANENT
+
+
+def is_transient(e: HttpError) -> bool:
+    """Whether a failed request may succeed if simply sent again."""
+    return classify(e) in (RATE_LIMITED, SERVER_ERROR)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until enough tokens are available."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Take tokens, sleeping until the bucket holds them."""
+        while True:
+            with self._lock:
+                self._refill()
+                needed = min(tokens, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= needed
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate: float):
+        """Change the refill rate (tokens per second)."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = max(rate, 1.0)
+            self._tokens = min(self._tokens, self.capacity)
+
+
+class RequestExecutor:
+    """Executes API requests with token-bucket pacing and classified retries.
+
+    The pace adapts to what the API accepts (additive increase after each
+    success, halving on a rate-limit error). Rate limits and server errors
+    are retried with full-jitter exponential backoff (honoring Retry-After);
+    quotaExceeded marks the ledger exhausted and is raised at once, as are
+    permanent errors and 304 Not Modified answers.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, max_rate: float = MAX_RATE,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = 1.0, ledger=None, metrics=None):
+        """Create an executor; calls are charged by the client, the ledger is told about quotaExceeded.
+
+        Retries are reported to metrics (a metrics.Metrics), if given.
+        """
+        self.bucket = TokenBucket(rate)
+        self.max_rate = max_rate
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.ledger = ledger
+        self.metrics = metrics
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current pace in requests per second."""
+        return self.bucket.rate
+
+    def pace(self, requests: int = 1):
+        """Wait for the turn of the next requests (a batch counts each of its parts)."""
+        self.bucket.acquire(requests)
+
+    def succeeded(self):
+        """Additive increase: the API kept up, allow a little more."""
+        with self._lock:
+            if self.bucket.rate < self.max_rate:
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + 0.5))
+
+    def throttled(self):
+        """Multiplicative decrease after a rate-limit error."""
+        with self._lock:
+            self.bucket.set_rate(max(MIN_RATE, self.bucket.rate / 2))
+
+    def backoff(self, attempt: int, e: Optional[HttpError] = None) -> float:
+        """Seconds to wait before retry number attempt (full jitter, or the server's Retry-After)."""
+        retry_after = e.resp.get('retry-after') if e is not None else None
+        if retry_after and str(retry_after).isdigit():
+            return float(retry_after)
+        return random.uniform(0, min(MAX_BACKOFF, self.base_delay * (2 ** attempt)))
+
+    def handle_error(self, e: HttpError) -> str:
+        """Classify a failure and update pace and ledger accordingly."""
+        kind = classify(e)
+        if kind == RATE_LIMITED:
+            self.throttled()
+        elif kind == QUOTA_EXCEEDED and self.ledger is not None:
+            self.ledger.exhaust()
+        return kind
+
+    def execute(self, request, **kwargs):
+        """Execute an HttpRequest, retrying what is worth retrying; raises HttpError otherwise."""
+        for attempt in range(self.max_attempts):
+            self.pace()
+            try:
+                response = request.execute(**kwargs)
+            except HttpError as e:
+                if e.resp.status == 304:
+                    raise
+                kind = self.handle_error(e)
+                if kind in (QUOTA_EXCEEDED, PERMANENT) or attempt == self.max_attempts - 1:
+                    raise
+                if self.metrics is not None:
+                    self.metrics.record_retry(getattr(request, 'methodId', None) or '')
+                time.sleep(self.backoff(attempt, e))
+                continue
+            self.succeeded()
+            return response
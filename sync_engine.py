@@ -0,0 +1,133 @@
+import os
+import pickle
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from records import Playlist, PlaylistItem
+
+DEFAULT_STATE_PATH = os.path.join('.cache', 'account_state.pickle')
+# Bumped when the stored record types change; older state is re-synced from scratch
+STATE_VERSION = 3
+
+
+class SyncReport(NamedTuple):
+    playlists: int
+    changed: int
+    unchanged: int
+    removed: int
+    failed: int
+
+
+class AccountSync:
+    """Local model of the account's playlists and their items, kept current by delta syncs.
+
+    A sync runs the cheap playlists().list pass and re-pages the items of a
+    playlist only when its etag or contentDetails.itemCount differ from the
+    stored state, so a rerun after a small change costs a handful of units.
+    """
+
+    def __init__(self, manager, path: str = DEFAULT_STATE_PATH):
+        """Load the previously synced state (if any) for the given manager."""
+        self.manager = manager
+        self.path = path
+        self.playlists: Dict[str, Playlist] = {}
+        self.items: Dict[str, List[PlaylistItem]] = {}
+        # Playlists modified during this run; their stored items are out of date
+        self._stale: Set[str] = set()
+        self._load()
+
+    def _load(self):
+        """Read the stored model from disk."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as fh:
+                state = pickle.load(fh)
+            if state.get('version') != STATE_VERSION:
+                return
+            self.playlists = state['playlists']
+            self.items = state['items']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError) as e:
+            print(f"⚠️  Ignoring unreadable sync state {self.path}: {e}")
+            self.playlists = {}
+            self.items = {}
+
+    def save(self):
+        """Persist the model; stale playlists are dropped so the next sync re-pages them."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        items = {pid: videos for pid, videos in self.items.items() if pid not in self._stale}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            pickle.dump({'version': STATE_VERSION, 'playlists': self.playlists, 'items': items}, fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def _is_unchanged(self, playlist: Playlist) -> bool:
+        """Whether the stored items for a playlist still match the live listing."""
+        stored = self.playlists.get(playlist.id)
+        return (
+            stored is not None
+            and playlist.id in self.items
+            and playlist.id not in self._stale
+            and stored.etag == playlist.etag
+            and stored.item_count == playlist.item_count
+        )
+
+    def sync(self) -> SyncReport:
+        """Bring the local model up to date, re-paging only playlists that changed."""
+        live = self.manager.get_all_playlists()
+        if not live:
+            # An error or an empty listing; keep the stored model rather than wiping it
+            return SyncReport(len(self.playlists), 0, 0, 0, 0)
+
+        live_ids = {playlist.id for playlist in live}
+        removed = [pid for pid in self.playlists if pid not in live_ids]
+        for pid in removed:
+            self.forget(pid)
+
+        unchanged = 0
+        changed_playlists = []
+        for playlist in live:
+            if self._is_unchanged(playlist):
+                self.playlists[playlist.id] = playlist
+                unchanged += 1
+            else:
+                changed_playlists.append(playlist)
+
+        # Re-page the changed playlists in parallel
+        fetched, errors = self.manager.fetcher.fetch([playlist.id for playlist in changed_playlists])
+        for playlist in changed_playlists:
+            if playlist.id in errors:
+                print(f"Error syncing playlist {playlist.title}: {errors[playlist.id]}")
+                # Keep the playlist listed but without items, so it is re-read on demand
+                # and retried by the next sync
+                self.items.pop(playlist.id, None)
+            else:
+                self.items[playlist.id] = fetched[playlist.id]
+            self.playlists[playlist.id] = playlist
+            self._stale.discard(playlist.id)
+        changed = len(changed_playlists) - len(errors)
+        failed = len(errors)
+
+        self.save()
+        return SyncReport(len(live), changed, unchanged, len(removed), failed)
+
+    def playlist_list(self) -> List[Playlist]:
+        """All synced playlists, in a list the caller may modify."""
+        return list(self.playlists.values())
+
+    def current_items(self, playlist_id: str) -> Optional[List[PlaylistItem]]:
+        """Synced items of a playlist, or None if they are missing or out of date."""
+        if playlist_id in self._stale or playlist_id not in self.items:
+            return None
+        return list(self.items[playlist_id])
+
+    def mark_stale(self, playlist_id: str):
+        """Record that a playlist was modified and its items must be re-read."""
+        self._stale.add(playlist_id)
+
+    def forget(self, playlist_id: str):
+        """Drop a playlist that no longer exists."""
+        self.playlists.pop(playlist_id, None)
+        self.items.pop(playlist_id, None)
+        self._stale.discard(playlist_id)
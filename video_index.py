@@ -0,0 +1,176 @@
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from records import PlaylistItem
+
+
+class PlaylistItemIndex:
+    """videoId -> playlistItem IDs for one playlist, kept current as items are removed."""
+
+    def __init__(self, playlist_id: str, playlist_items: Iterable[PlaylistItem]):
+        """Index a playlist's items (as yielded by iter_playlist_videos)."""
+        self.playlist_id = playlist_id
+        self._items: Dict[str, List[str]] = defaultdict(list)
+        for item in playlist_items:
+            self._items[item.video_id].append(item.id)
+
+    def __contains__(self, video_id: str) -> bool:
+        return bool(self._items.get(video_id))
+
+    def item_id(self, video_id: str) -> Optional[str]:
+        """The first playlistItem holding the video, or None."""
+        item_ids = self._items.get(video_id)
+        return item_ids[0] if item_ids else None
+
+    def add(self, video_id: str, item_id: str):
+        """Record a newly inserted item."""
+        self._items[video_id].append(item_id)
+
+    def remove(self, video_id: str, item_id: str):
+        """Forget an item that was deleted."""
+        item_ids = self._items.get(video_id, [])
+        if item_id in item_ids:
+            item_ids.remove(item_id)
+        if not item_ids:
+            self._items.pop(video_id, None)
+
+
+class AccountVideoIndex:
+    """Compact account-wide index of which videos sit where.
+
+    Video IDs are interned as integers; each playlist is an array of video
+    numbers in position order (plus its item IDs), and a CSR-style inverted
+    index maps every video to its (playlist, position) entries. Set
+    differences, overlap counts and "which playlists hold this video" are
+    integer operations instead of walks over API response dicts.
+    """
+
+    __slots__ = ('_video_ids', '_video_numbers', '_playlist_ids', '_playlist_numbers',
+                 '_videos', '_item_ids', '_offsets', '_postings')
+
+    # Postings pack (playlist number, position) into one unsigned 64-bit integer
+    _POSITION_BITS = 16
+
+    def __init__(self):
+        self._video_ids: List[str] = []
+        self._video_numbers: Dict[str, int] = {}
+        self._playlist_ids: List[Optional[str]] = []
+        self._playlist_numbers: Dict[str, int] = {}
+        self._videos: List[Optional[array]] = []
+        self._item_ids: List[Optional[List[str]]] = []
+        self._offsets: Optional[array] = None
+        self._postings: Optional[array] = None
+
+    def _intern(self, video_id: str) -> int:
+        """The integer standing for a video ID."""
+        number = self._video_numbers.get(video_id)
+        if number is None:
+            number = len(self._video_ids)
+            self._video_ids.append(video_id)
+            self._video_numbers[video_id] = number
+        return number
+
+    def __contains__(self, playlist_id: str) -> bool:
+        return playlist_id in self._playlist_numbers
+
+    def add_playlist(self, playlist_id: str, playlist_items: Iterable[PlaylistItem]):
+        """Index (or re-index) a playlist's items, in position order; a stream is read once."""
+        videos = array('I')
+        item_ids = []
+        for item in playlist_items:
+            videos.append(self._intern(item.video_id))
+            item_ids.append(item.id)
+        self.remove_playlist(playlist_id)
+        self._playlist_numbers[playlist_id] = len(self._playlist_ids)
+        self._playlist_ids.append(playlist_id)
+        self._videos.append(videos)
+        self._item_ids.append(item_ids)
+        self._postings = None
+
+    def remove_playlist(self, playlist_id: str):
+        """Drop a playlist that was deleted or has changed."""
+        number = self._playlist_numbers.pop(playlist_id, None)
+        if number is not None:
+            self._playlist_ids[number] = None
+            self._videos[number] = None
+            self._item_ids[number] = None
+            self._postings = None
+
+    def item_count(self, playlist_id: str) -> int:
+        """Number of items (including repeats) in an indexed playlist."""
+        return len(self._videos[self._playlist_numbers[playlist_id]])
+
+    def video_set(self, playlist_id: str) -> Set[int]:
+        """Distinct video numbers of an indexed playlist."""
+        return set(self._videos[self._playlist_numbers[playlist_id]])
+
+    def video_id(self, number: int) -> str:
+        """The video ID behind an interned number."""
+        return self._video_ids[number]
+
+    def new_videos(self, source_ids: List[str], target_id: str) -> List[str]:
+        """Video IDs present in any source playlist but not in the target."""
+        missing = set().union(*(self.video_set(pid) for pid in source_ids)) - self.video_set(target_id)
+        return sorted(self._video_ids[number] for number in missing)
+
+    def _build_postings(self):
+        """(Re)build the video -> entries inverted index."""
+        offsets = array('Q', bytes(8 * (len(self._video_ids) + 1)))
+        for videos in self._videos:
+            if videos is not None:
+                for number in videos:
+                    offsets[number + 1] += 1
+        for n in range(1, len(offsets)):
+            offsets[n] += offsets[n - 1]
+        postings = array('Q', bytes(8 * offsets[-1]))
+        fill = array('Q', offsets[:-1])
+        for playlist_number, videos in enumerate(self._videos):
+            if videos is None:
+                continue
+            for position, number in enumerate(videos):
+                postings[fill[number]] = (playlist_number << self._POSITION_BITS) | position
+                fill[number] += 1
+        self._offsets = offsets
+        self._postings = postings
+
+    def _entries(self, number: int):
+        """Packed postings of a video number."""
+        if self._postings is None:
+            self._build_postings()
+        return self._postings[self._offsets[number]:self._offsets[number + 1]]
+
+    def entries(self, video_id: str) -> List[Tuple[str, str, int]]:
+        """Every (playlist ID, playlistItem ID, position) holding a video."""
+        number = self._video_numbers.get(video_id)
+        if number is None:
+            return []
+        mask = (1 << self._POSITION_BITS) - 1
+        result = []
+        for packed in self._entries(number):
+            playlist_number, position = packed >> self._POSITION_BITS, packed & mask
+            result.append((self._playlist_ids[playlist_number], self._item_ids[playlist_number][position], position))
+        return result
+
+    def playlists_containing(self, video_id: str) -> List[str]:
+        """IDs of the playlists a video appears in."""
+        return list(dict.fromkeys(playlist_id for playlist_id, _, _ in self.entries(video_id)))
+
+    def _distinct_playlists(self, number: int) -> List[int]:
+        """Playlist numbers holding a video number, without repeats."""
+        return sorted({packed >> self._POSITION_BITS for packed in self._entries(number)})
+
+    def shared_video_count(self) -> int:
+        """Videos that appear in more than one playlist."""
+        return sum(1 for number in range(len(self._video_ids)) if len(self._distinct_playlists(number)) > 1)
+
+    def top_overlaps(self, limit: int = 10) -> List[Tuple[str, str, int]]:
+        """Playlist pairs sharing the most videos: (playlist ID, playlist ID, shared count)."""
+        pairs: Dict[Tuple[int, int], int] = defaultdict(int)
+        for number in range(len(self._video_ids)):
+            playlists = self._distinct_playlists(number)
+            for i, first in enumerate(playlists):
+                for second in playlists[i + 1:]:
+                    pairs[first, second] += 1
+        best = sorted(pairs.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+        return [(self._playlist_ids[a], self._playlist_ids[b], count) for (a, b), count in best]
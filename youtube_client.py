@@ -0,0 +1,73 @@
+import os
+from typing import List, Optional
+
+SCOPES = ['https://www.googleapis.com/auth/youtube']
+CLIENT_SECRETS_PATH = 'credentials.json'
+DEFAULT_TOKEN_PATH = os.path.join('.cache', 'token.json')
+OAUTH_PORT = 8080
+
+
+def _save_token(creds, token_path: str):
+    """Store credentials (with their refresh token) readable only by the user."""
+    directory = os.path.dirname(token_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = token_path + '.tmp'
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w', encoding='utf-8') as fh:
+        fh.write(creds.to_json())
+    os.replace(tmp_path, token_path)
+
+
+def load_credentials(client_secrets: str = CLIENT_SECRETS_PATH, token_path: str = DEFAULT_TOKEN_PATH,
+                     scopes: Optional[List[str]] = None, port: int = OAUTH_PORT, interactive: bool = True):
+    """OAuth credentials from the token file, refreshed if expired.
+
+    The browser consent flow only runs when there is no usable token (first
+    run, revoked access or changed scopes); its result is saved for next
+    time. With interactive=False (e.g. under cron) that case raises
+    RuntimeError instead of waiting for a browser.
+    """
+    # The Google auth libraries are slow to import; load them only when needed
+    from google.oauth2.credentials import Credentials
+    scopes = scopes or SCOPES
+
+    creds = None
+    if os.path.exists(token_path):
+        try:
+            creds = Credentials.from_authorized_user_file(token_path, scopes)
+        except ValueError as e:
+            print(f"⚠️  Ignoring unreadable token file {token_path}: {e}")
+    if creds is not None and creds.valid:
+        return creds
+
+    if creds is not None and creds.expired and creds.refresh_token:
+        from google.auth.exceptions import RefreshError
+        from google.auth.transport.requests import Request
+        try:
+            creds.refresh(Request())
+            _save_token(creds, token_path)
+            return creds
+        except RefreshError as e:
+            print(f"⚠️  Stored token could not be refreshed ({e}); signing in again")
+
+    if not interactive:
+        raise RuntimeError(f"No usable OAuth token in {token_path}; run once interactively to sign in")
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    flow = InstalledAppFlow.from_client_secrets_file(client_secrets, scopes=scopes)
+    creds = flow.run_local_server(port=port)
+    _save_token(creds, token_path)
+    return creds
+
+
+def build_youtube(creds, request_builder=None, **kwargs):
+    """A YouTube Data API client built from the discovery document bundled with the library.
+
+    No discovery request goes over the network; extra keyword arguments
+    (http, client_options, ...) are passed to googleapiclient's build().
+    """
+    from googleapiclient.discovery import build
+    if request_builder is not None:
+        kwargs['requestBuilder'] = request_builder
+    if 'http' not in kwargs:
+        kwargs['credentials'] = creds
+    return build('youtube', 'v3', static_discovery=True, cache_discovery=False, **kwargs)